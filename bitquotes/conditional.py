@@ -0,0 +1,56 @@
+"""
+Respuestas condicionales (ETag) para vistas de solo lectura.
+
+Cada vista declara una función que arma sus validadores con una sola consulta
+barata (fechas `updated`, conteos, máximos) sin cargar objetos ni relaciones.
+Con el If-None-Match del navegador, Django responde 304 antes de ejecutar la
+vista, así que tampoco se renderiza la plantilla.
+
+Al ETag se agregan el usuario, la versión de su perfil (rol), la del directorio
+de usuarios (nombres) y el secreto CSRF, porque las páginas cambian con ellos.
+Si hay mensajes pendientes no se valida: la página tiene que mostrarlos.
+"""
+import hashlib
+from functools import wraps
+
+from django.contrib.messages import get_messages
+from django.utils.cache import patch_cache_control
+from django.views.decorators.http import condition
+
+from users.capabilities import get_profile_version
+from users.directory import get_directory_version
+
+
+def etag_for(request, validators):
+    """ETag de la respuesta, o None si no se puede validar."""
+    if validators is None or len(get_messages(request)):
+        return None
+
+    user_id = request.user.pk
+    parts = (user_id, get_profile_version(user_id), get_directory_version(), request.META.get("CSRF_COOKIE", ""), *validators)
+    return hashlib.md5("|".join(map(str, parts)).encode(), usedforsecurity=False).hexdigest()
+
+
+def conditional_view(get_validators):
+    """
+    Decorador para vistas GET. get_validators(request, *args, **kwargs) regresa
+    una tupla con lo que determina el contenido, o None cuando no aplica (p. ej.
+    el objeto no existe o no es visible: la vista responde como siempre).
+
+    Va debajo de @login_required. La respuesta se marca como privada y con
+    no-cache para que el navegador siempre revalide.
+    """
+    def etag_func(request, *args, **kwargs):
+        return etag_for(request, get_validators(request, *args, **kwargs))
+
+    def decorator(view):
+        @condition(etag_func=etag_func)
+        @wraps(view)
+        def wrapped(request, *args, **kwargs):
+            response = view(request, *args, **kwargs)
+            patch_cache_control(response, private=True, no_cache=True)
+            return response
+
+        return wrapped
+
+    return decorator
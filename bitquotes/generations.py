@@ -0,0 +1,83 @@
+"""
+Contadores de generación por modelo para armar llaves de cache versionadas.
+
+Cada modelo seguido (ver TRACKED_MODELS) tiene un número en el cache que sube
+con cada alta, cambio o baja (receivers de cada app). Una llave que incluye las
+generaciones de los modelos de los que depende deja de usarse sola cuando
+alguno cambia, sin borrar nada:
+
+    key = versioned_key("quotes:detail", "quotes.Quote", "catalog.Product", pk)
+
+Si el cache pierde un contador (reinicio, desalojo) se vuelve a crear con la
+hora actual en nanosegundos, así que nunca repite una generación anterior.
+"""
+import time
+
+from django.core.cache import cache
+
+from cachebus import bus
+
+TRACKED_MODELS = (
+    "quotes.quote",
+    "quotes.quoteline",
+    "catalog.product",
+    "customers.customer",
+    "customers.contact",
+    "users.profile",
+    "users.customuser",
+)
+
+
+def _label(model):
+    label = model if isinstance(model, str) else model._meta.label
+    return label.lower()
+
+
+def _key(model):
+    return f"generation:{_label(model)}"
+
+
+def get_generations(*models):
+    """Generación actual de cada modelo, en el mismo orden."""
+    keys = [_key(model) for model in models]
+    found = cache.get_many(keys)
+
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    for key, value in missing.items():
+        # add() no pisa un contador que otro proceso acaba de crear
+        if not cache.add(key, value, timeout=None):
+            missing[key] = cache.get(key, value)
+
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+def get_generation(model):
+    return get_generations(model)[0]
+
+
+def bump_generation(*models):
+    for model in models:
+        key = _key(model)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+        bus.publish(key)
+
+
+def versioned_key(prefix, *parts):
+    """
+    Llave con las generaciones de los modelos incluidos en parts (clases o
+    "app.Modelo"); el resto de las partes (pk, alcance...) va tal cual.
+    """
+    models = [part for part in parts if isinstance(part, type) or (isinstance(part, str) and _label(part) in TRACKED_MODELS)]
+    generations = iter(get_generations(*models))
+
+    pieces = [prefix]
+    for part in parts:
+        if part in models:
+            pieces.append(f"{_label(part)}.{next(generations)}")
+        else:
+            pieces.append(str(part))
+
+    return ":".join(pieces)
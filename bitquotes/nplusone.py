@@ -0,0 +1,119 @@
+"""
+Detector de consultas N+1 para desarrollo.
+
+Registra la forma de cada consulta de la request (el SQL con sus %s; las listas
+IN (%s, %s, ...) cuentan como una sola forma) y de dónde salió: la línea de la
+plantilla que se estaba renderizando o, si no hay plantilla, la línea del código
+del proyecto. Una misma forma repetida NPLUSONE_THRESHOLD veces o más es casi
+siempre un FK o un conteo resuelto fila por fila (falta select_related /
+prefetch_related / annotate).
+
+NPlusOneMiddleware lo activa con NPLUSONE_DETECTION (por defecto igual que
+DEBUG): escribe un warning por forma repetida y agrega el encabezado
+X-NPlusOne. Las pruebas usan track_queries() directamente.
+"""
+import logging
+import re
+import sys
+from collections import Counter, defaultdict
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+IN_LIST = re.compile(r"IN \((?:%s, )*%s\)")
+PROJECT_DIR = str(settings.BASE_DIR)
+# Envolturas de la conexión (esta y la de Server-Timing), no el origen de la consulta
+WRAPPER_FILES = {str(Path(__file__).resolve()), str(Path(__file__).resolve().with_name("timing.py"))}
+
+
+def query_shape(sql):
+    return IN_LIST.sub("IN (...)", sql)
+
+
+def query_origin():
+    """"plantilla.html:línea" del nodo que se renderizaba, o "archivo.py:línea" del proyecto."""
+    frame = sys._getframe(1)
+    code_line = None
+    while frame is not None:
+        node = frame.f_locals.get("self")
+        if frame.f_code.co_name == "render_annotated" and isinstance(node, Node):
+            return f"{node.origin.template_name}:{node.token.lineno}"
+
+        filename = frame.f_code.co_filename
+        if (
+            code_line is None
+            and filename.startswith(PROJECT_DIR)
+            and filename not in WRAPPER_FILES
+            and "site-packages" not in filename
+        ):
+            code_line = f"{Path(filename).relative_to(PROJECT_DIR)}:{frame.f_lineno}"
+        frame = frame.f_back
+
+    return code_line
+
+
+class QueryShapeTracker:
+    def __init__(self):
+        self.shapes = defaultdict(list)
+
+    def __call__(self, execute, sql, params, many, context):
+        self.shapes[query_shape(sql)].append(query_origin())
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return sum(len(origins) for origins in self.shapes.values())
+
+    def repeated(self, threshold=None):
+        """[(forma, veces, origen más frecuente)] de las formas repetidas, de más a menos."""
+        threshold = threshold or settings.NPLUSONE_THRESHOLD
+        problems = []
+        for shape, origins in self.shapes.items():
+            if len(origins) >= threshold:
+                origin = Counter(origins).most_common(1)[0][0]
+                problems.append((shape, len(origins), origin))
+        return sorted(problems, key=lambda problem: problem[1], reverse=True)
+
+
+@contextmanager
+def track_queries():
+    """Registra las consultas de todas las conexiones mientras dura el bloque."""
+    tracker = QueryShapeTracker()
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(tracker))
+        yield tracker
+
+
+class NPlusOneMiddleware:
+    """Avisa de consultas N+1 en cada request (solo con NPLUSONE_DETECTION)."""
+
+    def __init__(self, get_response):
+        if not settings.NPLUSONE_DETECTION:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with track_queries() as tracker:
+            response = self.get_response(request)
+
+        problems = tracker.repeated()
+        for shape, times, origin in problems:
+            logger.warning(
+                "N+1 en %s %s: %s consultas iguales desde %s\n  %s",
+                request.method,
+                request.path,
+                times,
+                origin or "?",
+                shape,
+            )
+        if problems:
+            response["X-NPlusOne"] = ", ".join(f"{times}x {origin or '?'}" for _, times, origin in problems)
+
+        return response
@@ -0,0 +1,107 @@
+"""
+Lecturas en una réplica de la base de datos.
+
+Las cargas de solo lectura (dashboard, búsquedas typeahead, reportes) se marcan
+con @replica_reads o `with reading_from_replica():` y ReplicaRouter manda sus
+consultas al alias "replica" (DB_REPLICA_NAME en .env). Todo lo demás, y toda
+escritura, va a "default".
+
+Para que un usuario vea lo que acaba de guardar aunque la réplica vaya atrasada,
+ReplicaPinMiddleware detecta las escrituras de la request (INSERT / UPDATE /
+DELETE en "default") y deja una cookie que manda sus lecturas al primario
+durante DB_REPLICA_PIN_SECONDS.
+
+Sin réplica configurada nada de esto hace algo.
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_ALIAS = "replica"
+PIN_COOKIE = "db_pin"
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+# Guardar la sesión no cuenta como escritura del usuario
+IGNORED_TABLES = ("django_session",)
+
+_use_replica = ContextVar("use_replica", default=False)
+_pinned = ContextVar("db_pinned", default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def reading_from_replica():
+    token = _use_replica.set(True)
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def replica_reads(view):
+    """Decorador de vista: sus lecturas van a la réplica (salvo usuario fijado al primario)."""
+    @wraps(view)
+    def wrapped(*args, **kwargs):
+        with reading_from_replica():
+            return view(*args, **kwargs)
+
+    return wrapped
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if _use_replica.get() and not _pinned.get() and replica_configured():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Explícito: un objeto leído de la réplica se guarda en el primario
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Mismos datos en los dos alias
+        return True
+
+
+class ReplicaPinMiddleware:
+    """Fija al primario las lecturas del usuario durante un rato después de escribir."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not replica_configured():
+            return self.get_response(request)
+
+        wrote = []
+
+        def track_writes(execute, sql, params, many, context):
+            statement = sql.lstrip()[:7].upper()
+            if statement.startswith(WRITE_STATEMENTS) and not any(table in sql for table in IGNORED_TABLES):
+                wrote.append(True)
+                # Lo que resta de la request también lee del primario
+                _pinned.set(True)
+            return execute(sql, params, many, context)
+
+        token = _pinned.set(PIN_COOKIE in request.COOKIES)
+        try:
+            with connections[DEFAULT_DB_ALIAS].execute_wrapper(track_writes):
+                response = self.get_response(request)
+        finally:
+            _pinned.reset(token)
+
+        if wrote:
+            response.set_cookie(
+                PIN_COOKIE,
+                "1",
+                max_age=settings.DB_REPLICA_PIN_SECONDS,
+                httponly=True,
+                samesite="Lax",
+            )
+
+        return response
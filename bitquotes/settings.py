@@ -38,6 +38,8 @@ INSTALLED_APPS = [
     "catalog.apps.CatalogConfig",
     "customers.apps.CustomersConfig",
     "quotes.apps.QuotesConfig",
+    "taskqueue.apps.TaskqueueConfig",
+    "cachebus.apps.CachebusConfig",
 ]
 
 
@@ -46,11 +48,16 @@ INSTALLED_APPS = [
 # ============================================================
 
 MIDDLEWARE = [
+    "bitquotes.timing.ServerTimingMiddleware",
     'django.middleware.security.SecurityMiddleware',
+    "bitquotes.nplusone.NPlusOneMiddleware",
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
+    "cachebus.middleware.CacheBusMiddleware",
+    "bitquotes.replica.ReplicaPinMiddleware",
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    "users.middleware.CapabilitiesMiddleware",
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -64,10 +71,18 @@ ROOT_URLCONF = 'bitquotes.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates que mide el render para Server-Timing (bitquotes/timing.py)
+        'BACKEND': 'bitquotes.timing.DjangoTemplates',
         'DIRS': [BASE_DIR / "templates"],
-        'APP_DIRS': True,
+        'APP_DIRS': False,
         'OPTIONS': {
+            # Plantillas compiladas una vez por proceso (ver bitquotes/warmup.py)
+            'loaders': [
+                ('django.template.loaders.cached.Loader', [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ]),
+            ],
             'context_processors': [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
@@ -79,6 +94,21 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'bitquotes.wsgi.application'
 
+# Encabezado Server-Timing y una línea de log por request con tiempos de SQL,
+# plantillas, cache y PDF. Ver bitquotes/timing.py.
+SERVER_TIMING = config("SERVER_TIMING", default=True, cast=bool)
+# El encabezado expone tiempos internos: solo va a usuarios staff o con DEBUG,
+# salvo SERVER_TIMING_HEADER=True (a todos). La línea de log sale siempre.
+SERVER_TIMING_HEADER = config("SERVER_TIMING_HEADER", default=False, cast=bool)
+
+# Avisar de consultas N+1 (misma consulta NPLUSONE_THRESHOLD veces o más en una
+# request) con la línea de plantilla que las genera. Ver bitquotes/nplusone.py.
+NPLUSONE_DETECTION = config("NPLUSONE_DETECTION", default=DEBUG, cast=bool)
+NPLUSONE_THRESHOLD = config("NPLUSONE_THRESHOLD", default=3, cast=int)
+
+# Compilar plantillas y URLs y llenar caches al cargar el WSGI de cada worker
+WARMUP_ON_BOOT = config("WARMUP_ON_BOOT", default=True, cast=bool)
+
 
 # ============================================================
 # Database configuration (SQLite or PostgreSQL via .env)
@@ -86,13 +116,36 @@ WSGI_APPLICATION = 'bitquotes.wsgi.application'
 
 DB_ENGINE = config("DB_ENGINE", default="sqlite")
 
-if DB_ENGINE == "sqlite":
+# DB_ENGINE=sqlite-tuned: SQLite para producción con varios workers. WAL deja leer
+# mientras alguien escribe, BEGIN IMMEDIATE toma el candado de escritura al inicio
+# de la transacción (sin "database is locked" al pasar de lectura a escritura),
+# los escritores esperan hasta `timeout` segundos y la conexión se reutiliza entre
+# requests. Comparar con `manage.py bench_sqlite`. WAL no funciona en discos de red.
+SQLITE_TUNED_OPTIONS = {
+    "transaction_mode": "IMMEDIATE",
+    "timeout": 20,
+    "init_command": (
+        "PRAGMA journal_mode=WAL;"
+        "PRAGMA synchronous=NORMAL;"
+        "PRAGMA mmap_size=134217728;"
+        "PRAGMA temp_store=MEMORY;"
+        "PRAGMA cache_size=-20000;"
+    ),
+}
+
+if DB_ENGINE in ("sqlite", "sqlite-tuned"):
     DATABASES = {
         "default": {
             "ENGINE": "django.db.backends.sqlite3",
             "NAME": BASE_DIR / config("DB_NAME", default="db.sqlite3"),
         }
     }
+    if DB_ENGINE == "sqlite-tuned":
+        DATABASES["default"].update({
+            "OPTIONS": SQLITE_TUNED_OPTIONS,
+            "CONN_MAX_AGE": config("DB_CONN_MAX_AGE", default=600, cast=int),
+            "CONN_HEALTH_CHECKS": True,
+        })
 else:
     DATABASES = {
         "default": {
@@ -105,6 +158,81 @@ else:
         }
     }
 
+# Réplica de solo lectura para dashboard, búsquedas y reportes (ver
+# bitquotes/replica.py). En SQLite es otro archivo (para probar en local:
+# cp db.sqlite3 replica.sqlite3 y DB_REPLICA_NAME=replica.sqlite3); en PostgreSQL,
+# otra base u otro host con los mismos usuario y contraseña.
+DB_REPLICA_NAME = config("DB_REPLICA_NAME", default="")
+DB_REPLICA_PIN_SECONDS = config("DB_REPLICA_PIN_SECONDS", default=15, cast=int)
+
+if DB_REPLICA_NAME:
+    DATABASES["replica"] = {
+        **DATABASES["default"],
+        "NAME": BASE_DIR / DB_REPLICA_NAME if DATABASES["default"]["ENGINE"].endswith("sqlite3") else DB_REPLICA_NAME,
+        "HOST": config("DB_REPLICA_HOST", default=DATABASES["default"].get("HOST", "")),
+        "PORT": config("DB_REPLICA_PORT", default=DATABASES["default"].get("PORT", "")),
+        "TEST": {"MIRROR": "default"},
+    }
+
+DATABASE_ROUTERS = ["bitquotes.replica.ReplicaRouter"]
+
+
+# ============================================================
+# Cache (memoria local, archivos, Redis o memcached via .env)
+# ============================================================
+# CACHE_BACKEND=locmem (por defecto, un cache por proceso), file (CACHE_LOCATION
+# es un directorio compartido por los workers del host), redis
+# (CACHE_LOCATION=redis://127.0.0.1:6379/1, requiere redis) o memcached
+# (CACHE_LOCATION=127.0.0.1:11211, requiere pymemcache).
+
+# Los backends de Django con conteo de aciertos y fallos para Server-Timing
+CACHE_BACKENDS = {
+    "locmem": "bitquotes.timing.LocMemCache",
+    "file": "bitquotes.timing.FileBasedCache",
+    "redis": "bitquotes.timing.RedisCache",
+    "memcached": "bitquotes.timing.PyMemcacheCache",
+}
+
+CACHE_BACKEND = config("CACHE_BACKEND", default="locmem")
+
+CACHES = {
+    "default": {
+        "BACKEND": CACHE_BACKENDS.get(CACHE_BACKEND, CACHE_BACKEND),
+        "LOCATION": config(
+            "CACHE_LOCATION",
+            default=str(BASE_DIR / "cache") if CACHE_BACKEND == "file" else "bitquotes",
+        ),
+        "TIMEOUT": config("CACHE_TIMEOUT", default=300, cast=int),
+        "KEY_PREFIX": config("CACHE_KEY_PREFIX", default="bitquotes"),
+    }
+}
+
+# Con un cache por proceso (locmem) o por host (file) las invalidaciones se
+# avisan a los demás workers por la base de datos (ver cachebus/bus.py).
+CACHE_BUS = config("CACHE_BUS", default=CACHE_BACKEND in ("locmem", "file"), cast=bool)
+
+
+# ============================================================
+# Logging
+# ============================================================
+# Los módulos del proyecto (bitquotes.timing, bitquotes.nplusone, warmup, outbox,
+# taskqueue) escriben en consola desde LOG_LEVEL.
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {
+        "simple": {"format": "{asctime} {levelname} {name} {message}", "style": "{"},
+    },
+    "handlers": {
+        "console": {"class": "logging.StreamHandler", "formatter": "simple"},
+    },
+    "loggers": {
+        app: {"handlers": ["console"], "level": config("LOG_LEVEL", default="INFO"), "propagate": False}
+        for app in ("bitquotes", "quotes", "taskqueue", "cachebus", "users", "customers", "catalog")
+    },
+}
+
 
 # ============================================================
 # Password validation
@@ -180,6 +308,11 @@ EMAIL_PORT = config("EMAIL_PORT", cast=int)
 EMAIL_USE_TLS = config("EMAIL_USE_TLS", cast=bool)
 DEFAULT_FROM_EMAIL = config("DEFAULT_FROM_EMAIL")
 
-# Optional: fallback to console backend when no password is provided
-if not EMAIL_HOST_PASSWORD:
-    EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+# Optional: fallback to console backend when no password is provided.
+# EMAIL_BACKEND en .env lo fuerza (p. ej. SMTP contra un servidor local de pruebas:
+# EMAIL_HOST=localhost, EMAIL_PORT=1025, EMAIL_USE_TLS=False).
+EMAIL_BACKEND = config(
+    "EMAIL_BACKEND",
+    default="django.core.mail.backends.smtp.EmailBackend" if EMAIL_HOST_PASSWORD else "django.core.mail.backends.console.EmailBackend",
+)
+EMAIL_TIMEOUT = config("EMAIL_TIMEOUT", default=30, cast=int)
@@ -0,0 +1,213 @@
+"""
+Tiempos por request: SQL (consultas y tiempo), render de plantillas, cache
+(aciertos, fallos y tiempo) y generación de PDF.
+
+ServerTimingMiddleware los junta en cada request y los escribe en una línea de
+log `request metodo=... ruta=... total_ms=... db_ms=...` (también en
+`extra={"timings": ...}` para formatters JSON). El encabezado Server-Timing
+(pestaña Network / Timing de las devtools) solo se agrega para usuarios staff,
+con DEBUG o con SERVER_TIMING_HEADER=True: a cualquier otro cliente le diría
+cuánto tardan la base y el cache. Todo se apaga con SERVER_TIMING=False.
+
+Lo que se mide solo suma perf_counter() alrededor de llamadas que ya ocurren
+(un execute_wrapper en la conexión, el backend de plantillas y el de cache), así
+que se puede dejar prendido en producción. Fuera de una request (comandos,
+workers) timed() no hace nada.
+
+Los tiempos se traslapan: "tpl" incluye el SQL que se ejecuta al renderizar y
+"pdf" incluye su plantilla.
+"""
+import logging
+from collections import defaultdict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from time import perf_counter
+
+from django.conf import settings
+from django.core.cache.backends import filebased, locmem, memcached, redis
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.template import TemplateDoesNotExist
+from django.template.backends import django as django_backend
+
+logger = logging.getLogger(__name__)
+
+_current = ContextVar("request_timings", default=None)
+# BaseCache.get_many llama a get() por llave: no contarlas dos veces
+_in_get_many = ContextVar("in_get_many", default=False)
+_MISSING = object()
+
+METRICS = (
+    # (nombre en Server-Timing, descripción)
+    ("db", "SQL"),
+    ("tpl", "Plantillas"),
+    ("cache", "Cache"),
+    ("pdf", "PDF"),
+)
+
+
+class RequestTimings:
+    def __init__(self):
+        self.seconds = defaultdict(float)
+        self.counts = defaultdict(int)
+
+    def add(self, name, seconds, count=1):
+        self.seconds[name] += seconds
+        self.counts[name] += count
+
+    def as_dict(self):
+        data = {f"{name}_ms": round(self.seconds[name] * 1000, 1) for name, _ in METRICS if name in self.counts}
+        data["db_queries"] = self.counts["db"]
+        data["cache_hits"] = self.counts["cache_hit"]
+        data["cache_misses"] = self.counts["cache_miss"]
+        return data
+
+    def header(self, total):
+        entries = []
+        for name, description in METRICS:
+            if name not in self.counts:
+                continue
+            if name == "db":
+                description = f"{description} ({self.counts['db']})"
+            elif name == "cache":
+                description = f"{description} ({self.counts['cache_hit']} aciertos, {self.counts['cache_miss']} fallos)"
+            entries.append(f'{name};dur={self.seconds[name] * 1000:.1f};desc="{description}"')
+        entries.append(f'total;dur={total * 1000:.1f};desc="Total"')
+        return ", ".join(entries)
+
+
+@contextmanager
+def timed(name):
+    """Suma la duración del bloque a la métrica `name` de la request en curso."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+
+    started = perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, perf_counter() - started)
+
+
+def _time_query(execute, sql, params, many, context):
+    with timed("db"):
+        return execute(sql, params, many, context)
+
+
+# ---------------------------------------------------------------------------
+# Plantillas: backend de Django que mide cada render de primer nivel (render(),
+# render_to_string, TemplateResponse). Los {% include %} quedan dentro.
+# ---------------------------------------------------------------------------
+
+class TimedTemplate(django_backend.Template):
+    def render(self, context=None, request=None):
+        with timed("tpl"):
+            return super().render(context, request)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+# ---------------------------------------------------------------------------
+# Cache: los backends de CACHE_BACKENDS con conteo de aciertos y fallos.
+# ---------------------------------------------------------------------------
+
+class TimedCacheMixin:
+    def get(self, key, default=None, version=None):
+        timings = _current.get()
+        if timings is None or _in_get_many.get():
+            return super().get(key, default, version)
+
+        started = perf_counter()
+        value = super().get(key, _MISSING, version)
+        timings.add("cache", perf_counter() - started)
+        timings.counts["cache_miss" if value is _MISSING else "cache_hit"] += 1
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        timings = _current.get()
+        if timings is None:
+            return super().get_many(keys, version)
+
+        keys = list(keys)
+        started = perf_counter()
+        token = _in_get_many.set(True)
+        try:
+            values = super().get_many(keys, version)
+        finally:
+            _in_get_many.reset(token)
+        timings.add("cache", perf_counter() - started)
+        timings.counts["cache_hit"] += len(values)
+        timings.counts["cache_miss"] += len(keys) - len(values)
+        return values
+
+
+class LocMemCache(TimedCacheMixin, locmem.LocMemCache):
+    pass
+
+
+class FileBasedCache(TimedCacheMixin, filebased.FileBasedCache):
+    pass
+
+
+class RedisCache(TimedCacheMixin, redis.RedisCache):
+    pass
+
+
+class PyMemcacheCache(TimedCacheMixin, memcached.PyMemcacheCache):
+    pass
+
+
+def header_allowed(request):
+    if settings.SERVER_TIMING_HEADER or settings.DEBUG:
+        return True
+    # AuthenticationMiddleware ya corrió; request.user ya se cargó en la vista
+    user = getattr(request, "user", None)
+    return user is not None and user.is_staff
+
+
+class ServerTimingMiddleware:
+    """Debe ir primero en MIDDLEWARE para que "total" cubra toda la request."""
+
+    def __init__(self, get_response):
+        if not settings.SERVER_TIMING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = perf_counter()
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = perf_counter() - started
+
+        if header_allowed(request):
+            response["Server-Timing"] = timings.header(total)
+
+        data = {"total_ms": round(total * 1000, 1), **timings.as_dict()}
+        logger.info(
+            "request metodo=%s ruta=%s estatus=%s %s",
+            request.method,
+            request.path,
+            response.status_code,
+            " ".join(f"{key}={value}" for key, value in data.items()),
+            extra={"timings": data},
+        )
+
+        return response
@@ -0,0 +1,104 @@
+"""
+Calentamiento del proceso al arrancar un worker.
+
+Compila las plantillas pesadas (y las que extienden o incluyen) en el cached
+loader, compila los patrones de URL y llena los caches que lee casi cualquier
+request (directorio de usuarios, reglas de aprobación, bus de invalidación).
+Así la primera request después de un deploy o de reciclar un worker no paga
+esos costos. Se llama desde bitquotes/wsgi.py (WARMUP_ON_BOOT) y desde el
+comando `manage.py warmup`.
+
+El cache de plantillas y el de URLs viven en el proceso: correr el comando
+aparte solo llena los caches compartidos (Redis, memcached, archivos).
+
+Al terminar cierra las conexiones a la base: con `gunicorn --preload` el
+calentamiento corre en el maestro antes del fork y los workers heredarían el
+mismo socket. Cada worker abre la suya en su primera request.
+"""
+import logging
+import time
+
+from django.db import connection, connections
+from django.template.loader import get_template
+from django.template.loader_tags import ExtendsNode, IncludeNode
+from django.urls import URLResolver, get_resolver
+
+logger = logging.getLogger(__name__)
+
+TEMPLATES = (
+    "base.html",
+    "quotes/quotes_list.html",
+    "quotes/quote_detail.html",
+    "quotes/quote_edit.html",
+    "quotes/quote_pdf.html",
+)
+
+
+def warm_templates(names=TEMPLATES):
+    """Compila las plantillas y las que extienden o incluyen con nombre fijo."""
+    pending = list(names)
+    compiled = set()
+
+    while pending:
+        name = pending.pop()
+        if name in compiled:
+            continue
+
+        template = get_template(name).template
+        compiled.add(name)
+
+        for node in template.nodelist.get_nodes_by_type(ExtendsNode):
+            if isinstance(node.parent_name.var, str):
+                pending.append(node.parent_name.var)
+        for node in template.nodelist.get_nodes_by_type(IncludeNode):
+            if isinstance(node.template.var, str):
+                pending.append(node.template.var)
+
+    return compiled
+
+
+def warm_urls(resolver=None):
+    """Compila las expresiones y los índices de reverse() de todos los patrones."""
+    resolver = resolver or get_resolver()
+    # Acceder a reverse_dict llena los índices de reverse() y los namespaces
+    resolver.reverse_dict
+
+    count = 0
+    for pattern in resolver.url_patterns:
+        pattern.pattern.regex
+        count += 1
+        if isinstance(pattern, URLResolver):
+            count += warm_urls(pattern)
+
+    return count
+
+
+def warm_caches():
+    # Importes locales: este módulo se carga desde wsgi.py
+    from cachebus import bus
+    from quotes.models import ApprovalRule
+    from users.directory import active_users
+
+    connection.ensure_connection()
+    bus.sync()
+    return {
+        "users": len(active_users()),
+        "approval_rules": len(ApprovalRule.active_rules()),
+    }
+
+
+def warm_up():
+    """Corre todos los pasos; una falla se registra pero no detiene el arranque."""
+    report = {}
+    for step, func in (("templates", warm_templates), ("urls", warm_urls), ("caches", warm_caches)):
+        started = time.perf_counter()
+        try:
+            result = func()
+        except Exception:
+            logger.exception("warmup: falló el paso %s", step)
+            result = None
+        report[step] = (result, int((time.perf_counter() - started) * 1000))
+        logger.info("warmup paso=%s duracion_ms=%s", step, report[step][1])
+
+    connections.close_all()
+    return report
@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class CachebusConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'cachebus'
+    verbose_name = "Invalidación de cache"
@@ -0,0 +1,103 @@
+"""
+Bus de invalidación entre procesos, sin broker externo.
+
+Las llaves de versión (directorio de usuarios, perfiles, generaciones por
+modelo, dashboard, reglas de aprobación) viven en el cache de Django. Con
+LocMemCache cada worker de gunicorn tiene el suyo, así que un cambio en un
+proceso no llega a los demás. publish() registra la llave en la tabla
+CacheVersion; sync() (una vez por request, ver cachebus/middleware.py, y en cada
+vuelta del worker de tareas) lee las filas que cambiaron desde la última
+revisión y borra esas llaves del cache local. La siguiente lectura crea una
+versión nueva y todo lo que dependía de la anterior deja de usarse.
+
+La consulta de sync() usa el índice de `updated` y normalmente no regresa filas.
+Se relee una ventana de OVERLAP para cubrir transacciones que confirman tarde y
+relojes desfasados entre hosts; las filas repetidas se ignoran por versión.
+
+Con un cache compartido (Redis, memcached) no hace falta: CACHE_BUS=False.
+"""
+import threading
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .models import CacheVersion
+
+OVERLAP = timedelta(seconds=60)
+
+_lock = threading.Lock()
+_seen = {}
+_checked = None
+
+
+def enabled():
+    return getattr(settings, "CACHE_BUS", False)
+
+
+def publish(*keys):
+    """Avisa a los demás procesos que estas llaves del cache cambiaron."""
+    if not enabled():
+        return
+
+    now = timezone.now()
+    for key in keys:
+        if not CacheVersion.objects.filter(key=key).update(version=F("version") + 1, updated=now):
+            CacheVersion.objects.get_or_create(key=key, defaults={"version": 1, "updated": now})
+
+
+def shared_version(key):
+    """
+    Versión de `key` igual en todos los procesos, para lo que sale del proceso
+    (ETag, sesión). Con el bus es el contador de CacheVersion: se lee de la base
+    al no estar en el cache local y se queda ahí hasta que sync() la borra. Con un
+    cache compartido basta un valor aleatorio en ese cache.
+    """
+    version = cache.get(key)
+    if version is None:
+        if enabled():
+            version = CacheVersion.objects.filter(key=key).values_list("version", flat=True).first() or 0
+            cache.set(key, version, timeout=None)
+        else:
+            version = cache.get_or_set(key, lambda: uuid.uuid4().hex, timeout=None)
+    return version
+
+
+def bump_shared_version(key):
+    if enabled():
+        cache.delete(key)
+        publish(key)
+    else:
+        cache.set(key, uuid.uuid4().hex, timeout=None)
+
+
+def sync():
+    """
+    Borra del cache local las llaves publicadas por otros procesos desde la
+    última revisión. La primera vez del proceso revisa toda la tabla.
+    """
+    global _checked
+
+    if not enabled():
+        return []
+
+    with _lock:
+        now = timezone.now()
+        rows = CacheVersion.objects.all()
+        if _checked is not None:
+            rows = rows.filter(updated__gte=_checked - OVERLAP)
+
+        stale = []
+        for key, version in rows.values_list("key", "version"):
+            if _seen.get(key) != version:
+                _seen[key] = version
+                stale.append(key)
+
+        if stale:
+            cache.delete_many(stale)
+        _checked = now
+
+    return stale
@@ -0,0 +1,15 @@
+from . import bus
+
+
+class CacheBusMiddleware:
+    """
+    Aplica las invalidaciones de otros procesos (ver cachebus/bus.py) una vez al
+    inicio de cada request, antes de que cualquier vista lea del cache.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        bus.sync()
+        return self.get_response(request)
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CacheVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=200, unique=True, verbose_name='Llave')),
+                ('version', models.PositiveBigIntegerField(default=0, verbose_name='Versión')),
+                ('updated', models.DateTimeField(db_index=True, verbose_name='Actualizada')),
+            ],
+            options={
+                'verbose_name': 'Versión de cache',
+                'verbose_name_plural': 'Versiones de cache',
+            },
+        ),
+    ]
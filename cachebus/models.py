@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class CacheVersion(models.Model):
+    """
+    Una fila por llave de versión del cache. Cada invalidación sube `version` y
+    `updated`; los demás procesos revisan las filas recientes (ver
+    cachebus/bus.py) y borran esas llaves de su cache local.
+    """
+    key = models.CharField(max_length=200, unique=True, verbose_name="Llave")
+    version = models.PositiveBigIntegerField(default=0, verbose_name="Versión")
+    updated = models.DateTimeField(db_index=True, verbose_name="Actualizada")
+
+    class Meta:
+        verbose_name = "Versión de cache"
+        verbose_name_plural = "Versiones de cache"
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
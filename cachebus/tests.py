@@ -0,0 +1,75 @@
+from contextlib import contextmanager
+from unittest import mock
+
+from django.core.cache import caches
+from django.test import TestCase, override_settings
+
+from . import bus
+
+TWO_PROCESSES = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "proceso-a"},
+    "other": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "proceso-b"},
+}
+
+
+class Process:
+    """Un worker: su propio cache local y el estado de sync() de cachebus.bus."""
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+        self.seen = {}
+        self.checked = None
+
+    @contextmanager
+    def active(self):
+        with mock.patch.multiple(bus, cache=self.cache, _seen=self.seen, _checked=self.checked):
+            try:
+                yield
+            finally:
+                self.checked = bus._checked
+
+    def sync(self):
+        with self.active():
+            return bus.sync()
+
+
+@override_settings(CACHES=TWO_PROCESSES, CACHE_BUS=True)
+class CacheBusTests(TestCase):
+    def setUp(self):
+        self.a = Process("default")
+        self.b = Process("other")
+        # Primera revisión de cada proceso
+        self.a.sync()
+        self.b.sync()
+
+    def test_publish_evicts_key_in_other_process(self):
+        self.a.cache.set("dashboard:1", "a")
+        self.b.cache.set("dashboard:1", "b")
+        self.b.cache.set("dashboard:2", "b")
+
+        with self.a.active():
+            bus.publish("dashboard:1")
+
+        self.assertEqual(self.b.cache.get("dashboard:1"), "b")
+        self.assertEqual(self.b.sync(), ["dashboard:1"])
+        self.assertIsNone(self.b.cache.get("dashboard:1"))
+        self.assertEqual(self.b.cache.get("dashboard:2"), "b")
+        # Ya revisada: la fila que se relee por OVERLAP no se vuelve a borrar
+        self.b.cache.set("dashboard:1", "b2")
+        self.assertEqual(self.b.sync(), [])
+        self.assertEqual(self.b.cache.get("dashboard:1"), "b2")
+
+    def test_shared_version(self):
+        with self.a.active():
+            version = bus.shared_version("directorio")
+        with self.b.active():
+            self.assertEqual(bus.shared_version("directorio"), version)
+
+        with self.a.active():
+            bus.bump_shared_version("directorio")
+            bumped = bus.shared_version("directorio")
+        self.assertNotEqual(bumped, version)
+
+        self.b.sync()
+        with self.b.active():
+            self.assertEqual(bus.shared_version("directorio"), bumped)
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bitquotes.generations import bump_generation
+from .models import Product
+
+
+@receiver(post_save, sender=Product, dispatch_uid="catalog_bump_product_generation_on_save")
+@receiver(post_delete, sender=Product, dispatch_uid="catalog_bump_product_generation_on_delete")
+def bump_product_generation(sender, **kwargs):
+    bump_generation(Product)
@@ -1,7 +1,15 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
 
+from .forms import CustomerImportForm
+from .importers import CONTACT_COLUMNS, CUSTOMER_COLUMNS, CustomerImporter, ImportFileError, iter_rows
 from .models import Customer, Contact
 
+# Errores que se muestran en pantalla después de una importación desde el admin
+IMPORT_MAX_ERRORS_SHOWN = 200
+
 class ContactInline(admin.StackedInline):
     model = Contact
     verbose_name = "Contacto"
@@ -32,6 +40,58 @@ class CustomerAdmin(admin.ModelAdmin):
     list_select_related = ("assigned_to",)
     list_per_page = 50
     inlines = [ContactInline]
+    change_list_template = "admin/customers/customer/change_list.html"
+
+    def get_urls(self):
+        urls = [
+            path("import/", self.admin_site.admin_view(self.import_view), name="customers_customer_import"),
+        ]
+
+        return urls + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+
+        form = CustomerImportForm(request.POST or None, request.FILES or None)
+        stats = None
+        errors = []
+
+        if request.method == "POST" and form.is_valid():
+            upload = form.cleaned_data["file"]
+
+            def collect_error(row_number, message):
+                if len(errors) < IMPORT_MAX_ERRORS_SHOWN:
+                    errors.append((row_number, message))
+
+            importer = CustomerImporter(user=request.user, on_error=collect_error)
+
+            try:
+                stats = importer.run(iter_rows(upload.file, upload.name))
+            except ImportFileError as exc:
+                form.add_error("file", str(exc))
+            else:
+                level = messages.WARNING if stats.errors else messages.SUCCESS
+                self.message_user(
+                    request,
+                    f"Importación terminada: {stats.customers_created} clientes creados, "
+                    f"{stats.customers_updated} actualizados, {stats.contacts_created} contactos creados, "
+                    f"{stats.contacts_updated} actualizados, {stats.errors} filas con error.",
+                    level,
+                )
+
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Importar clientes y contactos",
+            "form": form,
+            "stats": stats,
+            "errors": errors,
+            "errors_truncated": stats is not None and stats.errors > len(errors),
+            "columns": CUSTOMER_COLUMNS + CONTACT_COLUMNS,
+        }
+
+        return TemplateResponse(request, "admin/customers/customer/import.html", context)
 
     def save_model(self, request, obj, form, change):
         if not change:
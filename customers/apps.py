@@ -5,3 +5,6 @@ class CustomersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'customers'
     verbose_name = "Clientes"
+
+    def ready(self):
+        from . import receivers  # noqa: F401
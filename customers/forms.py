@@ -0,0 +1,10 @@
+from django import forms
+from django.core.validators import FileExtensionValidator
+
+
+class CustomerImportForm(forms.Form):
+    file = forms.FileField(
+        label="Archivo",
+        validators=[FileExtensionValidator(allowed_extensions=["csv", "xlsx"])],
+        help_text="Archivo .csv (UTF-8) o .xlsx con encabezados en la primera fila.",
+    )
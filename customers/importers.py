@@ -0,0 +1,479 @@
+"""
+Carga masiva de clientes y contactos desde archivos CSV o XLSX.
+
+El archivo se lee en streaming (una fila a la vez) y las escrituras se hacen por
+bloques con bulk_create/bulk_update, así que la memoria no crece con el tamaño del
+archivo: solo se conservan las llaves ya procesadas (RFC / nombre de cliente y
+correo de contacto) para descartar duplicados.
+
+Cada fila describe un contacto y el cliente al que pertenece. Las columnas del
+cliente se repiten en cada fila; una fila sin datos de contacto solo da de alta
+(o actualiza) el cliente.
+"""
+import csv
+import io
+import re
+import time
+from dataclasses import dataclass
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .models import Customer, Contact
+from users.models import CustomUser
+
+
+CUSTOMER_COLUMNS = ["name", "rfc", "assigned_to"]
+CONTACT_COLUMNS = ["first_name", "last_name", "title", "phone", "phone_extension", "cel_phone", "email"]
+
+# Encabezados alternativos aceptados (en minúsculas, sin acentos)
+HEADER_ALIASES = {
+    "cliente": "name",
+    "razon social": "name",
+    "vendedor": "assigned_to",
+    "nombre": "first_name",
+    "apellido": "last_name",
+    "puesto": "title",
+    "telefono": "phone",
+    "extension": "phone_extension",
+    "celular": "cel_phone",
+    "correo": "email",
+}
+
+PHONE_SEPARATORS = re.compile(r"[\s\-\(\)\.]")
+
+
+class ImportFileError(Exception):
+    """El archivo no se puede leer (formato, encabezados o dependencia faltante)."""
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    customers_created: int = 0
+    customers_updated: int = 0
+    contacts_created: int = 0
+    contacts_updated: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.elapsed if self.elapsed else 0.0
+
+
+# ============================================================
+# Lectura del archivo
+# ============================================================
+
+def _normalize_header(value) -> str:
+    header = str(value or "").strip().lower()
+    header = header.translate(str.maketrans("áéíóú", "aeiou"))
+
+    return HEADER_ALIASES.get(header, header)
+
+
+def _check_headers(headers):
+    if "name" not in headers:
+        raise ImportFileError("El archivo debe tener una columna 'name' (nombre del cliente).")
+
+
+def _cell_to_str(value) -> str:
+    if value is None:
+        return ""
+
+    # Excel guarda teléfonos y extensiones como números (8112345678.0)
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+
+    return str(value).strip()
+
+
+def _iter_csv_rows(fileobj, encoding, delimiter):
+    text = io.TextIOWrapper(fileobj, encoding=encoding, newline="")
+
+    try:
+        reader = csv.reader(text, delimiter=delimiter)
+        headers = [_normalize_header(h) for h in next(reader, [])]
+        _check_headers(headers)
+
+        for row_number, values in enumerate(reader, start=2):
+            if not any(v.strip() for v in values):
+                continue
+            yield row_number, dict(zip(headers, (v.strip() for v in values)))
+    except UnicodeDecodeError as exc:
+        raise ImportFileError(f"No fue posible decodificar el archivo como {encoding}.") from exc
+    finally:
+        # No cerrar el archivo original: es responsabilidad de quien lo abrió.
+        text.detach()
+
+
+def _iter_xlsx_rows(fileobj):
+    try:
+        from openpyxl import load_workbook
+    except ImportError as exc:
+        raise ImportFileError("Para importar archivos XLSX es necesario instalar openpyxl.") from exc
+
+    # read_only carga las hojas de forma perezosa, fila por fila
+    workbook = load_workbook(fileobj, read_only=True, data_only=True)
+
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        headers = [_normalize_header(h) for h in next(rows, ())]
+        _check_headers(headers)
+
+        for row_number, values in enumerate(rows, start=2):
+            values = [_cell_to_str(v) for v in values]
+            if not any(values):
+                continue
+            yield row_number, dict(zip(headers, values))
+    finally:
+        workbook.close()
+
+
+def iter_rows(fileobj, filename, encoding="utf-8-sig", delimiter=","):
+    """
+    Genera tuplas (número de fila, dict de columnas) desde un archivo binario
+    abierto. El formato se decide por la extensión del nombre del archivo.
+    """
+    if filename.lower().endswith(".xlsx"):
+        return _iter_xlsx_rows(fileobj)
+
+    return _iter_csv_rows(fileobj, encoding, delimiter)
+
+
+# ============================================================
+# Importación
+# ============================================================
+
+class CustomerImporter:
+    """
+    Valida y escribe clientes/contactos por bloques de `chunk_size` filas.
+
+    Los errores se reportan fila por fila a través de `on_error(row_number, message)`
+    en lugar de acumularse en memoria.
+    """
+
+    def __init__(self, chunk_size=500, user=None, on_error=None):
+        self.chunk_size = chunk_size
+        self.user = user
+        self.on_error = on_error or (lambda row_number, message: None)
+        self.stats = ImportStats()
+
+        # Llave de cliente (RFC o nombre) -> pk, y correos ya vistos en el archivo
+        self._customer_ids = {}
+        self._seen_emails = set()
+        self._users = None
+
+    def run(self, rows) -> ImportStats:
+        started = time.perf_counter()
+        batch = []
+
+        for row_number, row in rows:
+            self.stats.rows += 1
+
+            try:
+                batch.append((row_number, *self._clean_row(row)))
+            except ValidationError as exc:
+                self._error(row_number, "; ".join(exc.messages))
+                continue
+
+            if len(batch) >= self.chunk_size:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+        self.stats.elapsed = time.perf_counter() - started
+
+        return self.stats
+
+    def _error(self, row_number, message):
+        self.stats.errors += 1
+        self.on_error(row_number, message)
+
+    # ---------- Validación ----------
+
+    def _resolve_user(self, value):
+        if self._users is None:
+            # Tabla pequeña: se carga una sola vez por importación
+            self._users = {}
+            for pk, username, email in CustomUser.objects.filter(is_active=True).values_list("pk", "username", "email"):
+                self._users[username.lower()] = pk
+                if email:
+                    self._users.setdefault(email.lower(), pk)
+
+        try:
+            return self._users[value.lower()]
+        except KeyError:
+            raise ValidationError(f"El vendedor '{value}' no existe o está inactivo.")
+
+    def _clean_row(self, row):
+        errors = []
+
+        name = row.get("name", "")
+        rfc = row.get("rfc", "").upper()
+        assigned_to = row.get("assigned_to", "")
+
+        if not name:
+            errors.append("El nombre del cliente es obligatorio.")
+        elif len(name) > 100:
+            errors.append("El nombre del cliente excede 100 caracteres.")
+
+        if rfc:
+            try:
+                Customer.rfc_validator(rfc)
+            except ValidationError as exc:
+                errors.extend(exc.messages)
+
+        assigned_to_id = None
+        if assigned_to:
+            try:
+                assigned_to_id = self._resolve_user(assigned_to)
+            except ValidationError as exc:
+                errors.extend(exc.messages)
+
+        customer = {"name": name, "rfc": rfc or None, "assigned_to_id": assigned_to_id}
+        contact = None
+
+        if any(row.get(column) for column in CONTACT_COLUMNS):
+            contact = {column: row.get(column, "") for column in CONTACT_COLUMNS}
+
+            for column, label in (("first_name", "nombre"), ("last_name", "apellido"), ("title", "puesto")):
+                if len(contact[column]) > 30:
+                    errors.append(f"El {label} del contacto excede 30 caracteres.")
+
+            if not contact["first_name"] or not contact["last_name"]:
+                errors.append("El nombre y apellido del contacto son obligatorios.")
+
+            email = contact["email"].lower()
+            contact["email"] = email
+            if not email:
+                errors.append("El correo del contacto es obligatorio.")
+            else:
+                try:
+                    validate_email(email)
+                except ValidationError:
+                    errors.append(f"El correo '{email}' no es válido.")
+                else:
+                    if email in self._seen_emails:
+                        errors.append(f"El correo '{email}' está duplicado en el archivo.")
+
+            for column in ("phone", "cel_phone"):
+                contact[column] = PHONE_SEPARATORS.sub("", contact[column])
+                if contact[column]:
+                    try:
+                        Contact.phone_validator(contact[column])
+                    except ValidationError as exc:
+                        errors.extend(exc.messages)
+
+            if contact["phone_extension"]:
+                try:
+                    Contact.extension_validator(contact["phone_extension"])
+                except ValidationError as exc:
+                    errors.extend(exc.messages)
+
+            for column in ("title", "phone", "phone_extension", "cel_phone"):
+                contact[column] = contact[column] or None
+
+        if errors:
+            raise ValidationError(errors)
+
+        if contact:
+            self._seen_emails.add(contact["email"])
+
+        return customer, contact
+
+    # ---------- Escritura por bloques ----------
+
+    @staticmethod
+    def _customer_key(customer):
+        return customer["rfc"] or f"name:{customer['name'].lower()}"
+
+    def _flush(self, batch):
+        # Filas del bloque que ya reportaron su error (no se cuentan dos veces)
+        failed_rows = set()
+
+        try:
+            with transaction.atomic():
+                created, updated, customer_ids = self._write_customers(batch, failed_rows)
+                contacts_created, contacts_updated = self._write_contacts(batch, customer_ids, failed_rows)
+        except DatabaseError as exc:
+            for row_number, _customer, _contact in batch:
+                if row_number not in failed_rows:
+                    self._error(row_number, f"Error de base de datos en el bloque: {exc}")
+            return
+
+        # Solo se registran las llaves cuando el bloque quedó confirmado
+        self._customer_ids.update(customer_ids)
+        self.stats.customers_created += created
+        self.stats.customers_updated += updated
+        self.stats.contacts_created += contacts_created
+        self.stats.contacts_updated += contacts_updated
+
+    def _write_customers(self, batch, failed_rows):
+        now = timezone.now()
+        user_id = getattr(self.user, "pk", None)
+        customer_ids = {}
+        pending = {}
+        # Nombre -> llave de la primera fila pendiente con ese nombre (el nombre es único)
+        pending_names = {}
+        # Llave de una fila repetida -> llave de la fila que da de alta el cliente
+        aliases = {}
+
+        for row_number, customer, _contact in batch:
+            key = self._customer_key(customer)
+            if key in self._customer_ids or key in pending or key in aliases:
+                continue
+
+            name = customer["name"].lower()
+            first_key = pending_names.get(name)
+            if first_key is None:
+                pending_names[name] = key
+                pending[key] = (row_number, customer)
+                continue
+
+            first_row, first = pending[first_key]
+            first_rfc = first["rfc"]
+            if customer["rfc"] and not first_rfc:
+                # La primera fila venía sin RFC: el cliente se da de alta con este
+                pending[first_key] = (first_row, {**first, "rfc": customer["rfc"]})
+            elif customer["rfc"] and customer["rfc"] != first_rfc:
+                self._error(
+                    row_number,
+                    f"El cliente '{customer['name']}' aparece en el archivo con otro RFC "
+                    f"({first_rfc}, fila {first_row}).",
+                )
+                failed_rows.add(row_number)
+                continue
+
+            # Misma empresa sin RFC (o con el mismo): sus contactos van al mismo cliente
+            aliases[key] = first_key
+
+        if not pending:
+            return 0, 0, customer_ids
+
+        rfcs = [c["rfc"] for _row, c in pending.values() if c["rfc"]]
+        names = [c["name"] for _row, c in pending.values()]
+        slugs = {slugify(name) for name in names}
+
+        existing = Customer.objects.filter(Q(rfc__in=rfcs) | Q(name__in=names) | Q(slug__in=slugs))
+        by_rfc = {c.rfc: c for c in existing if c.rfc}
+        by_name = {c.name: c for c in existing}
+        taken_slugs = {c.slug for c in existing}
+
+        to_create = []
+        to_update = []
+
+        for key, (row_number, data) in pending.items():
+            match = by_rfc.get(data["rfc"]) if data["rfc"] else None
+            same_name = by_name.get(data["name"])
+
+            if match is None and same_name is not None:
+                if data["rfc"] and same_name.rfc and same_name.rfc != data["rfc"]:
+                    self._error(row_number, f"El cliente '{data['name']}' ya existe con otro RFC ({same_name.rfc}).")
+                    failed_rows.add(row_number)
+                    continue
+                match = same_name
+            elif match is not None and same_name is not None and same_name.pk != match.pk:
+                self._error(row_number, f"Ya existe otro cliente con el nombre '{data['name']}'.")
+                failed_rows.add(row_number)
+                continue
+
+            if match is not None:
+                match.name = data["name"]
+                match.rfc = data["rfc"] or match.rfc
+                if data["assigned_to_id"]:
+                    match.assigned_to_id = data["assigned_to_id"]
+                match.updated_by_id = user_id
+                match.updated = now
+                to_update.append((key, match))
+                continue
+
+            slug = base_slug = slugify(data["name"])[:95]
+            suffix = 2
+            while slug in taken_slugs:
+                slug = f"{base_slug}-{suffix}"
+                suffix += 1
+            taken_slugs.add(slug)
+
+            to_create.append((key, Customer(
+                name=data["name"],
+                slug=slug,
+                rfc=data["rfc"],
+                assigned_to_id=data["assigned_to_id"],
+                created_by_id=user_id,
+                updated_by_id=user_id,
+            )))
+
+        # Requiere un backend que regrese los pk en bulk_create (PostgreSQL / SQLite 3.35+)
+        Customer.objects.bulk_create([c for _key, c in to_create], batch_size=self.chunk_size)
+        Customer.objects.bulk_update(
+            [c for _key, c in to_update],
+            ["name", "rfc", "assigned_to", "updated_by", "updated"],
+            batch_size=self.chunk_size,
+        )
+
+        for key, customer in to_create + to_update:
+            customer_ids[key] = customer.pk
+
+        for key, first_key in aliases.items():
+            if first_key in customer_ids:
+                customer_ids[key] = customer_ids[first_key]
+
+        return len(to_create), len(to_update), customer_ids
+
+    def _write_contacts(self, batch, customer_ids, failed_rows):
+        now = timezone.now()
+        user_id = getattr(self.user, "pk", None)
+        rows = []
+
+        for row_number, customer, contact in batch:
+            key = self._customer_key(customer)
+            customer_id = customer_ids.get(key) or self._customer_ids.get(key)
+
+            if customer_id is None:
+                # El cliente falló en esta u otra fila; la fila que lo reportó no se cuenta dos veces
+                if contact and row_number not in failed_rows:
+                    self._error(row_number, f"El contacto {contact['email']} no se importó porque su cliente tiene errores.")
+                continue
+
+            if contact:
+                rows.append((customer_id, contact))
+
+        if not rows:
+            return 0, 0
+
+        existing = {c.email: c for c in Contact.objects.filter(email__in=[c["email"] for _id, c in rows])}
+        to_create = []
+        to_update = []
+
+        for customer_id, data in rows:
+            contact = existing.get(data["email"])
+
+            if contact is None:
+                contact = Contact(customer_id=customer_id, created_by_id=user_id, **data)
+                to_create.append(contact)
+            else:
+                for column, value in data.items():
+                    setattr(contact, column, value)
+                contact.customer_id = customer_id
+                contact.updated = now
+                to_update.append(contact)
+
+            contact.updated_by_id = user_id
+            contact.normalize()
+
+        Contact.objects.bulk_create(to_create, batch_size=self.chunk_size)
+        Contact.objects.bulk_update(
+            to_update,
+            CONTACT_COLUMNS + ["customer", "updated_by", "updated"],
+            batch_size=self.chunk_size,
+        )
+
+        return len(to_create), len(to_update)
@@ -0,0 +1,62 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from customers.importers import CustomerImporter, ImportFileError, iter_rows
+from users.models import CustomUser
+
+
+class Command(BaseCommand):
+    help = "Importa clientes y contactos desde un archivo CSV o XLSX."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Ruta del archivo .csv o .xlsx")
+        parser.add_argument("--chunk-size", type=int, default=500, help="Filas por bloque de escritura (default: 500)")
+        parser.add_argument("--encoding", default="utf-8-sig", help="Codificación del CSV (default: utf-8-sig)")
+        parser.add_argument("--delimiter", default=",", help="Separador del CSV (default: ',')")
+        parser.add_argument("--user", help="Username que quedará como created_by / updated_by")
+
+    def handle(self, *args, **options):
+        user = None
+        if options["user"]:
+            try:
+                user = CustomUser.objects.get(username=options["user"])
+            except CustomUser.DoesNotExist:
+                raise CommandError(f"El usuario '{options['user']}' no existe.")
+
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size debe ser mayor a 0.")
+
+        importer = CustomerImporter(
+            chunk_size=options["chunk_size"],
+            user=user,
+            on_error=self._report_error,
+        )
+
+        try:
+            with open(options["path"], "rb") as fileobj:
+                rows = iter_rows(fileobj, options["path"], encoding=options["encoding"], delimiter=options["delimiter"])
+                stats = importer.run(rows)
+        except OSError as exc:
+            raise CommandError(f"No fue posible abrir el archivo: {exc}")
+        except ImportFileError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write("")
+        summary = [
+            ("Filas leídas", stats.rows),
+            ("Clientes creados", stats.customers_created),
+            ("Clientes actualizados", stats.customers_updated),
+            ("Contactos creados", stats.contacts_created),
+            ("Contactos actualizados", stats.contacts_updated),
+            ("Filas con error", stats.errors),
+        ]
+        for label, value in summary:
+            self.stdout.write(f"{label + ':':<24}{value}")
+        self.stdout.write(f"{'Tiempo:':<24}{stats.elapsed:.2f} s ({stats.rows_per_second:,.0f} filas/s)")
+
+        if stats.errors:
+            self.stdout.write(self.style.WARNING("Importación terminada con errores."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Importación terminada."))
+
+    def _report_error(self, row_number, message):
+        self.stderr.write(f"Fila {row_number}: {message}")
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0011_alter_customer_rfc'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='contact',
+            name='customers_c_custome_dd846a_idx',
+        ),
+        migrations.AddIndex(
+            model_name='contact',
+            index=models.Index(fields=['customer', 'is_active', 'first_name', 'last_name'], name='customers_c_custome_505c91_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customer',
+            index=models.Index(fields=['name', 'rfc'], name='customers_c_name_f2de05_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:33
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0012_customer_contact_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customer',
+            name='customers_c_name_f2de05_idx',
+        ),
+    ]
@@ -43,6 +43,9 @@ class Customer(models.Model):
 
     
     def formatted_rfc(self):
+        if not self.rfc:
+            return ""
+
         if self.rfc[3].isdigit():
             return f"{self.rfc[:3]}-{self.rfc[3:9]}-{self.rfc[9:]}"
         
@@ -62,7 +65,8 @@ class Contact(models.Model):
         ordering = ["first_name", "last_name"]
         indexes = [
             models.Index(fields=["first_name", "last_name"]),
-            models.Index(fields=["customer"]),
+            # Contactos activos de un cliente ya ordenados (select de la cotización)
+            models.Index(fields=["customer", "is_active", "first_name", "last_name"]),
         ]
 
     phone_validator = RegexValidator(
@@ -107,7 +111,11 @@ class Contact(models.Model):
 
         return "-"
     
-    def save(self, *args, **kwargs):
+    def normalize(self):
+        """
+        Normaliza nombres y correo. Se usa en save() y en las cargas masivas
+        (bulk_create/bulk_update no pasan por save()).
+        """
         if self.first_name:
             self.first_name = self.first_name.title().strip()
 
@@ -120,5 +128,8 @@ class Contact(models.Model):
         if self.email:
             self.email = self.email.strip().lower()
 
+    def save(self, *args, **kwargs):
+        self.normalize()
+
         super().save(*args, **kwargs)
             
@@ -0,0 +1,13 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from bitquotes.generations import bump_generation
+from .models import Customer, Contact
+
+
+@receiver(post_save, sender=Customer, dispatch_uid="customers_bump_customer_generation_on_save")
+@receiver(post_delete, sender=Customer, dispatch_uid="customers_bump_customer_generation_on_delete")
+@receiver(post_save, sender=Contact, dispatch_uid="customers_bump_contact_generation_on_save")
+@receiver(post_delete, sender=Contact, dispatch_uid="customers_bump_contact_generation_on_delete")
+def bump_generations(sender, **kwargs):
+    bump_generation(sender)
@@ -1,3 +1,167 @@
+import io
+import unittest
+
 from django.test import TestCase
 
-# Create your tests here.
+from .importers import CustomerImporter, ImportFileError, iter_rows
+from .models import Customer, Contact
+from users.models import CustomUser
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+HEADERS = ["Cliente", "RFC", "Vendedor", "Nombre", "Apellido", "Correo", "Telefono"]
+
+
+def csv_file(rows):
+    lines = [",".join(HEADERS)] + [",".join(row) for row in rows]
+    return io.BytesIO("\n".join(lines).encode("utf-8"))
+
+
+def xlsx_file(rows):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.append(HEADERS)
+    for row in rows:
+        # Excel guarda los teléfonos como números
+        sheet.append([int(value) if value.isdigit() else value for value in row])
+    fileobj = io.BytesIO()
+    workbook.save(fileobj)
+    fileobj.seek(0)
+    return fileobj
+
+
+class CustomerImporterMixin:
+    """Los mismos casos para CSV y XLSX (FILENAME y make_file en cada clase)."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = CustomUser.objects.create_user(username="ventas", password="x", email="ventas@example.com")
+
+    def run_import(self, rows, chunk_size=500):
+        errors = []
+        importer = CustomerImporter(chunk_size=chunk_size, on_error=lambda row, message: errors.append((row, message)))
+        stats = importer.run(iter_rows(self.make_file(rows), self.FILENAME))
+        return stats, errors
+
+    def test_create(self):
+        stats, errors = self.run_import([
+            ["ACME", "AAA010101AAA", "ventas", "Ana", "López", "ana@acme.com", "81-1234-5678"],
+            ["ACME", "AAA010101AAA", "ventas", "Luis", "Pérez", "luis@acme.com", ""],
+            ["Globex", "", "", "", "", "", ""],
+        ])
+
+        self.assertEqual(errors, [])
+        self.assertEqual((stats.rows, stats.customers_created, stats.contacts_created), (3, 2, 2))
+        acme = Customer.objects.get(rfc="AAA010101AAA")
+        self.assertEqual(acme.assigned_to, self.sales)
+        self.assertEqual(acme.contacts.count(), 2)
+        self.assertEqual(Contact.objects.get(email="ana@acme.com").phone, "8112345678")
+        self.assertIsNone(Customer.objects.get(name="Globex").rfc)
+
+    def test_update_by_rfc(self):
+        customer = Customer.objects.create(name="ACME Viejo", rfc="AAA010101AAA")
+        Contact.objects.create(customer=customer, first_name="Ana", last_name="Vieja", email="ana@acme.com")
+
+        stats, errors = self.run_import([
+            ["ACME", "AAA010101AAA", "ventas", "Ana", "López", "ana@acme.com", ""],
+        ])
+
+        self.assertEqual(errors, [])
+        self.assertEqual((stats.customers_created, stats.customers_updated, stats.contacts_updated), (0, 1, 1))
+        customer.refresh_from_db()
+        self.assertEqual((customer.name, customer.assigned_to), ("ACME", self.sales))
+        self.assertEqual(Contact.objects.get(email="ana@acme.com").last_name, "López")
+
+    def test_update_by_name(self):
+        customer = Customer.objects.create(name="ACME")
+
+        stats, errors = self.run_import([
+            ["ACME", "AAA010101AAA", "", "Ana", "López", "ana@acme.com", ""],
+        ])
+
+        self.assertEqual(errors, [])
+        self.assertEqual((stats.customers_created, stats.customers_updated), (0, 1))
+        customer.refresh_from_db()
+        self.assertEqual(customer.rfc, "AAA010101AAA")
+        self.assertEqual(customer.contacts.count(), 1)
+
+    def test_existing_name_with_other_rfc(self):
+        Customer.objects.create(name="ACME", rfc="AAA010101AAA")
+
+        stats, errors = self.run_import([
+            ["ACME", "BBB010101BBB", "", "Ana", "López", "ana@acme.com", ""],
+        ])
+
+        self.assertEqual([row for row, _ in errors], [2])
+        self.assertEqual((stats.errors, stats.contacts_created), (1, 0))
+
+    def test_same_name_in_file(self):
+        stats, errors = self.run_import([
+            ["ACME", "", "", "Ana", "López", "ana@acme.com", ""],
+            ["ACME", "AAA010101AAA", "", "Luis", "Pérez", "luis@acme.com", ""],
+            ["ACME", "", "", "Eva", "Ruiz", "eva@acme.com", ""],
+            ["ACME", "BBB010101BBB", "", "Leo", "Díaz", "leo@acme.com", ""],
+            ["Globex", "", "", "Max", "Soto", "max@globex.com", ""],
+        ])
+
+        # Solo la fila con otro RFC falla; el resto del bloque se importa
+        self.assertEqual([row for row, _ in errors], [5])
+        self.assertIn("otro RFC", errors[0][1])
+        self.assertEqual((stats.customers_created, stats.contacts_created, stats.errors), (2, 4, 1))
+        acme = Customer.objects.get(name="ACME")
+        self.assertEqual(acme.rfc, "AAA010101AAA")
+        self.assertEqual(acme.contacts.count(), 3)
+
+    def test_same_name_across_chunks(self):
+        stats, errors = self.run_import([
+            ["ACME", "", "", "Ana", "López", "ana@acme.com", ""],
+            ["ACME", "AAA010101AAA", "", "Luis", "Pérez", "luis@acme.com", ""],
+        ], chunk_size=1)
+
+        self.assertEqual(errors, [])
+        self.assertEqual((stats.customers_created, stats.customers_updated), (1, 1))
+        self.assertEqual(Customer.objects.get().contacts.count(), 2)
+
+    def test_invalid_rows(self):
+        stats, errors = self.run_import([
+            ["", "", "", "", "", "", ""],
+            ["ACME", "RFC-MALO", "", "", "", "", ""],
+            ["Globex", "", "nadie", "", "", "", ""],
+            ["Initech", "", "", "Ana", "", "correo", ""],
+            ["Umbrella", "", "", "Ana", "López", "ana@umbrella.com", ""],
+            ["Umbrella", "", "", "Eva", "Ruiz", "ana@umbrella.com", ""],
+        ])
+
+        self.assertEqual([row for row, _ in errors], [3, 4, 5, 7])
+        self.assertEqual((stats.rows, stats.customers_created, stats.contacts_created), (5, 1, 1))
+
+    def test_missing_name_column(self):
+        with self.assertRaises(ImportFileError):
+            list(iter_rows(io.BytesIO(b"rfc,correo\n"), "clientes.csv"))
+
+
+class CsvImportTests(CustomerImporterMixin, TestCase):
+    FILENAME = "clientes.csv"
+
+    def make_file(self, rows):
+        return csv_file(rows)
+
+
+@unittest.skipIf(openpyxl is None, "openpyxl no está instalado")
+class XlsxImportTests(CustomerImporterMixin, TestCase):
+    FILENAME = "clientes.xlsx"
+
+    def make_file(self, rows):
+        return xlsx_file(rows)
+
+    def test_missing_name_column(self):
+        workbook = openpyxl.Workbook()
+        workbook.active.append(["rfc", "correo"])
+        fileobj = io.BytesIO()
+        workbook.save(fileobj)
+        fileobj.seek(0)
+        with self.assertRaises(ImportFileError):
+            list(iter_rows(fileobj, "clientes.xlsx"))
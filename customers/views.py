@@ -6,9 +6,13 @@ from django.urls import reverse, reverse_lazy
 from django.http import HttpResponseNotAllowed, HttpResponseBadRequest, HttpResponseRedirect
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import render, get_object_or_404
+from django.db.models import Count, Max
+from django.utils.decorators import method_decorator
 
 from .models import Customer, Contact
-from users.models import CustomUser
+from users.directory import active_users, active_user_ids
+from bitquotes.conditional import conditional_view
+from bitquotes.replica import replica_reads
 
 RFC_REGEX = re.compile(r"^([A-Za-zÑñ\x26]{3,4}([0-9]{2})(0[1-9]|1[0-2])(0[1-9]|1[0-9]|2[0-9]|3[0-1]))([A-Za-z\d]{3})?$")
 
@@ -22,7 +26,7 @@ class CustomerListBase(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related("assigned_to")
         q = self.request.GET.get("q", "")
         if q:
             queryset = queryset.filter(name__icontains=q) | queryset.filter(rfc__icontains=q)
@@ -65,7 +69,7 @@ class CustomerCreateView(LoginRequiredMixin, CreateView):
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["users"] = CustomUser.objects.filter(is_active=True)
+        context["users"] = active_users()
 
         return context
     
@@ -76,17 +80,30 @@ class CustomerCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
     
     
+def _customer_detail_validators(request, slug):
+    return (
+        Customer.objects
+        .filter(slug=slug)
+        .annotate(contacts_count=Count("contacts"), contacts_updated=Max("contacts__updated"))
+        .values_list("updated", "assigned_to_id", "quote_stats__updated", "contacts_count", "contacts_updated")
+        .first()
+    )
+
+
+@method_decorator(conditional_view(_customer_detail_validators), name="get")
 class CustomerDetailView(LoginRequiredMixin, DetailView):
     model = Customer
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context["contacts"] = self.object.contacts.all()
+        # Resumen mantenido por quotes (no existe si el cliente aún no tiene cotizaciones)
+        context["quote_stats"] = getattr(self.object, "quote_stats", None)
 
         return context
     
     def get_queryset(self):
-        return Customer.objects.select_related("assigned_to").prefetch_related("contacts")
+        return Customer.objects.select_related("assigned_to", "quote_stats").prefetch_related("contacts")
         
     
 @login_required
@@ -101,11 +118,16 @@ def customer_row_edit(request, pk):
     customer = get_object_or_404(Customer.objects.select_related("assigned_to"), pk=pk)
     return render(request, "customers/_customer_row_edit.html", {
         "customer": customer,
-        "users": CustomUser.objects.filter(is_active=True),
+        "users": active_users(),
         "errors": {},
     })
     
+def _customer_row_validators(request, pk):
+    return Customer.objects.filter(pk=pk).values_list("updated", "assigned_to_id").first()
+
+
 @login_required
+@conditional_view(_customer_row_validators)
 def customer_row_readonly(request, pk):
     """
     Devuelve SOLO el <tr> en modo lectura para el customer dado.
@@ -141,15 +163,19 @@ def customer_row_update(request, pk):
     else:
         errors["rfc"] = "El RFC es obligatorio."
 
+    assigned_to = int(assigned_to) if (assigned_to or "").isdigit() else None
+    if assigned_to not in active_user_ids():
+        errors["assigned_to"] = "Selecciona un vendedor activo."
+
     if errors:
         customer.name = name
         customer.rfc = rfc
-        customer.assigned_to_id = assigned_to or None
+        customer.assigned_to_id = assigned_to
         
         context = {
             "customer": customer,
             "errors": errors,
-            "users": CustomUser.objects.filter(is_active=True),
+            "users": active_users(),
         }
         response = render(request, "customers/_customer_row_edit.html", context)
 
@@ -158,8 +184,7 @@ def customer_row_update(request, pk):
     # Persistir cambios
     customer.name = name
     customer.rfc = rfc
-    print("---" + assigned_to)
-    customer.assigned_to = CustomUser.objects.get(pk=assigned_to)
+    customer.assigned_to_id = assigned_to
 
     # Opcional: si llevas auditoría
     if hasattr(customer, "updated_by"):
@@ -261,15 +286,29 @@ def contact_toggle(request, slug, pk):
     return response
 
 @login_required
+@replica_reads
 def customer_search_htmx(request):
     term = request.GET.get("search", "")
-    customers = Customer.objects.filter(name__icontains=term)[:10]
+    # "Contiene" no puede usar un índice (LIKE '%...%'): se recorre el índice único
+    # de name en orden y se corta en las primeras 10 coincidencias
+    customers = Customer.objects.filter(name__icontains=term).only("id", "name", "rfc")[:10]
 
     return render(request, "customers/_customer_search_list.html", {
         "customers": customers
     })
 
+def _contacts_for_quote_validators(request, pk):
+    return (
+        Customer.objects
+        .filter(pk=pk)
+        .annotate(contacts_count=Count("contacts"), contacts_updated=Max("contacts__updated"))
+        .values_list("contacts_count", "contacts_updated")
+        .first()
+    )
+
+
 @login_required
+@conditional_view(_contacts_for_quote_validators)
 def contacts_for_quote_htmx(request, pk):
     customer = get_object_or_404(Customer, pk=pk)
     contacts = customer.contacts.filter(is_active=True).order_by("first_name", "last_name")
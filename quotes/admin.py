@@ -1,7 +1,8 @@
-from django.contrib import admin
+from django.contrib import admin, messages
+from django.utils import timezone
 
-
-from .models import Quote, QuoteLine, QuoteComment
+from users.capabilities import capabilities_for
+from .models import Quote, QuoteLine, QuoteComment, QuoteEvent, ApprovalRule, QuoteEmail
 
 class QuoteLineInline(admin.StackedInline):
     model = QuoteLine
@@ -36,12 +37,13 @@ class QuoteAdmin(admin.ModelAdmin):
     list_filter = ["customer", "user", "status", "is_active"]
     list_select_related = ["customer", "contact", "user"]
     date_hierarchy = "created"
+    actions = ["approve_selected", "send_selected", "expire_selected"]
     ordering = ["-created"]
     empty_value_display = "-"
     readonly_fields = [
         "quote_id", "user", "status", "payment_terms", "valid_until", "is_active", "customer", "contact",
         "approved_by", "approved_at", "sent_by", "sent_at",
-        "won_by", "won_at", "lost_by", "lost_at", "lost_reason", "created", "updated", "created_by",
+        "won_by", "won_at", "lost_by", "lost_at", "lost_reason", "expired_at", "created", "updated", "created_by",
         "updated_by",
     ]
     
@@ -55,7 +57,7 @@ class QuoteAdmin(admin.ModelAdmin):
         #('Totales', {"fields": ("sub_total", "discount_total", "tax", "total")}),
         ("Workflow", {
             "classes": ("collapse",),
-            "fields": ("approved_by", "approved_at", "sent_by", "sent_at", "won_by", "won_at", "lost_by", "lost_at", "lost_reason"),
+            "fields": ("approved_by", "approved_at", "sent_by", "sent_at", "won_by", "won_at", "lost_by", "lost_at", "lost_reason", "expired_at"),
         }),
         ("Auditoría", {
             "classes": ("collapse",),
@@ -82,3 +84,70 @@ class QuoteAdmin(admin.ModelAdmin):
     
 
 
+
+    def has_bulk_transition_permission(self, request):
+        # Igual que la acción en bloque de la lista: solo quien puede aprobar (gerente)
+        return capabilities_for(request.user).can_approve
+
+    def _bulk_action(self, request, queryset, action):
+        results = queryset.bulk_action(action, user=request.user)
+
+        changed = [result for result in results if result.ok]
+        if changed:
+            self.message_user(request, f"{len(changed)} cotización(es) cambiadas a «{changed[0].message}».", messages.SUCCESS)
+        for result in results:
+            if not result.ok:
+                self.message_user(request, f"{result.quote_id}: {result.message}", messages.WARNING)
+
+    @admin.action(description="Aprobar cotizaciones seleccionadas", permissions=["bulk_transition"])
+    def approve_selected(self, request, queryset):
+        self._bulk_action(request, queryset, "approve")
+
+    @admin.action(description="Marcar como enviadas", permissions=["bulk_transition"])
+    def send_selected(self, request, queryset):
+        self._bulk_action(request, queryset, "send")
+
+    @admin.action(description="Marcar como expiradas", permissions=["bulk_transition"])
+    def expire_selected(self, request, queryset):
+        self._bulk_action(request, queryset, "expire")
+
+
+@admin.register(QuoteEvent)
+class QuoteEventAdmin(admin.ModelAdmin):
+    list_display = ["id", "quote", "type", "old_status", "new_status", "amount", "user", "created"]
+    list_filter = ["type", "new_status"]
+    search_fields = ["quote__quote_id"]
+    list_select_related = ["quote", "user"]
+    date_hierarchy = "created"
+    ordering = ["-id"]
+
+    # Bitácora de solo lectura
+    def has_add_permission(self, request): return False
+    def has_change_permission(self, request, obj=None): return False
+    def has_delete_permission(self, request, obj=None): return False
+
+
+@admin.register(ApprovalRule)
+class ApprovalRuleAdmin(admin.ModelAdmin):
+    list_display = ["__str__", "max_line_discount", "max_total", "below_catalog_price", "is_active", "updated"]
+    list_editable = ["is_active"]
+    # Al guardar o borrar una regla, quotes/receivers.py encola reevaluate_approvals
+
+
+@admin.register(QuoteEmail)
+class QuoteEmailAdmin(admin.ModelAdmin):
+    list_display = ["quote", "to_email", "status", "attempts", "next_attempt_at", "sent_at", "created"]
+    list_filter = ["status"]
+    search_fields = ["quote__quote_id", "to_email"]
+    list_select_related = ["quote"]
+    readonly_fields = ["quote", "to_email", "reply_to", "subject", "body", "status", "attempts", "next_attempt_at", "claimed_until", "last_error", "created", "created_by", "sent_at"]
+    actions = ["retry_selected"]
+
+    def has_add_permission(self, request): return False
+
+    @admin.action(description="Reintentar envío")
+    def retry_selected(self, request, queryset):
+        updated = queryset.exclude(status=QuoteEmail.Status.SENT).update(
+            status=QuoteEmail.Status.PENDING, attempts=0, next_attempt_at=timezone.now(), claimed_until=None,
+        )
+        self.message_user(request, f"{updated} correo(s) en cola de nuevo.", messages.SUCCESS)
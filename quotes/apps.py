@@ -5,3 +5,6 @@ class QuotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'quotes'
     verbose_name = "Cotizaciones"
+
+    def ready(self):
+        from . import receivers  # noqa: F401
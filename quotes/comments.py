@@ -0,0 +1,67 @@
+"""
+Comentarios de la cotización, por páginas.
+
+El detalle muestra los PAGE_SIZE comentarios más recientes; "Cargar más" pide
+los anteriores al más viejo que se está mostrando y el bloque consulta cada
+POLL_SECONDS si hay comentarios nuevos que el más reciente. En los dos casos el
+cursor es la fecha de creación (microsegundos desde epoch, para que viaje limpio
+en la URL) y la consulta usa el índice (quote, created).
+"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from .models import QuoteComment
+
+PAGE_SIZE = 10
+POLL_SECONDS = 30
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def cursor(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def parse_cursor(value):
+    """Fecha del cursor, o None si no viene o no es válido."""
+    try:
+        return EPOCH + timedelta(microseconds=int(value))
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def _comments(quote):
+    return QuoteComment.objects.filter(quote=quote).select_related("user")
+
+
+def page(quote, before=None, size=PAGE_SIZE):
+    """
+    Hasta `size` comentarios, del más reciente al más viejo, anteriores a
+    `before` (o los últimos). Regresa (comentarios, hay_más).
+    """
+    comments = _comments(quote)
+    if before is not None:
+        comments = comments.filter(created__lt=before)
+
+    comments = list(comments.order_by("-created")[:size + 1])
+    return comments[:size], len(comments) > size
+
+
+def newer(quote, since):
+    """Comentarios posteriores a `since`, del más reciente al más viejo."""
+    return list(_comments(quote).filter(created__gt=since).order_by("-created"))
+
+
+def block_context(quote, comment_form):
+    """Contexto de _quote_comments_block.html con la primera página."""
+    comments, has_more = page(quote)
+    return {
+        "quote": quote,
+        "comment_form": comment_form,
+        "comments": comments,
+        "comments_count": QuoteComment.objects.filter(quote=quote).count(),
+        "comments_has_more": has_more,
+        "comments_before": cursor(comments[-1].created) if comments else None,
+        # Sin comentarios cualquiera que llegue es nuevo
+        "comments_since": cursor(comments[0].created) if comments else 0,
+        "comments_poll_seconds": POLL_SECONDS,
+    }
@@ -0,0 +1,120 @@
+"""
+Tarjetas del dashboard.
+
+Cada tarjeta se carga por separado vía HTMX y su HTML se guarda en el cache por
+usuario y alcance ("mine" / "all") con un TTL corto. La llave lleva la versión
+del dashboard del usuario, que cambia con cada transición o cambio de total de
+sus cotizaciones (ver quotes/receivers.py) y con el botón "Actualizar"; las
+tarjetas de "Todas" además llevan una versión global.
+"""
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db.models import Sum
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from cachebus import bus
+
+from .models import Quote, PipelineCounter, MonthlyWonCounter, PipelineSnapshot
+
+CARD_TIMEOUT = 60
+TREND_DAYS = 30
+ALL_SCOPE_VERSION_KEY = "quotes:dashboard-version:all"
+
+
+def _version_key(user_id):
+    return f"quotes:dashboard-version:{user_id}"
+
+
+def get_dashboard_version(user_id):
+    return cache.get_or_set(_version_key(user_id), lambda: uuid.uuid4().hex, timeout=None)
+
+
+def bump_dashboard_version(user_id, all_scope=True):
+    """
+    Invalida las tarjetas del usuario; con all_scope también las de "Todas" de
+    todos los usuarios (una cotización del vendedor cambió).
+    """
+    versions = {_version_key(user_id): uuid.uuid4().hex}
+    if all_scope:
+        versions[ALL_SCOPE_VERSION_KEY] = uuid.uuid4().hex
+    cache.set_many(versions, timeout=None)
+    bus.publish(*versions)
+
+
+def open_card_context(request, scope):
+    counters = PipelineCounter.objects.filter(status__in=Quote.OPEN_STATUSES)
+    if scope == "mine":
+        counters = counters.filter(user=request.user)
+
+    by_status = {
+        row["status"]: row
+        for row in counters.values("status").annotate(count=Sum("count"), amount=Sum("amount"))
+    }
+    return {
+        "open_count": sum(row["count"] for row in by_status.values()),
+        "open_amount": sum((row["amount"] for row in by_status.values()), Decimal("0.00")),
+        "pending_count": by_status.get(Quote.Status.PENDING_APPROVAL, {}).get("count", 0),
+        "sent_count": by_status.get(Quote.Status.SENT, {}).get("count", 0),
+    }
+
+
+def won_card_context(request, scope):
+    won = MonthlyWonCounter.objects.filter(month=MonthlyWonCounter.month_of(timezone.now()))
+    if scope == "mine":
+        won = won.filter(user=request.user)
+
+    totals = won.aggregate(count=Sum("count", default=0), amount=Sum("amount", default=Decimal("0.00")))
+    return {"won_count": totals["count"], "won_amount": totals["amount"]}
+
+
+def trend_card_context(request, scope):
+    # Pipeline abierto por día, leído de las fotos diarias (snapshot_pipeline)
+    snapshots = PipelineSnapshot.objects.filter(
+        status__in=Quote.OPEN_STATUSES,
+        date__gte=timezone.localdate() - timedelta(days=TREND_DAYS - 1),
+    )
+    if scope == "mine":
+        snapshots = snapshots.filter(user=request.user)
+
+    trend = list(snapshots.values("date").annotate(amount=Sum("amount")).order_by("date"))
+    trend_max = max((row["amount"] for row in trend), default=0)
+    for row in trend:
+        row["height"] = int(row["amount"] * 100 / trend_max) if trend_max else 0
+
+    return {"trend": trend, "trend_days": TREND_DAYS}
+
+
+def recent_card_context(request, scope):
+    recent = Quote.objects.visible_to(request.user).filter(status__in=Quote.OPEN_STATUSES)
+    if scope == "mine":
+        recent = recent.filter(user=request.user)
+
+    return {"recent_quotes": list(recent.select_related("customer").order_by("-updated")[:10])}
+
+
+CARDS = {
+    "open": ("quotes/_dashboard_open.html", open_card_context),
+    "won": ("quotes/_dashboard_won.html", won_card_context),
+    "trend": ("quotes/_dashboard_trend.html", trend_card_context),
+    "recent": ("quotes/_dashboard_recent.html", recent_card_context),
+}
+
+
+def render_card(request, card, scope):
+    """HTML de la tarjeta, del cache si la versión del usuario no ha cambiado."""
+    template_name, build_context = CARDS[card]
+
+    key = f"quotes:dashboard:{card}:{scope}:{request.user.pk}:{get_dashboard_version(request.user.pk)}"
+    if scope == "all":
+        key += f":{cache.get_or_set(ALL_SCOPE_VERSION_KEY, lambda: uuid.uuid4().hex, timeout=None)}"
+
+    html = cache.get(key)
+    if html is None:
+        html = render_to_string(template_name, build_context(request, scope), request=request)
+        cache.set(key, html, timeout=CARD_TIMEOUT)
+
+    return html
@@ -0,0 +1,68 @@
+"""
+Lectura incremental de la bitácora QuoteEvent.
+
+Cada consumidor (dashboard, rollups, reportes de SLA…) guarda en
+QuoteEventCursor el id del último evento que procesó y en cada corrida solo lee
+los posteriores, por bloques, en lugar de volver a recorrer las cotizaciones:
+
+    def handle(events):
+        for event in events:
+            ...
+
+    consume("sla_aprobacion", handle)
+
+El handler y el avance del cursor van en la misma transacción: si el handler
+falla, el bloque se vuelve a entregar en la siguiente corrida.
+
+El id es autoincremental pero no se confirma en orden: una transacción que tomó
+el id N puede confirmar después de que otra confirmó N+1. Si el cursor pasara a
+N+1, N se perdería. Por eso solo se entregan los eventos con más de
+SETTLE_DELAY de antigüedad, y el bloque se corta en el primero que todavía no
+la tiene. Las transacciones que escriben eventos son las de una request, mucho
+más cortas que SETTLE_DELAY.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import QuoteEvent, QuoteEventCursor
+
+
+SETTLE_DELAY = timedelta(seconds=30)
+
+
+def _settled(events, cutoff):
+    """Los eventos hasta antes del primero creado después de `cutoff` (en orden de id)."""
+    for index, event in enumerate(events):
+        if event.created > cutoff:
+            return events[:index]
+    return events
+
+
+def consume(name, handler, batch_size=500, settle_delay=SETTLE_DELAY):
+    """Entrega al handler los eventos nuevos por bloques; regresa cuántos procesó."""
+    processed = 0
+
+    while True:
+        with transaction.atomic():
+            cursor, _ = QuoteEventCursor.objects.select_for_update().get_or_create(name=name)
+            fetched = list(QuoteEvent.objects.since(cursor.position).select_related("quote")[:batch_size])
+            events = _settled(fetched, timezone.now() - settle_delay)
+            if not events:
+                return processed
+
+            handler(events)
+            cursor.position = events[-1].pk
+            cursor.save(update_fields=["position", "updated"])
+
+        processed += len(events)
+        if len(events) < len(fetched):
+            # Lo demás todavía puede tener huecos por transacciones sin confirmar
+            return processed
+
+
+def pending(name):
+    """Eventos que el consumidor todavía no ha procesado."""
+    position = QuoteEventCursor.objects.filter(name=name).values_list("position", flat=True).first()
+    return QuoteEvent.objects.since(position)
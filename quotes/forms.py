@@ -3,6 +3,8 @@ from django import forms
 from .models import Quote, QuoteLine, QuoteComment
 from customers.models import Contact
 from users.models import CustomUser
+from users.capabilities import capabilities_for
+from users.directory import active_user_choices
 
 
 class QuoteHeadForm(forms.ModelForm):
@@ -31,9 +33,11 @@ class QuoteHeadForm(forms.ModelForm):
         else:
             self.fields["contact"].queryset = Contact.objects.none()
 
-        if hasattr(self.request_user, "profile") and (self.request_user.profile.is_csr or self.request_user.profile.is_manager):
-            # CSR/Manager: pueden asignar a un SalesRep activo
-            self.fields["user"].queryset = CustomUser.objects.filter(is_active=True).order_by("first_name", "last_name", "username")
+        if capabilities_for(self.request_user).can_see_all_quotes:
+            # CSR/Manager: pueden asignar a un SalesRep activo. Las opciones salen del
+            # directorio en cache; el queryset solo se consulta al validar el POST.
+            self.fields["user"].queryset = CustomUser.objects.filter(is_active=True)
+            self.fields["user"].choices = [("", self.fields["user"].empty_label)] + active_user_choices()
         else:
             # Sales u otros: no elige, se asigna a sí mismo (campo oculto)
             if "user" in self.fields:
@@ -0,0 +1,143 @@
+import shutil
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.utils import timezone
+
+SETUP_SQL = (
+    "CREATE TABLE bench_quote (id INTEGER PRIMARY KEY, total INTEGER NOT NULL, updated TEXT NOT NULL)",
+    "CREATE TABLE bench_event (id INTEGER PRIMARY KEY AUTOINCREMENT, quote_id INTEGER NOT NULL, created TEXT NOT NULL)",
+    "CREATE INDEX bench_event_quote ON bench_event (quote_id, created)",
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la configuración de SQLite actual (DB_ENGINE=sqlite) con la afinada "
+        "(DB_ENGINE=sqlite-tuned) con hilos que editan y leen cotizaciones a la vez sobre "
+        "bases temporales. Mide operaciones por segundo, latencia y errores \"database is locked\"."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--writers", type=int, default=8, help="Hilos que escriben")
+        parser.add_argument("--readers", type=int, default=8, help="Hilos que leen")
+        parser.add_argument("--seconds", type=float, default=5, help="Duración de cada corrida")
+        parser.add_argument("--rows", type=int, default=200, help="Cotizaciones en la tabla de prueba")
+
+    def handle(self, *args, **options):
+        workdir = Path(tempfile.mkdtemp(prefix="bench-sqlite-"))
+        configs = {
+            # Igual que DB_ENGINE=sqlite: sin OPTIONS y conexión nueva por request
+            "sqlite": ({}, False),
+            "sqlite-tuned": (settings.SQLITE_TUNED_OPTIONS, True),
+        }
+        try:
+            for name, (db_options, reuse) in configs.items():
+                alias = f"bench_{name.replace('-', '_')}"
+                self.add_database(alias, workdir / f"{alias}.sqlite3", db_options)
+                self.prepare(alias, options["rows"])
+                result = self.run(alias, reuse, options)
+                self.report(name, result, options["seconds"])
+        finally:
+            for alias in list(connections.settings):
+                if alias.startswith("bench_"):
+                    connections[alias].close()
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def add_database(self, alias, path, db_options):
+        # Alias temporal en `connections` para poder usar transaction.atomic(using=alias)
+        databases = {
+            "default": settings.DATABASES["default"],
+            alias: {"ENGINE": "django.db.backends.sqlite3", "NAME": str(path), "OPTIONS": db_options},
+        }
+        connections.settings[alias] = connections.configure_settings(databases)[alias]
+
+    def prepare(self, alias, rows):
+        now = timezone.now().isoformat()
+        with connections[alias].cursor() as cursor:
+            for sql in SETUP_SQL:
+                cursor.execute(sql)
+            cursor.executemany(
+                "INSERT INTO bench_quote (id, total, updated) VALUES (%s, 0, %s)",
+                [(pk, now) for pk in range(1, rows + 1)],
+            )
+        connections[alias].close()
+
+    def run(self, alias, reuse, options):
+        deadline = time.perf_counter() + options["seconds"]
+        rows = options["rows"]
+        lock = threading.Lock()
+        result = {"write": [], "read": [], "errors": 0}
+
+        def write(n):
+            # Lee y luego escribe en la misma transacción, como guardar una cotización
+            pk = n % rows + 1
+            with transaction.atomic(using=alias):
+                with connections[alias].cursor() as cursor:
+                    cursor.execute("SELECT total FROM bench_quote WHERE id = %s", [pk])
+                    cursor.fetchone()
+                    now = timezone.now().isoformat()
+                    cursor.execute("UPDATE bench_quote SET total = total + 1, updated = %s WHERE id = %s", [now, pk])
+                    cursor.execute("INSERT INTO bench_event (quote_id, created) VALUES (%s, %s)", [pk, now])
+
+        def read(n):
+            with connections[alias].cursor() as cursor:
+                cursor.execute("SELECT COUNT(*), SUM(total) FROM bench_quote")
+                cursor.fetchone()
+                cursor.execute("SELECT quote_id, created FROM bench_event ORDER BY id DESC LIMIT 20")
+                cursor.fetchall()
+
+        def worker(kind, operation, offset):
+            n = offset
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    operation(n)
+                except OperationalError:
+                    with lock:
+                        result["errors"] += 1
+                else:
+                    with lock:
+                        result[kind].append(time.perf_counter() - started)
+                finally:
+                    if not reuse:
+                        # CONN_MAX_AGE=0: Django cierra la conexión al terminar cada request
+                        connections[alias].close()
+                n += 1
+            connections[alias].close()
+
+        threads = [
+            threading.Thread(target=worker, args=("write", write, i * 7919))
+            for i in range(options["writers"])
+        ] + [
+            threading.Thread(target=worker, args=("read", read, i))
+            for i in range(options["readers"])
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return result
+
+    def report(self, name, result, seconds):
+        self.stdout.write(self.style.MIGRATE_HEADING(name))
+        for kind in ("write", "read"):
+            timings = sorted(result[kind])
+            if not timings:
+                self.stdout.write(f"  {kind}: sin operaciones completadas")
+                continue
+            p95 = timings[min(int(len(timings) * 0.95), len(timings) - 1)]
+            self.stdout.write(
+                f"  {kind}: {len(timings) / seconds:.0f} op/s, "
+                f"p50 {statistics.median(timings) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms"
+            )
+        errors = result["errors"]
+        style = self.style.ERROR if errors else self.style.SUCCESS
+        self.stdout.write(style(f"  errores (database is locked): {errors}"))
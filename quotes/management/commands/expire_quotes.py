@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from quotes.models import Quote
+
+
+class Command(BaseCommand):
+    help = (
+        "Marca como expiradas las cotizaciones abiertas cuya vigencia (valid_until) ya pasó. "
+        "Pensado para correr diario (cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Fecha de referencia (AAAA-MM-DD); expiran las válidas hasta antes de ese día. Por defecto hoy")
+        parser.add_argument("--batch-size", type=int, default=500, help="Cotizaciones por UPDATE")
+        parser.add_argument("--dry-run", action="store_true", help="Solo contar, sin modificar")
+
+    def handle(self, *args, **options):
+        if options["date"]:
+            try:
+                today = datetime.strptime(options["date"], "%Y-%m-%d").date()
+            except ValueError:
+                raise CommandError(f"Fecha inválida: {options['date']} (usa AAAA-MM-DD)")
+        else:
+            today = timezone.localdate()
+
+        # Usa el índice (status, valid_until)
+        due = Quote.objects.filter(status__in=Quote.OPEN_STATUSES, valid_until__lt=today)
+
+        if options["dry_run"]:
+            self.stdout.write(f"Cotizaciones por expirar: {due.count()}")
+            return
+
+        batch_size = max(options["batch_size"], 1)
+        expired = 0
+        while True:
+            pks = list(due.order_by("pk").values_list("pk", flat=True)[:batch_size])
+            if not pks:
+                break
+
+            # Un UPDATE por bloque; los contadores se ajustan en bloque (quotes_bulk_status_changed)
+            changed = Quote.objects.filter(pk__in=pks, status__in=Quote.OPEN_STATUSES).bulk_transition(
+                Quote.Status.EXPIRED,
+                expired_at=timezone.now(),
+            )
+            expired += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f"Cotizaciones expiradas: {expired}"))
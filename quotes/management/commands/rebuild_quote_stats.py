@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from quotes import rollups
+from quotes.models import Quote, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula el total guardado de cada cotización y reconstruye los resúmenes "
+        "por cliente y los contadores del dashboard."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=500, help="Cotizaciones por bloque al recalcular totales")
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+
+        updated = rollups.refresh_totals(Quote, chunk_size)
+        self.stdout.write(f"Totales actualizados: {updated}")
+
+        with transaction.atomic():
+            stats, pipeline, monthly = rollups.rebuild_rollups(
+                Quote, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter, chunk_size=chunk_size,
+            )
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Resúmenes reconstruidos para {stats} clientes; "
+            f"{pipeline} contadores de pipeline y {monthly} meses ganados."
+        ))
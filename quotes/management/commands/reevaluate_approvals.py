@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from quotes.models import ApprovalRule
+
+
+class Command(BaseCommand):
+    help = (
+        "Vuelve a evaluar las cotizaciones en aprobación pendiente con las reglas actuales "
+        "y aprueba las que ya no requieren aprobación."
+    )
+
+    def handle(self, *args, **options):
+        approved = ApprovalRule.reevaluate_pending()
+        self.stdout.write(self.style.SUCCESS(f"Cotizaciones aprobadas: {len(approved)}"))
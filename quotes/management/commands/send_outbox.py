@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from quotes import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Envía los correos pendientes de cotizaciones por bloques, reutilizando una "
+        "conexión SMTP por bloque. Con --loop se queda revisando el outbox."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=50, help="Correos por conexión SMTP")
+        parser.add_argument("--max-attempts", type=int, default=outbox.MAX_ATTEMPTS, help="Intentos antes de marcar un correo como fallido")
+        parser.add_argument("--loop", action="store_true", help="No terminar; revisar el outbox cada --interval segundos")
+        parser.add_argument("--interval", type=float, default=5, help="Segundos de espera cuando no hay correos (con --loop)")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+
+        while True:
+            sent, failed = outbox.drain(batch_size=options["batch_size"], max_attempts=options["max_attempts"])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                self.stdout.write(f"Enviados: {sent}  Fallidos: {failed}")
+                continue
+
+            if not options["loop"]:
+                break
+            time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Total enviados: {total_sent}  Fallidos: {total_failed}"))
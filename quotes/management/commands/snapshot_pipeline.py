@@ -0,0 +1,108 @@
+from datetime import datetime, time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Case, CharField, Count, F, Sum, Value, When
+from django.utils import timezone
+
+from quotes.models import Quote, PipelineSnapshot
+
+
+def end_of_day(day):
+    return timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+
+
+def replayed_status(day_end):
+    """
+    Estatus que tenía cada cotización al cierre del día, reconstruido con las
+    fechas del workflow. No hay fecha para la revisión: antes de aprobarse se
+    toma Borrador (o Aprobación pendiente si sigue en ese estatus).
+    """
+    S = Quote.Status
+    return Case(
+        When(lost_at__lt=day_end, then=Value(S.LOST)),
+        When(won_at__lt=day_end, then=Value(S.WON)),
+        When(expired_at__lt=day_end, then=Value(S.EXPIRED)),
+        When(sent_at__lt=day_end, then=Value(S.SENT)),
+        When(approved_at__lt=day_end, then=Value(S.APPROVED)),
+        When(status=S.PENDING_APPROVAL, then=Value(S.PENDING_APPROVAL)),
+        default=Value(S.DRAFT),
+        output_field=CharField(),
+    )
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda la foto diaria del pipeline (cotizaciones y monto por vendedor y estatus). "
+        "Con --backfill reconstruye los días indicados a partir de las fechas del workflow."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", type=self.parse_date, help="Día a guardar (AAAA-MM-DD). Por defecto hoy")
+        parser.add_argument("--backfill", action="store_true", help="Reconstruir días pasados con las fechas del workflow")
+        parser.add_argument("--from", dest="date_from", type=self.parse_date, help="Primer día del backfill (por defecto la primera cotización)")
+        parser.add_argument("--to", dest="date_to", type=self.parse_date, help="Último día del backfill (por defecto ayer)")
+        parser.add_argument("--chunk-size", type=int, default=31, help="Días por transacción en el backfill")
+
+    @staticmethod
+    def parse_date(value):
+        try:
+            return datetime.strptime(value, "%Y-%m-%d").date()
+        except ValueError:
+            raise CommandError(f"Fecha inválida: {value} (usa AAAA-MM-DD)")
+
+    def handle(self, *args, **options):
+        if not options["backfill"]:
+            day = options["date"] or timezone.localdate()
+            with transaction.atomic():
+                written = self.write_day(day, live=day == timezone.localdate())
+            self.stdout.write(self.style.SUCCESS(f"Foto del {day}: {written} filas."))
+            return
+
+        first = Quote.objects.order_by("created").values_list("created", flat=True).first()
+        if first is None:
+            self.stdout.write("No hay cotizaciones.")
+            return
+
+        date_from = options["date_from"] or timezone.localdate(first)
+        date_to = options["date_to"] or timezone.localdate() - timedelta(days=1)
+        if date_from > date_to:
+            raise CommandError("--from debe ser anterior o igual a --to.")
+
+        days = [date_from + timedelta(days=n) for n in range((date_to - date_from).days + 1)]
+        chunk_size = max(options["chunk_size"], 1)
+        written = 0
+        for start in range(0, len(days), chunk_size):
+            chunk = days[start:start + chunk_size]
+            with transaction.atomic():
+                for day in chunk:
+                    written += self.write_day(day)
+            self.stdout.write(f"{chunk[0]} a {chunk[-1]}: listo")
+
+        self.stdout.write(self.style.SUCCESS(f"Backfill de {len(days)} días: {written} filas."))
+
+    def write_day(self, day, live=False):
+        """
+        Una consulta agrupada por vendedor y estatus para el día. Con live=True se
+        usa el estatus actual (foto de hoy); si no, el reconstruido.
+        """
+        quotes = Quote.objects.order_by()
+        if live:
+            quotes = quotes.annotate(snapshot_status=F("status"))
+        else:
+            day_end = end_of_day(day)
+            quotes = quotes.filter(created__lt=day_end).annotate(snapshot_status=replayed_status(day_end))
+
+        rows = (
+            quotes
+            .values("user_id", "snapshot_status")
+            .annotate(count=Count("pk"), amount=Sum("cached_total"))
+        )
+        snapshots = [
+            PipelineSnapshot(date=day, user_id=row["user_id"], status=row["snapshot_status"], count=row["count"], amount=row["amount"])
+            for row in rows
+        ]
+
+        PipelineSnapshot.objects.filter(date=day).delete()
+        PipelineSnapshot.objects.bulk_create(snapshots)
+        return len(snapshots)
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from bitquotes.warmup import warm_up
+
+
+class Command(BaseCommand):
+    help = (
+        "Compila las plantillas pesadas y los patrones de URL y llena los caches de uso común. "
+        "Los workers lo hacen solos al arrancar (WARMUP_ON_BOOT); el comando sirve para medirlo "
+        "y para llenar un cache compartido después de un deploy."
+    )
+
+    def handle(self, *args, **options):
+        for step, (result, duration_ms) in warm_up().items():
+            if result is None:
+                self.stdout.write(self.style.ERROR(f"{step}: falló (ver log)"))
+                continue
+
+            if step == "templates":
+                detail = f"{len(result)} plantillas"
+            elif step == "urls":
+                detail = f"{result} patrones"
+            else:
+                detail = ", ".join(f"{name}={value}" for name, value in result.items())
+            self.stdout.write(f"{step}: {detail} en {duration_ms} ms")
+
+        self.stdout.write(self.style.SUCCESS("Listo."))
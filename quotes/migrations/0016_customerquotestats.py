@@ -0,0 +1,35 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0011_alter_customer_rfc'),
+        ('quotes', '0015_alter_quote_approved_by_alter_quote_lost_by_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CustomerQuoteStats',
+            fields=[
+                ('customer', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='quote_stats', serialize=False, to='customers.customer', verbose_name='Cliente')),
+                ('draft_count', models.IntegerField(default=0, verbose_name='Borradores')),
+                ('pending_count', models.IntegerField(default=0, verbose_name='Aprobación pendiente')),
+                ('approved_count', models.IntegerField(default=0, verbose_name='Aprobadas')),
+                ('sent_count', models.IntegerField(default=0, verbose_name='Enviadas')),
+                ('won_count', models.IntegerField(default=0, verbose_name='Ganadas')),
+                ('lost_count', models.IntegerField(default=0, verbose_name='Perdidas')),
+                ('expired_count', models.IntegerField(default=0, verbose_name='Expiradas')),
+                ('won_total', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Total ganado')),
+                ('last_quote_at', models.DateTimeField(blank=True, null=True, verbose_name='Última cotización')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Resumen de cotizaciones por cliente',
+                'verbose_name_plural': 'Resúmenes de cotizaciones por cliente',
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:37
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0011_alter_customer_rfc'),
+        ('quotes', '0016_customerquotestats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyWonCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateField(help_text='Primer día del mes', verbose_name='Mes')),
+                ('count', models.IntegerField(default=0, verbose_name='Cotizaciones')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Monto')),
+            ],
+            options={
+                'verbose_name': 'Ganadas por mes',
+                'verbose_name_plural': 'Ganadas por mes',
+            },
+        ),
+        migrations.CreateModel(
+            name='PipelineCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('DFT', 'Borrador'), ('RVW', 'Aprobación pendiente'), ('APP', 'Aprobada'), ('SNT', 'Enviada'), ('WON', 'Ganada'), ('LST', 'Perdida'), ('EXP', 'Expirada')], max_length=3, verbose_name='Estatus')),
+                ('count', models.IntegerField(default=0, verbose_name='Cotizaciones')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Monto')),
+            ],
+            options={
+                'verbose_name': 'Contador de pipeline',
+                'verbose_name_plural': 'Contadores de pipeline',
+            },
+        ),
+        migrations.AddField(
+            model_name='quote',
+            name='cached_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12, verbose_name='Total'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['user', 'updated'], name='quotes_quot_user_id_b586f6_idx'),
+        ),
+        migrations.AddField(
+            model_name='monthlywoncounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='monthly_won_counters', to=settings.AUTH_USER_MODEL, verbose_name='Usuario'),
+        ),
+        migrations.AddField(
+            model_name='pipelinecounter',
+            name='user',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_counters', to=settings.AUTH_USER_MODEL, verbose_name='Usuario'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlywoncounter',
+            constraint=models.UniqueConstraint(fields=('user', 'month'), name='unique_monthly_won_counter'),
+        ),
+        migrations.AddConstraint(
+            model_name='pipelinecounter',
+            constraint=models.UniqueConstraint(fields=('user', 'status'), name='unique_pipeline_counter'),
+        ),
+    ]
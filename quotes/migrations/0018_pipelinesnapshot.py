@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:39
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0017_quote_cached_total_pipeline_counters'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PipelineSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='Fecha')),
+                ('status', models.CharField(choices=[('DFT', 'Borrador'), ('RVW', 'Aprobación pendiente'), ('APP', 'Aprobada'), ('SNT', 'Enviada'), ('WON', 'Ganada'), ('LST', 'Perdida'), ('EXP', 'Expirada')], max_length=3, verbose_name='Estatus')),
+                ('count', models.IntegerField(default=0, verbose_name='Cotizaciones')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='Monto')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pipeline_snapshots', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Foto diaria del pipeline',
+                'verbose_name_plural': 'Fotos diarias del pipeline',
+                'ordering': ['date', 'user', 'status'],
+                'indexes': [models.Index(fields=['user', 'date'], name='quotes_pipe_user_id_b0c8b6_idx')],
+                'constraints': [models.UniqueConstraint(fields=('date', 'user', 'status'), name='unique_pipeline_snapshot')],
+            },
+        ),
+    ]
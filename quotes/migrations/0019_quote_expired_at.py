@@ -0,0 +1,25 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0011_alter_customer_rfc'),
+        ('quotes', '0018_pipelinesnapshot'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quote',
+            name='expired_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Fecha de expiración'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['status', 'valid_until'], name='quotes_quot_status_3ae330_idx'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:43
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0019_quote_expired_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteEventCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True, verbose_name='Consumidor')),
+                ('position', models.BigIntegerField(default=0, verbose_name='Último evento')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Cursor de eventos',
+                'verbose_name_plural': 'Cursores de eventos',
+            },
+        ),
+        migrations.CreateModel(
+            name='QuoteEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('type', models.CharField(choices=[('NEW', 'Creada'), ('DFT', 'Regresada a borrador'), ('RVW', 'Enviada a aprobación'), ('APP', 'Aprobada'), ('SNT', 'Enviada'), ('WON', 'Ganada'), ('LST', 'Perdida'), ('EXP', 'Expirada')], max_length=3, verbose_name='Tipo')),
+                ('old_status', models.CharField(blank=True, choices=[('DFT', 'Borrador'), ('RVW', 'Aprobación pendiente'), ('APP', 'Aprobada'), ('SNT', 'Enviada'), ('WON', 'Ganada'), ('LST', 'Perdida'), ('EXP', 'Expirada')], max_length=3, verbose_name='Estatus anterior')),
+                ('new_status', models.CharField(choices=[('DFT', 'Borrador'), ('RVW', 'Aprobación pendiente'), ('APP', 'Aprobada'), ('SNT', 'Enviada'), ('WON', 'Ganada'), ('LST', 'Perdida'), ('EXP', 'Expirada')], max_length=3, verbose_name='Estatus nuevo')),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=12, verbose_name='Total')),
+                ('created', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Fecha')),
+                ('quote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='events', to='quotes.quote', verbose_name='Cotización')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='quote_events', to=settings.AUTH_USER_MODEL, verbose_name='Usuario')),
+            ],
+            options={
+                'verbose_name': 'Evento de cotización',
+                'verbose_name_plural': 'Eventos de cotización',
+                'ordering': ['pk'],
+                'indexes': [models.Index(fields=['quote', 'created'], name='quotes_quot_quote_i_a92b36_idx'), models.Index(fields=['type', 'created'], name='quotes_quot_type_f9b35e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:44
+
+from django.db import migrations, models
+
+
+def create_default_rule(apps, schema_editor):
+    # Regla general con el comportamiento original: descuento de 10% o más requiere aprobación
+    ApprovalRule = apps.get_model("quotes", "ApprovalRule")
+    ApprovalRule.objects.get_or_create(role="", defaults={"max_line_discount": 9})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0020_quoteevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApprovalRule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(blank=True, choices=[('S', 'Vendedor'), ('C', 'Servicio a clientes'), ('M', 'Gerente'), ('A', 'Administrador')], help_text='Vacío: todos los roles', max_length=1, unique=True, verbose_name='Rol')),
+                ('max_line_discount', models.PositiveSmallIntegerField(blank=True, help_text='Un descuento mayor requiere aprobación', null=True, verbose_name='Descuento máximo por línea (%)')),
+                ('max_total', models.DecimalField(blank=True, decimal_places=2, help_text='Un total mayor requiere aprobación', max_digits=12, null=True, verbose_name='Total máximo')),
+                ('below_catalog_price', models.BooleanField(default=False, help_text='Requiere aprobación si un precio unitario es menor al precio de catálogo', verbose_name='Precio menor al de catálogo')),
+                ('is_active', models.BooleanField(default=True, verbose_name='Activa')),
+                ('updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Regla de aprobación',
+                'verbose_name_plural': 'Reglas de aprobación',
+                'ordering': ['role'],
+            },
+        ),
+        migrations.RunPython(create_default_rule, migrations.RunPython.noop),
+    ]
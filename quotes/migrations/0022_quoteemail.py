@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:46
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0021_approvalrule'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuoteEmail',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('to_email', models.EmailField(max_length=254, verbose_name='Para')),
+                ('reply_to', models.EmailField(blank=True, max_length=254, verbose_name='Responder a')),
+                ('subject', models.CharField(max_length=200, verbose_name='Asunto')),
+                ('body', models.TextField(verbose_name='Mensaje')),
+                ('status', models.CharField(choices=[('PEN', 'Pendiente'), ('SNG', 'Enviando'), ('SNT', 'Enviado'), ('ERR', 'Fallido')], default='PEN', max_length=3, verbose_name='Estatus')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Siguiente intento')),
+                ('claimed_until', models.DateTimeField(blank=True, null=True, verbose_name='Reservado hasta')),
+                ('claim_token', models.CharField(blank=True, editable=False, max_length=32)),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Fecha de envío')),
+                ('created_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='quote_emails', to=settings.AUTH_USER_MODEL, verbose_name='Creado por')),
+                ('quote', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='emails', to='quotes.quote', verbose_name='Cotización')),
+            ],
+            options={
+                'verbose_name': 'Correo de cotización',
+                'verbose_name_plural': 'Correos de cotización',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['status', 'next_attempt_at'], name='quotes_quot_status_3fdc07_idx'), models.Index(fields=['quote', 'created'], name='quotes_quot_quote_i_0950d0_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:01
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('customers', '0012_customer_contact_search_indexes'),
+        ('quotes', '0022_quoteemail'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['valid_until', 'status'], name='quotes_quot_valid_u_c2e53b_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['-created'], name='quotes_quot_created_760222_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='quote',
+            index=models.Index(fields=['customer', 'created'], name='quotes_quot_custome_e3b484_idx'),
+        ),
+    ]
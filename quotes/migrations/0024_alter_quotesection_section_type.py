@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0023_quote_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='quotesection',
+            name='section_type',
+            field=models.CharField(choices=[('EQU', 'Equipo'), ('CON', 'Consumible'), ('SER', 'Servicio'), ('ACC', 'Accesorio'), ('REF', 'Refacciones'), ('SFT', 'Software')], max_length=3, verbose_name='Tipo de sección'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+from django.db import migrations
+
+
+def backfill(apps, schema_editor):
+    """
+    0017 agregó cached_total en 0 sin calcularlo: las cotizaciones anteriores se
+    veían en $0 en la lista, el dashboard y las reglas de aprobación por monto.
+    Se calcula y se reconstruyen los resúmenes (igual que rebuild_quote_stats).
+    """
+    from quotes import rollups
+
+    Quote = apps.get_model("quotes", "Quote")
+    rollups.refresh_totals(Quote)
+    rollups.rebuild_rollups(
+        Quote,
+        apps.get_model("quotes", "CustomerQuoteStats"),
+        apps.get_model("quotes", "PipelineCounter"),
+        apps.get_model("quotes", "MonthlyWonCounter"),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0024_alter_quotesection_section_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:23
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quotes', '0025_backfill_cached_total'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='quote',
+            name='quotes_quot_valid_u_c2e53b_idx',
+        ),
+    ]
@@ -1,14 +1,150 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
+from django.core.cache import cache
+from dataclasses import dataclass
+import uuid
 from datetime import date
 from calendar import monthrange
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.template.loader import render_to_string
 from django.utils import timezone
 from decimal import Decimal, ROUND_HALF_UP
 
 from customers.models import Customer, Contact
 from catalog.models import Product
+from users.capabilities import capabilities_for
+from users.models import Profile
+from taskqueue.registry import enqueue_on_commit
+from cachebus import bus
+from bitquotes.generations import get_generations
+from .signals import quote_status_changed, quote_total_changed, quotes_bulk_status_changed
+
+
+def line_gross_total(quantity, unit_price) -> Decimal:
+    return (Decimal(quantity) * (unit_price or Decimal("0.00"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def line_discount_value(gross_total, discount) -> Decimal:
+    pct = Decimal(discount or 0) / Decimal("100")
+    return (gross_total * pct).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def tax_for(net_subtotal) -> Decimal:
+    return (net_subtotal * Decimal(0.16)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def lines_total(lines) -> Decimal:
+    """
+    Total con IVA de las líneas (cualquier objeto con quantity, unit_price y
+    discount), con el mismo redondeo que Quote.total. La migración que llena
+    cached_total lo usa con los modelos históricos.
+    """
+    subtotal = discount = Decimal("0.00")
+    for line in lines:
+        gross = line_gross_total(line.quantity, line.unit_price)
+        subtotal += gross
+        discount += line_discount_value(gross, line.discount)
+
+    return subtotal - discount + tax_for(subtotal - discount)
+
+
+@dataclass(frozen=True)
+class TransitionResult:
+    pk: int
+    quote_id: str
+    ok: bool
+    message: str
+
+
+class QuoteQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Cotizaciones que el usuario puede ver y operar: todas para CSR / manager,
+        solo las propias para el resto.
+        """
+        if user is None or not user.is_authenticated:
+            return self.none()
+
+        if capabilities_for(user).can_see_all_quotes:
+            return self
+
+        return self.filter(user=user)
+
+    def bulk_transition(self, new_status, user=None, **values):
+        """
+        Cambia el estatus de las cotizaciones del queryset con un solo UPDATE, sin
+        save() por objeto. Las cotizaciones se agrupan por vendedor, cliente y
+        estatus anterior (conteo y suma de cached_total) para que los contadores se
+        ajusten en bloque (quotes_bulk_status_changed). Regresa los pks cambiados.
+        """
+        with transaction.atomic():
+            quotes = list(
+                self.exclude(status=new_status)
+                .select_for_update()
+                .order_by("pk")
+                .values("pk", "user_id", "customer_id", "status", "cached_total")
+            )
+            if not quotes:
+                return []
+
+            groups = {}
+            for quote in quotes:
+                key = (quote["user_id"], quote["customer_id"], quote["status"])
+                group = groups.setdefault(key, {
+                    "user_id": quote["user_id"], "customer_id": quote["customer_id"], "status": quote["status"],
+                    "count": 0, "amount": Decimal("0.00"),
+                })
+                group["count"] += 1
+                group["amount"] += quote["cached_total"]
+
+            pks = [quote["pk"] for quote in quotes]
+            Quote.objects.filter(pk__in=pks).update(status=new_status, updated=timezone.now(), **values)
+            quotes_bulk_status_changed.send(
+                sender=Quote, groups=list(groups.values()), quotes=quotes, new_status=new_status, user=user,
+            )
+
+        return pks
+
+    def with_approval_facts(self):
+        """
+        Anota lo que evalúan las reglas de aprobación (ApprovalRule), en una sola
+        consulta agregada sobre las líneas.
+        """
+        return self.annotate(
+            max_line_discount=models.Max("quote_lines__discount"),
+            lines_below_catalog=models.Count(
+                "quote_lines",
+                filter=models.Q(quote_lines__unit_price__lt=models.F("quote_lines__product__price")),
+            ),
+            owner_role=models.F("user__profile__role"),
+        )
+
+    def bulk_action(self, action, user=None):
+        """
+        Aplica una acción del workflow (ver Quote.BULK_ACTIONS) a todas las
+        cotizaciones del queryset en una transacción. Solo cambian las que están
+        en un estatus permitido, igual que en approve() / mark_sent(); regresa un
+        TransitionResult por cotización.
+        """
+        new_status, allowed, stamp = Quote.BULK_ACTIONS[action]
+        values = {f"{stamp}_at": timezone.now()}
+        if stamp != "expired":
+            values[f"{stamp}_by"] = user
+
+        with transaction.atomic():
+            rows = list(self.select_for_update().order_by("pk").values_list("pk", "quote_id", "status"))
+            eligible = [pk for pk, _, status in rows if status in allowed]
+            changed = set(Quote.objects.filter(pk__in=eligible).bulk_transition(new_status, user=user, **values))
+
+        new_label = Quote.Status(new_status).label
+        results = []
+        for pk, quote_id, status in rows:
+            if pk in changed:
+                results.append(TransitionResult(pk, quote_id, True, new_label))
+            else:
+                results.append(TransitionResult(pk, quote_id, False, f"No se puede cambiar desde «{Quote.Status(status).label}»"))
+        return results
 
 
 class Quote(models.Model):
@@ -20,7 +156,7 @@ class Quote(models.Model):
         WON = "WON", "Ganada"
         LOST = "LST", "Perdida"
         EXPIRED = "EXP", "Expirada"
-        #Como se va a marcar una cotización como expirada?
+        # EXPIRED lo asigna el comando expire_quotes cuando vence valid_until
 
     class PaymentTerms(models.TextChoices):
         CASH = "CSH", "Contado"
@@ -30,6 +166,20 @@ class Quote(models.Model):
         N60 = "N60", "Crédito 60 días"
         N90 = "N90", "Crédito 90 días"
 
+    # Estatus que cuentan como pipeline abierto (dashboard)
+    OPEN_STATUSES = (Status.DRAFT, Status.PENDING_APPROVAL, Status.APPROVED, Status.SENT)
+    # Las líneas ya no cambian (ver QuoteSection.fragment_version). APPROVED no:
+    # una aprobada todavía se edita (can_edit)
+    FROZEN_STATUSES = (Status.SENT, Status.WON, Status.LOST)
+
+    # Acciones en bloque: nuevo estatus, estatus desde los que se permite y
+    # prefijo de los campos <prefijo>_at / <prefijo>_by que se llenan.
+    BULK_ACTIONS = {
+        "approve": (Status.APPROVED, (Status.PENDING_APPROVAL,), "approved"),
+        "send": (Status.SENT, (Status.APPROVED,), "sent"),
+        "expire": (Status.EXPIRED, OPEN_STATUSES, "expired"),
+    }
+
     # El identificador de la cotización va a ener el formato BIT-NA-YYMMDD-#####, donde:
     # - 'BIT' siempre es constante
     # - 'NA' son las iniciales del nombre y el apellido del creador de la cotización
@@ -56,6 +206,8 @@ class Quote(models.Model):
     #discount_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)], verbose_name="Descuento")
     #tax = models.DecimalField(max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)], verbose_name="IVA")
     #total = models.DecimalField(max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)], verbose_name="Total")
+    # Copia del total (propiedad `total`) para contadores y listados; se actualiza con refresh_total()
+    cached_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, verbose_name="Total")
     is_active = models.BooleanField(default=True, verbose_name="Activa")
     created = models.DateTimeField(auto_now_add=True)
     updated = models.DateTimeField(auto_now=True)
@@ -70,12 +222,21 @@ class Quote(models.Model):
     lost_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, related_name="lost_quotes", verbose_name="Perdida por")
     lost_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de pérdida")
     lost_reason = models.CharField(max_length=100, blank=True, null=True, verbose_name="Razón de pérdida")
+    expired_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de expiración")
+
+    objects = QuoteQuerySet.as_manager()
 
     class Meta:
         ordering = ["-created"]
         indexes = [
             models.Index(fields=["status", "created"]),
+            # expire_quotes: status IN (abiertas) y rango de valid_until
+            models.Index(fields=["status", "valid_until"]),
             models.Index(fields=["user", "created"]),
+            # Lista sin filtro (gerente) y lista por cliente, en orden de la lista
+            models.Index(fields=["-created"]),
+            models.Index(fields=["customer", "created"]),
+            models.Index(fields=["user", "updated"]),
             models.Index(fields=["is_active"]),
         ]
         verbose_name = "Cotización"
@@ -110,8 +271,22 @@ class Quote(models.Model):
         pk_part = str(self.pk).zfill(5)
         self.quote_id = f"BIT-{initials}-{date_part}-{pk_part}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Cliente y vendedor como se leyeron: si un save() los cambia, los
+        # resúmenes se mueven de uno a otro (ver quotes/receivers.py)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_owner = (loaded.get("customer_id"), loaded.get("user_id"))
+        return instance
+
+    def __send_status_changed(self, old_status, user=None):
+        if old_status != self.status:
+            quote_status_changed.send(sender=Quote, quote=self, old_status=old_status, new_status=self.status, user=user)
+
     def save(self, *args, **kwargs):
         self.full_clean()
+        created = self._state.adding
         super().save(*args, **kwargs)
         updated = False
 
@@ -126,14 +301,19 @@ class Quote(models.Model):
         if updated:
             super().save(update_fields=["valid_until", "quote_id"])
 
+        if created:
+            self.__send_status_changed(None, user=self.created_by)
+
         return self
     
     def approve(self, user=None):
+        old_status = self.status
         self.status = self.Status.APPROVED
         self.approved_by = user
         self.approved_at = timezone.now()
 
-        self.save(update_fields=["status", "approved_by", "approved_at"])
+        self.save(update_fields=["status", "approved_by", "approved_at", "updated"])
+        self.__send_status_changed(old_status, user=user)
 
     @property
     def can_edit(self):
@@ -185,42 +365,66 @@ class Quote(models.Model):
             delivery_time=delivery_time,
         )
         
-    def close_internal(self):
-        current_status = self.status
+    def approval_reasons(self):
+        """Motivos por los que la cotización requiere aprobación (lista vacía si no requiere)."""
+        facts = (
+            Quote.objects
+            .filter(pk=self.pk)
+            .with_approval_facts()
+            .values("cached_total", "max_line_discount", "lines_below_catalog", "owner_role")
+            .get()
+        )
+        return ApprovalRule.for_role(facts["owner_role"]).reasons(facts)
 
-        for line in self.quote_lines.all():
-            if line.discount >= 10:
-                self.status = self.Status.PENDING_APPROVAL
-                break
+    def close_internal(self, user=None):
+        current_status = self.status
 
-        if self.status == current_status:
+        reasons = self.approval_reasons()
+        if reasons:
+            self.status = self.Status.PENDING_APPROVAL
+        else:
             self.status = self.Status.APPROVED
             self.approved_at = timezone.now()
 
         self.save()
+        self.__send_status_changed(current_status, user=user)
+
+        return reasons
 
-    def reevaluate_after_edit(self):
+    def reevaluate_after_edit(self, user=None):
         """
         Si la cotización estaba aprobada o en revisión, cualquier edición invalida
         esa aprobación y regresa el estatus a DRAFT. La aprobación debe realizarse de nuevo.
         """
         if self.status in [self.Status.APPROVED, self.Status.PENDING_APPROVAL]:
+            old_status = self.status
             self.status = self.Status.DRAFT
             self.approved_at = None
             self.approved_by = None
-            self.save(update_fields=["status", "approved_at", "approved_by"])
+            self.save(update_fields=["status", "approved_at", "approved_by", "updated"])
+            self.__send_status_changed(old_status, user=user)
 
     def mark_sent(self, user=None):
         """
-        Marca la cotización como enviada (workflow temporal mientras integramos email real).
+        Marca la cotización como enviada. El correo al contacto se agrega al
+        outbox (QuoteEmail) y lo envía el comando send_outbox. El cambio de
+        estatus y la fila del outbox se guardan en una sola transacción.
         """
         if not self.can_send:
             return False
 
-        self.status = self.Status.SENT
-        self.sent_at = timezone.now()
-        self.sent_by = user
-        self.save(update_fields=["status", "sent_at", "sent_by"])
+        with transaction.atomic():
+            old_status = self.status
+            self.status = self.Status.SENT
+            self.sent_at = timezone.now()
+            self.sent_by = user
+            self.save(update_fields=["status", "sent_at", "sent_by", "updated"])
+            self.__send_status_changed(old_status, user=user)
+
+            if old_status == self.Status.SENT:
+                # Reenvío: no cambia el estatus (no hay señal) pero sí sale otro correo
+                QuoteEmail.build_for(self, user=user).save()
+                enqueue_on_commit("quotes.send_outbox", priority=10, unique=True)
 
         return True
 
@@ -229,10 +433,12 @@ class Quote(models.Model):
         if not self.can_mark_won:
             return False
         
+        old_status = self.status
         self.status = self.Status.WON
         self.won_at = timezone.now()
         self.won_by = user
-        self.save(update_fields=["status", "won_at", "won_by"])
+        self.save(update_fields=["status", "won_at", "won_by", "updated"])
+        self.__send_status_changed(old_status, user=user)
 
         return True
 
@@ -240,13 +446,31 @@ class Quote(models.Model):
         if not self.can_mark_lost:
             return False
         
+        old_status = self.status
         self.status = self.Status.LOST
         self.lost_at = timezone.now()
         self.lost_by = user
-        self.save(update_fields=["status", "lost_at", "lost_by"])
+        self.save(update_fields=["status", "lost_at", "lost_by", "updated"])
+        self.__send_status_changed(old_status, user=user)
         
         return True
 
+    def refresh_total(self):
+        """
+        Recalcula cached_total a partir de las líneas. Se llama después de editar
+        las líneas; los contadores se ajustan con la diferencia (quote_total_changed).
+        """
+        old_total = self.cached_total
+        new_total = self.total
+
+        if new_total != old_total:
+            self.cached_total = new_total
+            self.updated = timezone.now()
+            Quote.objects.filter(pk=self.pk).update(cached_total=new_total, updated=self.updated)
+            quote_total_changed.send(sender=Quote, quote=self, old_total=old_total, new_total=new_total)
+
+        return new_total
+
     def assign_section(self, product):
         section_type = product.product_type
         section_name = product.get_product_type_display()
@@ -285,7 +509,7 @@ class Quote(models.Model):
     
     @property
     def get_tax(self) -> Decimal:
-        return (self.net_subtotal * Decimal(0.16)).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return tax_for(self.net_subtotal)
     
     @property
     def total(self) -> Decimal:
@@ -346,6 +570,23 @@ class QuoteSection(models.Model):
     def total(self) -> Decimal:
         return (self.net_subtotal + self.tax)
     
+    @property
+    def fragment_version(self) -> str:
+        """
+        Versión del contenido para el cache de fragmentos ({% cache %} en el
+        detalle y el PDF). quote_edit reconstruye las secciones en cada guardado,
+        así que el pk cambia con el contenido. En estatus cerrados basta el pk y
+        el mismo fragmento sirve en cada transición (enviada, ganada, perdida),
+        para el PDF de la vista y el del correo. En los demás, aprobada incluida
+        porque todavía se puede editar, se agregan las generaciones de líneas y
+        productos (SKU, nombre, descripción).
+        """
+        if self.quote.status in Quote.FROZEN_STATUSES:
+            return str(self.pk)
+
+        line_generation, product_generation = get_generations(QuoteLine, Product)
+        return f"{self.pk}.{line_generation}.{product_generation}"
+
     @property
     def css_class(self) -> str:
         return {
@@ -401,12 +642,11 @@ class QuoteLine(models.Model):
 
     @property
     def gross_total(self) -> Decimal:
-        return (Decimal(self.quantity) * (self.unit_price or Decimal("0.00"))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return line_gross_total(self.quantity, self.unit_price)
     
     @property
     def discount_value(self) -> Decimal:
-        pct = Decimal(self.discount or 0) / Decimal("100")
-        return (self.gross_total * pct).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return line_discount_value(self.gross_total, self.discount)
 
     @property
     def net_total(self) -> Decimal:
@@ -431,3 +671,390 @@ class QuoteComment(models.Model):
 
     def __str__(self):
         return f"Comentario de {self.user} en {self.quote}"
+
+
+class CustomerQuoteStats(models.Model):
+    """
+    Resumen de cotizaciones por cliente. Se actualiza con cada cambio de estatus,
+    al borrar una cotización y al cambiarla de cliente (ver quotes/receivers.py)
+    para no agregar todas las cotizaciones en cada vista.
+    Se puede reconstruir con `manage.py rebuild_quote_stats`.
+    """
+    STATUS_FIELDS = {
+        Quote.Status.DRAFT: "draft_count",
+        Quote.Status.PENDING_APPROVAL: "pending_count",
+        Quote.Status.APPROVED: "approved_count",
+        Quote.Status.SENT: "sent_count",
+        Quote.Status.WON: "won_count",
+        Quote.Status.LOST: "lost_count",
+        Quote.Status.EXPIRED: "expired_count",
+    }
+
+    customer = models.OneToOneField(Customer, on_delete=models.CASCADE, primary_key=True, related_name="quote_stats", verbose_name="Cliente")
+    draft_count = models.IntegerField(default=0, verbose_name="Borradores")
+    pending_count = models.IntegerField(default=0, verbose_name="Aprobación pendiente")
+    approved_count = models.IntegerField(default=0, verbose_name="Aprobadas")
+    sent_count = models.IntegerField(default=0, verbose_name="Enviadas")
+    won_count = models.IntegerField(default=0, verbose_name="Ganadas")
+    lost_count = models.IntegerField(default=0, verbose_name="Perdidas")
+    expired_count = models.IntegerField(default=0, verbose_name="Expiradas")
+    won_total = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Total ganado")
+    last_quote_at = models.DateTimeField(blank=True, null=True, verbose_name="Última cotización")
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Resumen de cotizaciones por cliente"
+        verbose_name_plural = "Resúmenes de cotizaciones por cliente"
+
+    def __str__(self):
+        return f"Resumen de {self.customer}"
+
+    @classmethod
+    def apply(cls, customer_id, counts, won_total=Decimal("0.00"), last_quote_at=None):
+        """
+        Aplica incrementos atómicos (F expressions) al resumen del cliente.
+        `counts` es un dict {status: delta}.
+        """
+        changes = {}
+        for status, delta in counts.items():
+            if delta:
+                field = cls.STATUS_FIELDS[status]
+                changes[field] = models.F(field) + delta
+
+        if won_total:
+            changes["won_total"] = models.F("won_total") + won_total
+
+        if last_quote_at:
+            changes["last_quote_at"] = last_quote_at
+
+        if not changes:
+            return
+
+        cls.objects.get_or_create(customer_id=customer_id)
+        cls.objects.filter(customer_id=customer_id).update(**changes, updated=timezone.now())
+
+    @classmethod
+    def add_quote(cls, quote, customer_id, sign=1):
+        """Suma (o resta con sign=-1) la cotización al resumen de `customer_id`."""
+        won_total = quote.cached_total if quote.status == Quote.Status.WON else 0
+        cls.apply(customer_id, {quote.status: sign}, won_total=sign * won_total)
+        cls.refresh_last_quote_at(customer_id)
+
+    @classmethod
+    def refresh_last_quote_at(cls, customer_id):
+        # Usa el índice (customer, created)
+        latest = Quote.objects.filter(customer_id=customer_id).order_by("-created").values("created")[:1]
+        cls.objects.filter(customer_id=customer_id).update(last_quote_at=models.Subquery(latest))
+
+    @property
+    def total_count(self) -> int:
+        return sum(getattr(self, field) for field in self.STATUS_FIELDS.values())
+
+    @property
+    def open_count(self) -> int:
+        return self.draft_count + self.pending_count + self.approved_count + self.sent_count
+
+    @property
+    def win_rate(self):
+        """Porcentaje de cotizaciones ganadas sobre las cerradas (ganadas + perdidas)."""
+        closed = self.won_count + self.lost_count
+        if not closed:
+            return None
+
+        return (Decimal(self.won_count) * 100 / closed).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP)
+
+
+class PipelineCounter(models.Model):
+    """
+    Número de cotizaciones y monto por vendedor y estatus. Se mantiene con cada
+    transición y cambio de total (ver quotes/receivers.py); el dashboard lo lee
+    directamente en lugar de recorrer las cotizaciones.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="pipeline_counters", verbose_name="Usuario")
+    status = models.CharField(max_length=3, choices=Quote.Status.choices, verbose_name="Estatus")
+    count = models.IntegerField(default=0, verbose_name="Cotizaciones")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Monto")
+
+    class Meta:
+        verbose_name = "Contador de pipeline"
+        verbose_name_plural = "Contadores de pipeline"
+        constraints = [models.UniqueConstraint(fields=["user", "status"], name="unique_pipeline_counter")]
+
+    def __str__(self):
+        return f"{self.user} - {self.get_status_display()}: {self.count}"
+
+    @classmethod
+    def apply(cls, user_id, status, count=0, amount=Decimal("0.00")):
+        if not count and not amount:
+            return
+
+        cls.objects.get_or_create(user_id=user_id, status=status)
+        cls.objects.filter(user_id=user_id, status=status).update(
+            count=models.F("count") + count,
+            amount=models.F("amount") + amount,
+        )
+
+
+class MonthlyWonCounter(models.Model):
+    """Cotizaciones ganadas y monto por vendedor y mes (fecha local de won_at)."""
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="monthly_won_counters", verbose_name="Usuario")
+    month = models.DateField(verbose_name="Mes", help_text="Primer día del mes")
+    count = models.IntegerField(default=0, verbose_name="Cotizaciones")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Monto")
+
+    class Meta:
+        verbose_name = "Ganadas por mes"
+        verbose_name_plural = "Ganadas por mes"
+        constraints = [models.UniqueConstraint(fields=["user", "month"], name="unique_monthly_won_counter")]
+
+    def __str__(self):
+        return f"{self.user} - {self.month:%Y-%m}: {self.count}"
+
+    @staticmethod
+    def month_of(value):
+        return timezone.localdate(value).replace(day=1)
+
+    @classmethod
+    def apply(cls, user_id, month, count=0, amount=Decimal("0.00")):
+        if not count and not amount:
+            return
+
+        cls.objects.get_or_create(user_id=user_id, month=month)
+        cls.objects.filter(user_id=user_id, month=month).update(
+            count=models.F("count") + count,
+            amount=models.F("amount") + amount,
+        )
+
+
+class PipelineSnapshot(models.Model):
+    """
+    Foto diaria del pipeline: cotizaciones y monto por vendedor y estatus al
+    cierre de cada día. La escribe el comando `snapshot_pipeline`; las gráficas
+    de tendencia leen esta tabla en lugar de agregar cotizaciones y líneas.
+    """
+    date = models.DateField(verbose_name="Fecha")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="pipeline_snapshots", verbose_name="Usuario")
+    status = models.CharField(max_length=3, choices=Quote.Status.choices, verbose_name="Estatus")
+    count = models.IntegerField(default=0, verbose_name="Cotizaciones")
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0, verbose_name="Monto")
+
+    class Meta:
+        verbose_name = "Foto diaria del pipeline"
+        verbose_name_plural = "Fotos diarias del pipeline"
+        ordering = ["date", "user", "status"]
+        constraints = [models.UniqueConstraint(fields=["date", "user", "status"], name="unique_pipeline_snapshot")]
+        indexes = [models.Index(fields=["user", "date"])]
+
+    def __str__(self):
+        return f"{self.date} - {self.user} - {self.get_status_display()}: {self.count}"
+
+
+class QuoteEventQuerySet(models.QuerySet):
+    def since(self, event_id):
+        """Eventos posteriores a event_id (la marca de agua del consumidor), en orden."""
+        return self.filter(pk__gt=event_id or 0).order_by("pk")
+
+
+class QuoteEvent(models.Model):
+    """
+    Bitácora de transiciones de estatus. Solo se agregan filas (nunca se editan ni
+    se borran), así que conserva lo que approved_at / sent_at / etc. pierden al
+    reevaluar una cotización. Los consumidores la leen por id con una marca de
+    agua (ver quotes/events.py).
+    """
+    class Type(models.TextChoices):
+        # Salvo CREATED, el tipo es el estatus al que se llegó
+        CREATED = "NEW", "Creada"
+        REOPENED = "DFT", "Regresada a borrador"
+        SUBMITTED = "RVW", "Enviada a aprobación"
+        APPROVED = "APP", "Aprobada"
+        SENT = "SNT", "Enviada"
+        WON = "WON", "Ganada"
+        LOST = "LST", "Perdida"
+        EXPIRED = "EXP", "Expirada"
+
+    quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name="events", verbose_name="Cotización")
+    type = models.CharField(max_length=3, choices=Type.choices, verbose_name="Tipo")
+    old_status = models.CharField(max_length=3, choices=Quote.Status.choices, blank=True, verbose_name="Estatus anterior")
+    new_status = models.CharField(max_length=3, choices=Quote.Status.choices, verbose_name="Estatus nuevo")
+    amount = models.DecimalField(max_digits=12, decimal_places=2, default=0, verbose_name="Total")
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name="quote_events", verbose_name="Usuario")
+    created = models.DateTimeField(default=timezone.now, verbose_name="Fecha")
+
+    objects = QuoteEventQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Evento de cotización"
+        verbose_name_plural = "Eventos de cotización"
+        ordering = ["pk"]
+        indexes = [
+            models.Index(fields=["quote", "created"]),
+            models.Index(fields=["type", "created"]),
+        ]
+
+    def __str__(self):
+        return f"{self.quote_id} - {self.get_type_display()}"
+
+    @classmethod
+    def type_for(cls, old_status, new_status):
+        return cls.Type.CREATED if old_status is None else cls.Type(new_status)
+
+
+class QuoteEventCursor(models.Model):
+    """Marca de agua (último evento procesado) de cada consumidor de QuoteEvent."""
+    name = models.CharField(max_length=50, unique=True, verbose_name="Consumidor")
+    position = models.BigIntegerField(default=0, verbose_name="Último evento")
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Cursor de eventos"
+        verbose_name_plural = "Cursores de eventos"
+
+    def __str__(self):
+        return f"{self.name}: {self.position}"
+
+
+class ApprovalRule(models.Model):
+    """
+    Cuándo una cotización requiere aprobación al finalizarla (close_internal).
+    La regla con rol vacío aplica a todos; una regla de un rol (el del vendedor
+    de la cotización) la reemplaza. Los límites vacíos no se evalúan.
+    """
+    VERSION_KEY = "quotes:approval-rules-version"
+
+    role = models.CharField(max_length=1, choices=Profile.Role.choices, blank=True, unique=True, verbose_name="Rol", help_text="Vacío: todos los roles")
+    max_line_discount = models.PositiveSmallIntegerField(blank=True, null=True, verbose_name="Descuento máximo por línea (%)", help_text="Un descuento mayor requiere aprobación")
+    max_total = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True, verbose_name="Total máximo", help_text="Un total mayor requiere aprobación")
+    below_catalog_price = models.BooleanField(default=False, verbose_name="Precio menor al de catálogo", help_text="Requiere aprobación si un precio unitario es menor al precio de catálogo")
+    is_active = models.BooleanField(default=True, verbose_name="Activa")
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Regla de aprobación"
+        verbose_name_plural = "Reglas de aprobación"
+        ordering = ["role"]
+
+    def __str__(self):
+        return f"Regla: {self.get_role_display() or 'Todos'}"
+
+    @classmethod
+    def default(cls):
+        # Comportamiento original: un descuento de 10% o más requiere aprobación
+        return cls(max_line_discount=9)
+
+    @classmethod
+    def active_rules(cls):
+        """Reglas activas por rol, del cache (versión cambia al guardar o borrar una regla)."""
+        version = cache.get_or_set(cls.VERSION_KEY, lambda: uuid.uuid4().hex, timeout=None)
+        key = f"quotes:approval-rules:{version}"
+        rules = cache.get(key)
+
+        if rules is None:
+            rules = {rule.role: rule for rule in cls.objects.filter(is_active=True)}
+            cache.set(key, rules, timeout=None)
+
+        return rules
+
+    @classmethod
+    def bump_version(cls):
+        cache.set(cls.VERSION_KEY, uuid.uuid4().hex, timeout=None)
+        bus.publish(cls.VERSION_KEY)
+
+    @classmethod
+    def for_role(cls, role, rules=None):
+        rules = cls.active_rules() if rules is None else rules
+        return rules.get(role or "") or rules.get("") or cls.default()
+
+    def reasons(self, facts):
+        """facts: valores de QuoteQuerySet.with_approval_facts() para una cotización."""
+        reasons = []
+
+        max_discount = facts["max_line_discount"] or 0
+        if self.max_line_discount is not None and max_discount > self.max_line_discount:
+            reasons.append(f"Descuento de {max_discount}% (máximo sin aprobación: {self.max_line_discount}%)")
+
+        if self.max_total is not None and facts["cached_total"] > self.max_total:
+            reasons.append(f"Total mayor a ${self.max_total:,.2f}")
+
+        if self.below_catalog_price and facts["lines_below_catalog"]:
+            reasons.append(f"{facts['lines_below_catalog']} línea(s) con precio menor al de catálogo")
+
+        return reasons
+
+    @classmethod
+    def reevaluate_pending(cls, user=None):
+        """
+        Vuelve a evaluar todas las cotizaciones en aprobación pendiente (una
+        consulta agregada) y aprueba en bloque las que ya no requieren
+        aprobación con las reglas actuales. Regresa los pks aprobados.
+        """
+        rules = cls.active_rules()
+        pending = (
+            Quote.objects
+            .filter(status=Quote.Status.PENDING_APPROVAL)
+            .with_approval_facts()
+            .values("pk", "cached_total", "max_line_discount", "lines_below_catalog", "owner_role")
+        )
+        cleared = [row["pk"] for row in pending if not cls.for_role(row["owner_role"], rules).reasons(row)]
+        if not cleared:
+            return []
+
+        return (
+            Quote.objects
+            .filter(pk__in=cleared, status=Quote.Status.PENDING_APPROVAL)
+            .bulk_transition(Quote.Status.APPROVED, user=user, approved_at=timezone.now(), approved_by=None)
+        )
+
+
+class QuoteEmail(models.Model):
+    """
+    Outbox de correos de cotizaciones. Al enviar una cotización solo se agrega
+    una fila, en la misma transacción que el cambio de estatus (mark_sent y
+    bulk_transition abren una transacción); el comando
+    `send_outbox` la envía después con el PDF adjunto (ver quotes/outbox.py).
+    """
+    class Status(models.TextChoices):
+        PENDING = "PEN", "Pendiente"
+        SENDING = "SNG", "Enviando"
+        SENT = "SNT", "Enviado"
+        FAILED = "ERR", "Fallido"
+
+    quote = models.ForeignKey(Quote, on_delete=models.CASCADE, related_name="emails", verbose_name="Cotización")
+    to_email = models.EmailField(verbose_name="Para")
+    reply_to = models.EmailField(blank=True, verbose_name="Responder a")
+    subject = models.CharField(max_length=200, verbose_name="Asunto")
+    body = models.TextField(verbose_name="Mensaje")
+    status = models.CharField(max_length=3, choices=Status.choices, default=Status.PENDING, verbose_name="Estatus")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    next_attempt_at = models.DateTimeField(default=timezone.now, verbose_name="Siguiente intento")
+    claimed_until = models.DateTimeField(blank=True, null=True, verbose_name="Reservado hasta")
+    claim_token = models.CharField(max_length=32, blank=True, editable=False)
+    last_error = models.TextField(blank=True, verbose_name="Último error")
+    created = models.DateTimeField(auto_now_add=True)
+    created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.PROTECT, null=True, blank=True, related_name="quote_emails", verbose_name="Creado por")
+    sent_at = models.DateTimeField(blank=True, null=True, verbose_name="Fecha de envío")
+
+    class Meta:
+        verbose_name = "Correo de cotización"
+        verbose_name_plural = "Correos de cotización"
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+            models.Index(fields=["quote", "created"]),
+        ]
+
+    def __str__(self):
+        return f"{self.quote} → {self.to_email} ({self.get_status_display()})"
+
+    @classmethod
+    def build_for(cls, quote, user=None):
+        """Correo (sin guardar) para el contacto de la cotización, con respuesta al vendedor."""
+        context = {"quote": quote, "contact": quote.contact, "salesperson": quote.user}
+        return cls(
+            quote=quote,
+            to_email=quote.contact.email,
+            reply_to=quote.user.email or "",
+            subject=f"Cotización {quote.quote_id}",
+            body=render_to_string("quotes/email/quote_sent.txt", context),
+            created_by=user,
+        )
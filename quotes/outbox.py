@@ -0,0 +1,159 @@
+"""
+Envío de los correos del outbox (QuoteEmail).
+
+El worker (`manage.py send_outbox`) reserva un bloque de correos pendientes con
+un UPDATE condicional (otro worker no puede tomar los mismos) y los envía por
+una sola conexión SMTP. Si un envío falla (error SMTP o de red) se reintenta con
+espera exponencial hasta MAX_ATTEMPTS; una reserva vencida (worker caído) se
+vuelve a tomar.
+
+Si no se puede generar el PDF (plantilla con error, WeasyPrint no instalado)
+reintentar no lo arregla: el correo queda fallido de inmediato, el error se
+registra con traceback y, ya corregido, se vuelve a encolar desde el admin.
+
+La reserva dura LEASE_SECONDS y se renueva antes de cada envío, así que un
+bloque lento (PDFs grandes, SMTP lento) no la deja vencer a la mitad. Si otro
+worker ya la tomó porque venció, el correo se salta.
+"""
+import logging
+import smtplib
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import QuoteEmail
+from .pdf import pdf_filename, quote_pdf
+
+logger = logging.getLogger(__name__)
+
+MAX_ATTEMPTS = 5
+RETRY_BASE_SECONDS = 60
+RETRY_MAX_SECONDS = 60 * 60
+LEASE_SECONDS = 5 * 60
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+
+def claim(batch_size):
+    """Reserva hasta batch_size correos listos para enviarse y los regresa."""
+    now = timezone.now()
+    ready = (
+        Q(status=QuoteEmail.Status.PENDING, next_attempt_at__lte=now)
+        | Q(status=QuoteEmail.Status.SENDING, claimed_until__lt=now)
+    )
+    pks = list(QuoteEmail.objects.filter(ready).order_by("next_attempt_at", "pk").values_list("pk", flat=True)[:batch_size])
+    if not pks:
+        return []
+
+    token = uuid.uuid4().hex
+    QuoteEmail.objects.filter(ready, pk__in=pks).update(
+        status=QuoteEmail.Status.SENDING,
+        claimed_until=now + timedelta(seconds=LEASE_SECONDS),
+        claim_token=token,
+    )
+    return list(
+        QuoteEmail.objects
+        .filter(claim_token=token, status=QuoteEmail.Status.SENDING)
+        .select_related("quote", "quote__customer", "quote__contact", "quote__user__profile")
+        .order_by("pk")
+    )
+
+
+def extend_lease(email):
+    """Renueva la reserva del correo; False si ya no es de este worker."""
+    claimed_until = timezone.now() + timedelta(seconds=LEASE_SECONDS)
+    renewed = QuoteEmail.objects.filter(
+        pk=email.pk, claim_token=email.claim_token, status=QuoteEmail.Status.SENDING,
+    ).update(claimed_until=claimed_until)
+    if renewed:
+        email.claimed_until = claimed_until
+    return bool(renewed)
+
+
+def _mark_sent(email):
+    email.status = QuoteEmail.Status.SENT
+    email.sent_at = timezone.now()
+    email.attempts += 1
+    email.claimed_until = None
+    email.last_error = ""
+    email.save(update_fields=["status", "sent_at", "attempts", "claimed_until", "last_error"])
+
+
+def _mark_failed(email, error, max_attempts, permanent=False):
+    email.attempts += 1
+    email.last_error = f"{type(error).__name__}: {error}"
+    email.claimed_until = None
+    if permanent or email.attempts >= max_attempts:
+        email.status = QuoteEmail.Status.FAILED
+    else:
+        email.status = QuoteEmail.Status.PENDING
+        email.next_attempt_at = timezone.now() + retry_delay(email.attempts)
+    email.save(update_fields=["status", "attempts", "last_error", "claimed_until", "next_attempt_at"])
+    logger.warning("Correo %s de la cotización %s falló (intento %s): %s", email.pk, email.quote_id, email.attempts, email.last_error)
+
+
+def build_message(email, connection):
+    message = EmailMessage(
+        subject=email.subject,
+        body=email.body,
+        from_email=settings.DEFAULT_FROM_EMAIL,
+        to=[email.to_email],
+        reply_to=[email.reply_to] if email.reply_to else None,
+        connection=connection,
+    )
+    message.attach(pdf_filename(email.quote), quote_pdf(email.quote), "application/pdf")
+    return message
+
+
+def drain(batch_size=50, max_attempts=MAX_ATTEMPTS, connection=None):
+    """
+    Envía un bloque del outbox por una sola conexión. Regresa (enviados, fallidos).
+    """
+    emails = claim(batch_size)
+    if not emails:
+        return 0, 0
+
+    connection = connection or get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except (smtplib.SMTPException, OSError) as exc:
+        for email in emails:
+            _mark_failed(email, exc, max_attempts)
+        return 0, len(emails)
+
+    sent = failed = 0
+    try:
+        for email in emails:
+            if not extend_lease(email):
+                logger.warning("Correo %s: la reserva venció y lo tomó otro worker", email.pk)
+                continue
+            try:
+                message = build_message(email, connection)
+            except Exception as exc:
+                logger.exception("Correo %s: no se pudo generar el PDF de la cotización %s", email.pk, email.quote_id)
+                _mark_failed(email, exc, max_attempts, permanent=True)
+                failed += 1
+                continue
+
+            try:
+                message.send()
+            except (smtplib.SMTPException, OSError) as exc:
+                _mark_failed(email, exc, max_attempts)
+                failed += 1
+                if isinstance(exc, smtplib.SMTPServerDisconnected):
+                    # El servidor cerró la conexión: abrir otra para el resto del bloque
+                    connection.close()
+                    connection.open()
+            else:
+                _mark_sent(email)
+                sent += 1
+    finally:
+        connection.close()
+
+    return sent, failed
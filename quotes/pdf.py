@@ -0,0 +1,76 @@
+"""
+PDF de la cotización.
+
+El PDF se guarda en el cache con la fecha de última modificación de la
+cotización en la llave, más las generaciones de cliente, contacto y vendedor
+(usuario y perfil) que también se imprimen y cuyo cambio no toca
+quote.updated. Así se genera una sola vez por versión y lo reutilizan la vista
+del PDF y el envío por correo. Los archivos estáticos (CSS,
+logos) se leen directo del disco para poder generar el PDF fuera de una request
+(worker del outbox).
+
+WeasyPrint (y su árbol de dependencias) se importa en el primer PDF, no al
+cargar el módulo: views.py importa este módulo y no todos los procesos generan
+PDFs (migrate, shell, workers que solo atienden páginas).
+"""
+import mimetypes
+from pathlib import Path
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles import finders
+from django.core.cache import cache
+from django.template.loader import render_to_string
+
+from bitquotes.generations import versioned_key
+from bitquotes.timing import timed
+
+PDF_TIMEOUT = 60 * 60 * 24
+
+
+def pdf_filename(quote):
+    return f"{quote.quote_id or quote.pk}.pdf"
+
+
+def _url_fetcher(url):
+    from weasyprint import default_url_fetcher
+
+    path = urlparse(url).path
+    if path.startswith(settings.STATIC_URL):
+        found = finders.find(path[len(settings.STATIC_URL):])
+        if found:
+            return {
+                "string": Path(found).read_bytes(),
+                "mime_type": mimetypes.guess_type(found)[0],
+                "redirected_url": url,
+            }
+
+    return default_url_fetcher(url)
+
+
+def render_quote_pdf(quote):
+    from weasyprint import HTML
+
+    with timed("pdf"):
+        html_string = render_to_string("quotes/quote_pdf.html", {"quote": quote})
+        return HTML(string=html_string, base_url="file:///", url_fetcher=_url_fetcher).write_pdf()
+
+
+def quote_pdf(quote):
+    """Bytes del PDF, del cache si la cotización no ha cambiado desde que se generó."""
+    key = versioned_key(
+        "quotes:pdf",
+        "customers.Customer",
+        "customers.Contact",
+        "users.Profile",
+        "users.CustomUser",
+        quote.pk,
+        quote.updated.timestamp(),
+    )
+    pdf_bytes = cache.get(key)
+
+    if pdf_bytes is None:
+        pdf_bytes = render_quote_pdf(quote)
+        cache.set(key, pdf_bytes, timeout=PDF_TIMEOUT)
+
+    return pdf_bytes
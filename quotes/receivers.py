@@ -0,0 +1,192 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .models import Quote, QuoteLine, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter, QuoteEvent, ApprovalRule, QuoteEmail
+from .signals import quote_status_changed, quote_total_changed, quotes_bulk_status_changed
+from .dashboard import bump_dashboard_version
+from taskqueue.registry import enqueue_on_commit
+from bitquotes.generations import bump_generation
+
+
+@receiver(quote_status_changed, dispatch_uid="quotes_record_event")
+def record_event(sender, quote, old_status, new_status, user=None, **kwargs):
+    QuoteEvent.objects.create(
+        quote=quote,
+        type=QuoteEvent.type_for(old_status, new_status),
+        old_status=old_status or "",
+        new_status=new_status,
+        amount=quote.cached_total,
+        user=user,
+    )
+
+
+@receiver(quote_status_changed, dispatch_uid="quotes_update_customer_stats")
+def update_customer_stats(sender, quote, old_status, new_status, **kwargs):
+    counts = {new_status: 1}
+    if old_status:
+        counts[old_status] = -1
+
+    won_total = quote.cached_total if new_status == Quote.Status.WON else 0
+    last_quote_at = quote.created if old_status is None else None
+
+    CustomerQuoteStats.apply(quote.customer_id, counts, won_total=won_total, last_quote_at=last_quote_at)
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="quotes_move_customer_stats_on_reassign")
+def move_customer_stats_on_reassign(sender, instance, created, **kwargs):
+    old_customer_id = getattr(instance, "_loaded_owner", (None, None))[0]
+    if not created and old_customer_id and old_customer_id != instance.customer_id:
+        CustomerQuoteStats.add_quote(instance, old_customer_id, sign=-1)
+        CustomerQuoteStats.add_quote(instance, instance.customer_id)
+
+
+@receiver(post_delete, sender=Quote, dispatch_uid="quotes_update_customer_stats_on_delete")
+def update_customer_stats_on_delete(sender, instance, **kwargs):
+    CustomerQuoteStats.add_quote(instance, instance.customer_id, sign=-1)
+
+
+def _apply_pipeline(quote, user_id, sign):
+    PipelineCounter.apply(user_id, quote.status, count=sign, amount=sign * quote.cached_total)
+    if quote.status == Quote.Status.WON and quote.won_at:
+        MonthlyWonCounter.apply(user_id, MonthlyWonCounter.month_of(quote.won_at), count=sign, amount=sign * quote.cached_total)
+    bump_dashboard_version(user_id)
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="quotes_move_pipeline_counters_on_reassign")
+def move_pipeline_counters_on_reassign(sender, instance, created, **kwargs):
+    old_user_id = getattr(instance, "_loaded_owner", (None, None))[1]
+    if not created and old_user_id and old_user_id != instance.user_id:
+        _apply_pipeline(instance, old_user_id, -1)
+        _apply_pipeline(instance, instance.user_id, 1)
+
+
+@receiver(post_delete, sender=Quote, dispatch_uid="quotes_update_pipeline_counters_on_delete")
+def update_pipeline_counters_on_delete(sender, instance, **kwargs):
+    _apply_pipeline(instance, instance.user_id, -1)
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="quotes_remember_loaded_owner")
+def remember_loaded_owner(sender, instance, **kwargs):
+    # Conectado después de los que comparan con el valor leído
+    instance._loaded_owner = (instance.customer_id, instance.user_id)
+
+
+@receiver(quote_status_changed, dispatch_uid="quotes_update_pipeline_counters")
+def update_pipeline_counters(sender, quote, old_status, new_status, **kwargs):
+    if old_status:
+        PipelineCounter.apply(quote.user_id, old_status, count=-1, amount=-quote.cached_total)
+
+    PipelineCounter.apply(quote.user_id, new_status, count=1, amount=quote.cached_total)
+
+    if new_status == Quote.Status.WON and quote.won_at:
+        MonthlyWonCounter.apply(quote.user_id, MonthlyWonCounter.month_of(quote.won_at), count=1, amount=quote.cached_total)
+
+
+@receiver(quote_total_changed, dispatch_uid="quotes_update_pipeline_amount")
+def update_pipeline_amount(sender, quote, old_total, new_total, **kwargs):
+    PipelineCounter.apply(quote.user_id, quote.status, amount=new_total - old_total)
+
+
+@receiver(quote_status_changed, dispatch_uid="quotes_invalidate_dashboard_on_status")
+@receiver(quote_total_changed, dispatch_uid="quotes_invalidate_dashboard_on_total")
+def invalidate_dashboard(sender, quote, **kwargs):
+    bump_dashboard_version(quote.user_id)
+
+
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_record_events")
+def bulk_record_events(sender, quotes, new_status, user=None, **kwargs):
+    now = timezone.now()
+    QuoteEvent.objects.bulk_create([
+        QuoteEvent(
+            quote_id=quote["pk"],
+            type=QuoteEvent.type_for(quote["status"], new_status),
+            old_status=quote["status"],
+            new_status=new_status,
+            amount=quote["cached_total"],
+            user=user,
+            created=now,
+        )
+        for quote in quotes
+    ])
+
+
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_update_customer_stats")
+def bulk_update_customer_stats(sender, groups, new_status, **kwargs):
+    counts = defaultdict(lambda: defaultdict(int))
+    won_totals = defaultdict(lambda: Decimal("0.00"))
+    for group in groups:
+        customer_counts = counts[group["customer_id"]]
+        customer_counts[group["status"]] -= group["count"]
+        customer_counts[new_status] += group["count"]
+        if new_status == Quote.Status.WON:
+            won_totals[group["customer_id"]] += group["amount"]
+
+    for customer_id, customer_counts in counts.items():
+        CustomerQuoteStats.apply(customer_id, customer_counts, won_total=won_totals[customer_id])
+
+
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_update_pipeline_counters")
+def bulk_update_pipeline_counters(sender, groups, new_status, **kwargs):
+    moved = defaultdict(lambda: [0, Decimal("0.00")])
+    for group in groups:
+        PipelineCounter.apply(group["user_id"], group["status"], count=-group["count"], amount=-group["amount"])
+        moved[group["user_id"]][0] += group["count"]
+        moved[group["user_id"]][1] += group["amount"]
+
+    month = MonthlyWonCounter.month_of(timezone.now())
+    for user_id, (count, amount) in moved.items():
+        PipelineCounter.apply(user_id, new_status, count=count, amount=amount)
+        if new_status == Quote.Status.WON:
+            MonthlyWonCounter.apply(user_id, month, count=count, amount=amount)
+
+
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_invalidate_dashboard")
+def bulk_invalidate_dashboard(sender, groups, **kwargs):
+    for user_id in {group["user_id"] for group in groups}:
+        bump_dashboard_version(user_id)
+
+
+@receiver(post_save, sender=ApprovalRule, dispatch_uid="quotes_invalidate_approval_rules_on_save")
+@receiver(post_delete, sender=ApprovalRule, dispatch_uid="quotes_invalidate_approval_rules_on_delete")
+def invalidate_approval_rules(sender, **kwargs):
+    ApprovalRule.bump_version()
+    # Las cotizaciones en aprobación pendiente se revisan con las reglas nuevas
+    enqueue_on_commit("quotes.reevaluate_approvals", priority=5, unique=True)
+
+
+@receiver(quote_status_changed, dispatch_uid="quotes_enqueue_email")
+def enqueue_email(sender, quote, old_status, new_status, user=None, **kwargs):
+    # Solo se agrega al outbox; el comando send_outbox lo envía con el PDF
+    if new_status == Quote.Status.SENT:
+        QuoteEmail.build_for(quote, user=user).save()
+        enqueue_on_commit("quotes.send_outbox", priority=10, unique=True)
+
+
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_enqueue_emails")
+def bulk_enqueue_emails(sender, quotes, new_status, user=None, **kwargs):
+    if new_status != Quote.Status.SENT:
+        return
+
+    sent = Quote.objects.filter(pk__in=[quote["pk"] for quote in quotes]).select_related("customer", "contact", "user")
+    QuoteEmail.objects.bulk_create([QuoteEmail.build_for(quote, user=user) for quote in sent])
+    enqueue_on_commit("quotes.send_outbox", priority=10, unique=True)
+
+
+@receiver(post_save, sender=Quote, dispatch_uid="quotes_bump_quote_generation_on_save")
+@receiver(post_delete, sender=Quote, dispatch_uid="quotes_bump_quote_generation_on_delete")
+@receiver(quote_status_changed, dispatch_uid="quotes_bump_quote_generation_on_status")
+@receiver(quote_total_changed, dispatch_uid="quotes_bump_quote_generation_on_total")
+@receiver(quotes_bulk_status_changed, dispatch_uid="quotes_bulk_bump_quote_generation")
+def bump_quote_generation(sender, **kwargs):
+    # Las transiciones y refresh_total usan UPDATE directo (sin post_save)
+    bump_generation(Quote)
+
+
+@receiver(post_save, sender=QuoteLine, dispatch_uid="quotes_bump_line_generation_on_save")
+@receiver(post_delete, sender=QuoteLine, dispatch_uid="quotes_bump_line_generation_on_delete")
+def bump_line_generation(sender, **kwargs):
+    bump_generation(QuoteLine)
@@ -0,0 +1,96 @@
+"""
+Reconstrucción de cached_total y de los resúmenes que dependen de él
+(CustomerQuoteStats, PipelineCounter, MonthlyWonCounter) a partir de las
+cotizaciones.
+
+Las funciones reciben las clases de los modelos: `rebuild_quote_stats` les pasa
+las actuales y la migración 0025 las históricas (apps.get_model), así que solo
+usan campos, no métodos de los modelos.
+"""
+from django.db.models import Count, DateField, Max, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models import Quote as CurrentQuote, CustomerQuoteStats as CurrentCustomerQuoteStats, lines_total
+
+STATUS_FIELDS = CurrentCustomerQuoteStats.STATUS_FIELDS
+WON = CurrentQuote.Status.WON
+
+
+def refresh_totals(Quote, chunk_size=500):
+    """Recalcula cached_total; solo escribe las cotizaciones cuyo total cambió."""
+    # El total se calcula en Python (redondeo por línea), así que se recorre por bloques
+    changed = []
+    updated = 0
+    quotes = Quote.objects.prefetch_related("quote_lines").order_by("pk")
+    for quote in quotes.iterator(chunk_size=chunk_size):
+        total = lines_total(quote.quote_lines.all())
+        if total != quote.cached_total:
+            quote.cached_total = total
+            changed.append(quote)
+        if len(changed) >= chunk_size:
+            updated += Quote.objects.bulk_update(changed, ["cached_total"])
+            changed = []
+
+    if changed:
+        updated += Quote.objects.bulk_update(changed, ["cached_total"])
+    return updated
+
+
+def build_customer_stats(Quote, CustomerQuoteStats):
+    rows = (
+        Quote.objects
+        .order_by()
+        .values("customer_id")
+        .annotate(
+            last_quote_at=Max("created"),
+            won_total=Sum("cached_total", filter=Q(status=WON), default=0),
+            **{field: Count("pk", filter=Q(status=status)) for status, field in STATUS_FIELDS.items()},
+        )
+    )
+    return [
+        CustomerQuoteStats(
+            customer_id=row["customer_id"],
+            last_quote_at=row["last_quote_at"],
+            won_total=row["won_total"],
+            **{field: row[field] for field in STATUS_FIELDS.values()},
+        )
+        for row in rows
+    ]
+
+
+def build_pipeline_counters(Quote, PipelineCounter):
+    rows = (
+        Quote.objects
+        .order_by()
+        .values("user_id", "status")
+        .annotate(count=Count("pk"), amount=Sum("cached_total"))
+    )
+    return [PipelineCounter(**row) for row in rows]
+
+
+def build_monthly_won_counters(Quote, MonthlyWonCounter):
+    rows = (
+        Quote.objects
+        .filter(status=WON, won_at__isnull=False)
+        .order_by()
+        .annotate(month=TruncMonth("won_at", output_field=DateField()))
+        .values("user_id", "month")
+        .annotate(count=Count("pk"), amount=Sum("cached_total"))
+    )
+    return [MonthlyWonCounter(**row) for row in rows]
+
+
+def rebuild_rollups(Quote, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter, chunk_size=500):
+    """Reemplaza los tres resúmenes; llamar dentro de una transacción. Regresa cuántas filas escribió de cada uno."""
+    stats = build_customer_stats(Quote, CustomerQuoteStats)
+    pipeline = build_pipeline_counters(Quote, PipelineCounter)
+    monthly = build_monthly_won_counters(Quote, MonthlyWonCounter)
+
+    CustomerQuoteStats.objects.all().delete()
+    CustomerQuoteStats.objects.bulk_create(stats, batch_size=chunk_size)
+    PipelineCounter.objects.all().delete()
+    PipelineCounter.objects.bulk_create(pipeline, batch_size=chunk_size)
+    MonthlyWonCounter.objects.all().delete()
+    MonthlyWonCounter.objects.bulk_create(monthly, batch_size=chunk_size)
+
+    return len(stats), len(pipeline), len(monthly)
@@ -0,0 +1,16 @@
+from django.dispatch import Signal
+
+# Se envía cada vez que una cotización cambia de estatus (incluida su creación,
+# con old_status=None). Argumentos: quote, old_status, new_status, user.
+quote_status_changed = Signal()
+
+# Se envía cuando cambia el total guardado de una cotización (Quote.refresh_total).
+# Argumentos: quote, old_total, new_total.
+quote_total_changed = Signal()
+
+# Se envía cuando un grupo de cotizaciones cambia de estatus con un solo UPDATE
+# (QuoteQuerySet.bulk_transition). Argumentos: groups, quotes, new_status, user;
+# cada grupo es un dict con user_id, customer_id, status (anterior), count y
+# amount; quotes trae un dict por cotización (pk, user_id, customer_id, status
+# anterior, cached_total).
+quotes_bulk_status_changed = Signal()
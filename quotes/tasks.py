@@ -0,0 +1,43 @@
+"""
+Tareas en segundo plano de cotizaciones (ver taskqueue).
+
+expire_quotes y snapshot_pipeline son periódicas (diarias): `runworker` las
+programa al arrancar y cada ejecución programa la siguiente. reevaluate_approvals
+se encola al cambiar una regla de aprobación (quotes/receivers.py).
+"""
+from datetime import timedelta
+
+from django.core.management import call_command
+from django.db.models import Min
+
+from taskqueue.registry import enqueue, task
+
+from . import outbox
+from .models import QuoteEmail
+
+
+# Vacía todo el outbox en una corrida: más tiempo de reserva que el default
+@task("quotes.send_outbox", priority=10, lease_seconds=15 * 60)
+def send_outbox():
+    while any(outbox.drain()):
+        pass
+
+    # Reintentos con espera: programar la siguiente pasada para el más próximo
+    next_attempt = QuoteEmail.objects.filter(status=QuoteEmail.Status.PENDING).aggregate(Min("next_attempt_at"))["next_attempt_at__min"]
+    if next_attempt:
+        enqueue("quotes.send_outbox", priority=10, run_at=next_attempt, unique=True)
+
+
+@task("quotes.expire_quotes", priority=5, every=timedelta(days=1))
+def expire_quotes():
+    call_command("expire_quotes")
+
+
+@task("quotes.snapshot_pipeline", every=timedelta(days=1))
+def snapshot_pipeline():
+    call_command("snapshot_pipeline")
+
+
+@task("quotes.reevaluate_approvals", priority=5)
+def reevaluate_approvals():
+    call_command("reevaluate_approvals")
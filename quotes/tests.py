@@ -1,3 +1,758 @@
-from django.test import TestCase
+import os
+import re
+import smtplib
+import subprocess
+import sys
+import unittest
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends import locmem
+from django.db import connection, transaction
+from django.template import TemplateSyntaxError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.models import Category, Product
+from customers.models import Customer, Contact
+from bitquotes.nplusone import track_queries
+from taskqueue import worker
+from taskqueue.models import Task
+from users.models import CustomUser, Profile
+from . import events, outbox, pdf, rollups
+from .models import Quote, QuoteComment, QuoteEvent, QuoteEmail, ApprovalRule, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter
+
+
+class StartupImportTimeTests(SimpleTestCase):
+    """
+    Costo de arranque de un proceso: django.setup() más cargar el URLconf,
+    medido con `python -X importtime` en un proceso aparte (en este ya está todo
+    importado). Falla si se importa algo pesado que solo se usa en una vista
+    (WeasyPrint) o, si se pide, si pasa del presupuesto.
+
+    El presupuesto es tiempo de reloj y depende de la máquina y de su carga, así
+    que solo se revisa con IMPORT_BUDGET_MS definido (en ms), p. ej. en una
+    máquina de referencia:
+
+        IMPORT_BUDGET_MS=750 python manage.py test quotes.tests.StartupImportTimeTests
+    """
+    BUDGET_MS = os.environ.get("IMPORT_BUDGET_MS")
+    DEFERRED_MODULES = ("weasyprint",)
+
+    SCRIPT = (
+        "import django; django.setup(); "
+        "from django.urls import get_resolver; get_resolver().url_patterns"
+    )
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        env = {**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE}
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", cls.SCRIPT],
+            cwd=settings.BASE_DIR,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        cls.imports = cls.parse_importtime(result.stderr)
+
+    @staticmethod
+    def parse_importtime(output):
+        """[(módulo, acumulado en µs, es de primer nivel)] de la salida de -X importtime."""
+        imports = []
+        for line in output.splitlines():
+            if not line.startswith("import time:") or "self [us]" in line:
+                continue
+            _, cumulative, name = line[len("import time:"):].split("|")
+            # Los módulos importados por otro van con sangría extra
+            imports.append((name.strip(), int(cumulative), not name.startswith("  ")))
+        return imports
+
+    @unittest.skipUnless(BUDGET_MS, "define IMPORT_BUDGET_MS para medir el tiempo de arranque")
+    def test_setup_and_urlconf_within_budget(self):
+        budget_ms = int(self.BUDGET_MS)
+        total_ms = sum(cumulative for _, cumulative, top_level in self.imports if top_level) / 1000
+        slowest = sorted(self.imports, key=lambda row: row[1], reverse=True)[:10]
+
+        self.assertLessEqual(
+            total_ms,
+            budget_ms,
+            f"Importar al arrancar tomó {total_ms:.0f} ms (presupuesto {budget_ms} ms). "
+            f"Más lentos: {', '.join(f'{name} {cumulative // 1000} ms' for name, cumulative, _ in slowest)}",
+        )
+
+    def test_heavy_modules_are_deferred(self):
+        imported = {name.split(".")[0] for name, _, _ in self.imports}
+        for module in self.DEFERRED_MODULES:
+            self.assertFalse(module in imported, f"{module} se importa al arrancar; debe importarse en el primer uso")
+
+
+def create_user(username, role):
+    user = CustomUser.objects.create_user(username=username, password="x", first_name=username.title(), last_name="Prueba", email=f"{username}@example.com")
+    Profile.objects.create(user=user, role=role, phone="8112345678", cel_phone="8112345678", position="Ventas")
+    return user
+
+
+def create_quotes(user, customer, contact, products, count=1):
+    """Cotizaciones con una línea por producto y un comentario."""
+    quotes = []
+    for _ in range(count):
+        quote = Quote.objects.create(customer=customer, contact=contact, user=user, created_by=user, updated_by=user)
+        for product in products:
+            quote.add_product(product, 2, 0, 5)
+        quote.refresh_total()
+        QuoteComment.objects.create(quote=quote, user=user, comment="Comentario")
+        quotes.append(quote)
+    return quotes
+
+
+@override_settings(SERVER_TIMING=False)
+class HotQueryPlanTests(TestCase):
+    """
+    Corre EXPLAIN sobre cada consulta de las vistas más usadas (lista, detalle,
+    búsquedas, contactos para cotización, dashboard) y falla si alguna recorre
+    una de las tablas que crecen. Se capturan las consultas reales de las
+    vistas, así que también detecta consultas nuevas sin índice.
+
+    En SQLite solo pasan los pasos SEARCH (búsqueda en un índice); cualquier
+    SCAN de esas tablas falla, también "SCAN tabla USING [COVERING] INDEX", que
+    lee el índice completo. Las excepciones van por request en hot_requests():
+    recorrer un índice en orden hasta el LIMIT (nunca la tabla sin índice). En
+    PostgreSQL se desactiva el Seq Scan para ver si existe un índice utilizable
+    (con tablas de prueba tan chicas lo elegiría siempre).
+    """
+    LARGE_TABLES = {
+        "quotes_quote",
+        "quotes_quoteline",
+        "quotes_quotesection",
+        "quotes_quotecomment",
+        "quotes_quoteevent",
+        "customers_customer",
+        "customers_contact",
+        "catalog_product",
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = create_user("ventas", Profile.Role.SALES)
+        cls.manager = create_user("gerente", Profile.Role.MANAGER)
+        category = Category.objects.create(name="Equipos")
+        cls.products = [
+            Product.objects.create(sku=f"P{n}", name=f"Producto {n}", slug=f"producto-{n}", price=Decimal("100.00"), category=category, product_type=product_type)
+            for n, product_type in enumerate([Product.ProductType.EQUIPO, Product.ProductType.CONSUMIBLE])
+        ]
+        cls.customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA", assigned_to=cls.sales)
+        cls.contact = Contact.objects.create(customer=cls.customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.quote = create_quotes(cls.sales, cls.customer, cls.contact, cls.products, count=3)[0]
+
+    def setUp(self):
+        cache.clear()
+
+    def hot_requests(self):
+        """(usuario, url, tablas que la request puede recorrer por un índice)."""
+        return [
+            (self.sales, reverse("quotes:quote_list"), set()),
+            # Lista sin filtro: la página sale del índice (-created) hasta el LIMIT y
+            # el paginador cuenta la tabla completa (COUNT sobre el mismo índice)
+            (self.manager, reverse("quotes:quote_list"), {"quotes_quote"}),
+            (self.sales, reverse("quotes:quote_list_customer", args=[self.customer.slug]), set()),
+            (self.sales, reverse("quotes:quote_detail", args=[self.quote.pk]), set()),
+            # Búsquedas "contiene" (LIKE '%...%'): ningún índice busca por ellas; se
+            # recorre el índice de name en orden hasta juntar el LIMIT
+            (self.sales, reverse("quotes:product_search_htmx") + "?product_search=prod", {"catalog_product"}),
+            (self.sales, reverse("customers:customer_search_htmx") + "?search=ac", {"customers_customer"}),
+            (self.sales, reverse("customers:contacts_for_quote", args=[self.customer.pk]), set()),
+            *[
+                (user, reverse("quotes:dashboard_card_htmx", args=[card]) + f"?scope={scope}", set())
+                for user in (self.sales, self.manager)
+                for card in ("open", "won", "trend", "recent")
+                for scope in ("mine", "all")
+            ],
+        ]
+
+    def explain(self, sql):
+        with connection.cursor() as cursor:
+            if connection.vendor == "postgresql":
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("EXPLAIN " + sql)
+                plan = [row[0] for row in cursor.fetchall()]
+                cursor.execute("SET LOCAL enable_seqscan = on")
+                return plan, [(m.group(1), False) for line in plan if (m := re.search(r"Seq Scan on (\w+)", line))]
+
+            cursor.execute("EXPLAIN QUERY PLAN " + sql)
+            plan = [row[-1] for row in cursor.fetchall()]
+
+        # Las subconsultas usan alias (U0, T3...)
+        aliases = dict((alias, table) for table, alias in re.findall(r'"(\w+)" (\w+)', sql))
+        scans = []
+        for line in plan:
+            match = re.match(r"SCAN (\w+)", line)
+            if match:
+                scans.append((aliases.get(match.group(1), match.group(1)), "USING" in line))
+        return plan, scans
+
+    def test_hot_queries_use_indexes(self):
+        for user, url, index_walks in self.hot_requests():
+            self.client.force_login(user)
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, url)
+
+            for query in queries.captured_queries:
+                sql = query["sql"]
+                if not sql.lstrip().upper().startswith("SELECT"):
+                    continue
+                plan, scans = self.explain(sql)
+                full_scans = {
+                    table for table, by_index in scans
+                    if table in self.LARGE_TABLES and not (by_index and table in index_walks)
+                }
+                with self.subTest(url=url, user=user.username, sql=sql[:120]):
+                    self.assertFalse(full_scans, f"Recorre {', '.join(sorted(full_scans))}:\n{sql}\n" + "\n".join(plan))
+
+    def test_expire_query_uses_status_valid_until_index(self):
+        # La misma consulta que expire_quotes; basta el índice (status, valid_until)
+        due = Quote.objects.filter(status__in=Quote.OPEN_STATUSES, valid_until__lt=timezone.localdate())
+        with CaptureQueriesContext(connection) as queries:
+            list(due.order_by("pk").values_list("pk", flat=True)[:500])
+
+        plan, scans = self.explain(queries.captured_queries[0]["sql"])
+        self.assertNotIn("quotes_quote", [table for table, _ in scans], "\n".join(plan))
+
+
+@override_settings(SERVER_TIMING=False)
+class QueryBudgetTests(TestCase):
+    """
+    Cada vista debe hacer el mismo número de consultas con pocos datos que con
+    muchos: si crece con las filas hay un N+1. Se siembra el mismo escenario con
+    SMALL y con LARGE productos, clientes, cotizaciones, líneas y comentarios,
+    se recorren las vistas en el mismo orden (los caches se llenan igual) y se
+    comparan los conteos. Al fallar muestra las consultas repetidas y la línea
+    de plantilla o de código que las genera (bitquotes.nplusone).
+
+    El PDF no se incluye: el número de secciones es fijo y su costo lo cubre el
+    cache de fragmentos.
+    """
+    SMALL = 2
+    LARGE = 12
+
+    def seed(self, size):
+        sales = create_user("ventas", Profile.Role.SALES)
+        manager = create_user("gerente", Profile.Role.MANAGER)
+        category = Category.objects.create(name="Equipos")
+        products = [
+            Product.objects.create(sku=f"P{n}", name=f"Producto {n}", slug=f"producto-{n}", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+            for n in range(size)
+        ]
+        products[0].related_product.set(products[1:])
+
+        quotes = []
+        for n in range(size):
+            customer = Customer.objects.create(name=f"Cliente {n}", slug=f"cliente-{n}", rfc=f"AAA0101{n + 1:02d}AAA", assigned_to=sales)
+            contact = Contact.objects.create(customer=customer, first_name="Ana", last_name=f"López {n}", email=f"ana{n}@example.com")
+            Contact.objects.create(customer=customer, first_name="Luis", last_name=f"Pérez {n}", email=f"luis{n}@example.com")
+            quotes += create_quotes(sales, customer, contact, products)
+
+        # Cotización del detalle: `size` líneas y `size` comentarios
+        quote = quotes[0]
+        for _ in range(size - 1):
+            QuoteComment.objects.create(quote=quote, user=manager, comment="Otro comentario")
+
+        return sales, manager, quote, products[0]
+
+    def requests(self, sales, manager, quote, product):
+        customer = quote.customer
+        htmx = {"HTTP_HX_REQUEST": "true"}
+        return [
+            ("dashboard", manager, reverse("quotes:dashboard"), {}),
+            *[
+                (f"dashboard {card} {scope}", manager, reverse("quotes:dashboard_card_htmx", args=[card]) + f"?scope={scope}", {})
+                for card in ("open", "won", "trend", "recent")
+                for scope in ("mine", "all")
+            ],
+            ("lista (vendedor)", sales, reverse("quotes:quote_list"), {}),
+            ("lista (gerente)", manager, reverse("quotes:quote_list"), {}),
+            ("lista por cliente", manager, reverse("quotes:quote_list_customer", args=[customer.slug]), {}),
+            ("detalle", sales, reverse("quotes:quote_detail", args=[quote.pk]), {}),
+            ("editar", sales, reverse("quotes:quote_edit", args=[quote.pk]), {}),
+            ("buscar producto", sales, reverse("quotes:product_search_htmx") + "?product_search=prod", {}),
+            ("productos relacionados", sales, reverse("quotes:related_products", args=[product.pk]), {}),
+            ("vendedores", manager, reverse("quotes:load_users_htmx"), {}),
+            ("clientes", manager, reverse("customers:customer_list"), {}),
+            ("clientes (parcial)", manager, reverse("customers:customer_list_partial"), htmx),
+            ("buscar cliente", sales, reverse("customers:customer_search_htmx") + "?search=cliente", {}),
+            ("detalle de cliente", manager, reverse("customers:customer_detail", args=[customer.slug]), {}),
+            ("contactos para cotización", sales, reverse("customers:contacts_for_quote", args=[customer.pk]), {}),
+            ("fila de cliente", manager, reverse("customers:customer_row_readonly", args=[customer.pk]), htmx),
+            ("fila de cliente (edición)", manager, reverse("customers:customer_row_partial", args=[customer.pk]), htmx),
+        ]
+
+    def measure(self, size):
+        """{vista: (consultas, repetidas)} con el escenario de `size` sembrado; se deshace al final."""
+        results = {}
+        with transaction.atomic():
+            cache.clear()
+            fixtures = self.seed(size)
+            for label, user, url, headers in self.requests(*fixtures):
+                self.client.force_login(user)
+                with track_queries() as tracker:
+                    response = self.client.get(url, **headers)
+                self.assertEqual(response.status_code, 200, f"{label}: {url}")
+                results[label] = (tracker.count, tracker.repeated())
+            transaction.set_rollback(True)
+        cache.clear()
+        return results
+
+    def test_query_count_does_not_grow_with_rows(self):
+        small = self.measure(self.SMALL)
+        large = self.measure(self.LARGE)
+
+        for label, (count, repeated) in large.items():
+            with self.subTest(view=label):
+                self.assertEqual(
+                    count,
+                    small[label][0],
+                    f"{label}: {small[label][0]} consultas con {self.SMALL} filas, {count} con {self.LARGE}. Repetidas:\n"
+                    + "\n".join(f"  {times}x {origin}: {shape[:150]}" for shape, times, origin in repeated),
+                )
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("ventas", Profile.Role.SALES)
+        customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA", assigned_to=cls.user)
+        contact = Contact.objects.create(customer=customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        cls.quote = create_quotes(cls.user, customer, contact, [product])[0]
+        cls.staff = create_user("gerente", Profile.Role.MANAGER)
+        cls.staff.is_staff = True
+        cls.staff.save()
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_header_and_log_line(self):
+        self.client.force_login(self.staff)
+        url = reverse("quotes:quote_detail", args=[self.quote.pk])
+        with self.assertLogs("bitquotes.timing", "INFO") as logs:
+            response = self.client.get(url)
+
+        header = response["Server-Timing"]
+        for metric in ("db;dur=", "tpl;dur=", "cache;dur=", "total;dur="):
+            self.assertIn(metric, header)
+
+        record = logs.records[-1]
+        self.assertIn(f"ruta={url}", record.getMessage())
+        self.assertGreater(record.timings["db_queries"], 0)
+        self.assertEqual(record.timings["db_queries"], int(re.search(r'db;dur=[\d.]+;desc="SQL \((\d+)\)"', header).group(1)))
+
+    def test_no_header_for_other_users(self):
+        with self.assertLogs("bitquotes.timing", "INFO") as logs:
+            response = self.client.get(reverse("quotes:quote_list"))
+        self.assertNotIn("Server-Timing", response)
+        self.assertIn("total_ms=", logs.records[-1].getMessage())
+
+        self.client.logout()
+        self.assertNotIn("Server-Timing", self.client.get(reverse("users:login")))
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header_for_everyone(self):
+        response = self.client.get(reverse("quotes:quote_list"))
+        self.assertIn("total;dur=", response["Server-Timing"])
+
+    @override_settings(SERVER_TIMING=False)
+    def test_disabled(self):
+        response = self.client.get(reverse("quotes:quote_list"))
+        self.assertNotIn("Server-Timing", response)
+
+
+class CustomerQuoteStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        cls.product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        cls.acme = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        cls.globex = Customer.objects.create(name="Globex", slug="globex", rfc="BBB010101BBB")
+        cls.acme_contact = Contact.objects.create(customer=cls.acme, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.globex_contact = Contact.objects.create(customer=cls.globex, first_name="Luis", last_name="Pérez", email="luis@globex.com")
+
+    def stats(self, customer):
+        return CustomerQuoteStats.objects.get(customer=customer)
+
+    def test_delete(self):
+        older, newer = create_quotes(self.user, self.acme, self.acme_contact, [self.product], count=2)
+        newer.delete()
+
+        stats = self.stats(self.acme)
+        self.assertEqual(stats.draft_count, 1)
+        self.assertEqual(stats.last_quote_at, older.created)
+
+    def test_change_customer(self):
+        quote = create_quotes(self.user, self.acme, self.acme_contact, [self.product])[0]
+        quote.approve(user=self.user)
+        quote.mark_sent(user=self.user)
+        self.assertTrue(quote.mark_won(user=self.user))
+
+        quote = Quote.objects.get(pk=quote.pk)
+        quote.customer = self.globex
+        quote.contact = self.globex_contact
+        quote.save()
+
+        acme, globex = self.stats(self.acme), self.stats(self.globex)
+        self.assertEqual((acme.won_count, acme.won_total, acme.last_quote_at), (0, 0, None))
+        self.assertEqual((globex.won_count, globex.won_total), (1, quote.cached_total))
+        self.assertEqual(globex.last_quote_at, quote.created)
+
+
+class CachedTotalBackfillTests(TestCase):
+    """La migración 0025 y rebuild_quote_stats usan quotes.rollups."""
+
+    def test_rebuild_from_lines(self):
+        user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        contact = Contact.objects.create(customer=customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        quote = create_quotes(user, customer, contact, [product])[0]
+        expected = quote.cached_total
+
+        # Como quedaron las cotizaciones anteriores a 0017
+        Quote.objects.update(cached_total=0)
+        PipelineCounter.objects.all().delete()
+        CustomerQuoteStats.objects.all().delete()
+
+        self.assertEqual(rollups.refresh_totals(Quote), 1)
+        rollups.rebuild_rollups(Quote, CustomerQuoteStats, PipelineCounter, MonthlyWonCounter)
+
+        quote.refresh_from_db()
+        self.assertEqual(quote.cached_total, expected)
+        self.assertEqual(quote.cached_total, quote.total)
+        counter = PipelineCounter.objects.get(user=user, status=Quote.Status.DRAFT)
+        self.assertEqual((counter.count, counter.amount), (1, expected))
+        self.assertEqual(CustomerQuoteStats.objects.get(customer=customer).draft_count, 1)
+
+
+class AdminBulkActionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = create_user("ventas", Profile.Role.SALES)
+        cls.manager = create_user("gerente", Profile.Role.MANAGER)
+        CustomUser.objects.filter(pk__in=[cls.sales.pk, cls.manager.pk]).update(is_staff=True, is_superuser=True)
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        contact = Contact.objects.create(customer=customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.quote = create_quotes(cls.sales, customer, contact, [product])[0]
+        Quote.objects.filter(pk=cls.quote.pk).update(status=Quote.Status.PENDING_APPROVAL)
+
+    def approve_as(self, user):
+        self.client.force_login(user)
+        return self.client.post(reverse("admin:quotes_quote_changelist"), {"action": "approve_selected", "_selected_action": [self.quote.pk]})
+
+    def test_staff_without_capability_cannot_approve(self):
+        self.approve_as(self.sales)
+        self.assertEqual(Quote.objects.get(pk=self.quote.pk).status, Quote.Status.PENDING_APPROVAL)
+
+        response = self.client.get(reverse("admin:quotes_quote_changelist"))
+        self.assertNotContains(response, "approve_selected")
+
+    def test_manager_can_approve(self):
+        self.approve_as(self.manager)
+        self.assertEqual(Quote.objects.get(pk=self.quote.pk).status, Quote.Status.APPROVED)
+
+
+class EventConsumerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        contact = Contact.objects.create(customer=customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.quotes = create_quotes(user, customer, contact, [product], count=3)
+
+    def consume(self, **kwargs):
+        seen = []
+        events.consume("prueba", lambda batch: seen.extend(event.pk for event in batch), **kwargs)
+        return seen
+
+    def test_recent_events_wait(self):
+        self.assertEqual(self.consume(), [])
+        self.assertEqual(len(self.consume(settle_delay=timedelta(0))), 3)
+        self.assertEqual(self.consume(settle_delay=timedelta(0)), [])
+
+    def test_stops_at_first_unsettled_event(self):
+        # Un id menor que confirmó tarde (creado después) detiene el cursor ahí
+        first, late, last = QuoteEvent.objects.order_by("pk")
+        old = timezone.now() - timedelta(minutes=5)
+        QuoteEvent.objects.filter(pk__in=[first.pk, last.pk]).update(created=old)
+
+        self.assertEqual(self.consume(), [first.pk])
+        QuoteEvent.objects.filter(pk=late.pk).update(created=old)
+        self.assertEqual(self.consume(), [late.pk, last.pk])
+
+
+class FailingEmailBackend(locmem.EmailBackend):
+    def send_messages(self, messages):
+        raise smtplib.SMTPRecipientsRefused({})
+
+
+@mock.patch("quotes.outbox.quote_pdf", return_value=b"%PDF-1.4 prueba")
+class OutboxTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        cls.product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        cls.customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        cls.contact = Contact.objects.create(customer=cls.customer, first_name="Ana", last_name="López", email="ana@acme.com")
+
+    def send_quote(self):
+        quote = create_quotes(self.user, self.customer, self.contact, [self.product])[0]
+        quote.approve(user=self.user)
+        self.assertTrue(quote.mark_sent(user=self.user))
+        return quote
+
+    def test_send(self, quote_pdf):
+        quote = self.send_quote()
+
+        self.assertEqual(outbox.drain(connection=mail.get_connection()), (1, 0))
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["ana@acme.com"])
+        self.assertEqual(len(mail.outbox[0].attachments), 1)
+        email = quote.emails.get()
+        self.assertEqual((email.status, email.attempts), (QuoteEmail.Status.SENT, 1))
+        self.assertEqual(outbox.drain(connection=mail.get_connection()), (0, 0))
+
+    def test_retry(self, quote_pdf):
+        quote = self.send_quote()
+
+        with self.assertLogs("quotes.outbox", "WARNING"):
+            self.assertEqual(outbox.drain(connection=FailingEmailBackend()), (0, 1))
+        email = quote.emails.get()
+        self.assertEqual((email.status, email.attempts), (QuoteEmail.Status.PENDING, 1))
+        self.assertGreater(email.next_attempt_at, timezone.now())
+        # Antes de la espera no se vuelve a intentar
+        self.assertEqual(outbox.drain(connection=mail.get_connection()), (0, 0))
+
+        QuoteEmail.objects.filter(pk=email.pk).update(next_attempt_at=timezone.now())
+        self.assertEqual(outbox.drain(connection=mail.get_connection()), (1, 0))
+        email.refresh_from_db()
+        self.assertEqual((email.status, email.attempts), (QuoteEmail.Status.SENT, 2))
+
+    def test_render_error_fails_without_retry(self, quote_pdf):
+        quote = self.send_quote()
+        quote_pdf.side_effect = TemplateSyntaxError("plantilla rota")
+
+        with self.assertLogs("quotes.outbox", "ERROR"):
+            self.assertEqual(outbox.drain(connection=mail.get_connection()), (0, 1))
+        email = quote.emails.get()
+        self.assertEqual((email.status, email.attempts), (QuoteEmail.Status.FAILED, 1))
+        self.assertIn("plantilla rota", email.last_error)
+        self.assertEqual(mail.outbox, [])
+
+    def test_double_claim(self, quote_pdf):
+        self.send_quote()
+
+        claimed = outbox.claim(10)
+        self.assertEqual(len(claimed), 1)
+        self.assertEqual(outbox.claim(10), [])
+
+        # La reserva vence (worker caído): otro worker la toma y el primero ya no envía
+        QuoteEmail.objects.update(claimed_until=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(len(outbox.claim(10)), 1)
+        self.assertFalse(outbox.extend_lease(claimed[0]))
+
+    def test_status_and_outbox_in_one_transaction(self, quote_pdf):
+        quote = create_quotes(self.user, self.customer, self.contact, [self.product])[0]
+        quote.approve(user=self.user)
+
+        with mock.patch.object(QuoteEmail, "build_for", side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                quote.mark_sent(user=self.user)
+
+        quote.refresh_from_db()
+        self.assertEqual(quote.status, Quote.Status.APPROVED)
+        self.assertFalse(QuoteEmail.objects.exists())
+
+
+class QuotePdfCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        cls.customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        cls.contact = Contact.objects.create(customer=cls.customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.quote = create_quotes(cls.user, cls.customer, cls.contact, [product])[0]
+
+    def setUp(self):
+        cache.clear()
+
+    @mock.patch("quotes.pdf.render_quote_pdf", return_value=b"%PDF-1.4 prueba")
+    def test_regenerated_when_printed_rows_change(self, render):
+        quote = Quote.objects.get(pk=self.quote.pk)
+        pdf.quote_pdf(quote)
+        pdf.quote_pdf(quote)
+        self.assertEqual(render.call_count, 1)
+
+        edits = [
+            (self.customer, "name", "ACME Nuevo"),
+            (self.contact, "last_name", "Ruiz"),
+            (self.user, "first_name", "Luis"),
+            (self.user.profile, "position", "Gerente"),
+        ]
+        for calls, (instance, field, value) in enumerate(edits, start=2):
+            with self.subTest(model=type(instance).__name__):
+                setattr(instance, field, value)
+                instance.save()
+                pdf.quote_pdf(quote)
+                self.assertEqual(render.call_count, calls)
+
+        # El login no cambia nada de lo impreso
+        self.client.force_login(self.user)
+        pdf.quote_pdf(quote)
+        self.assertEqual(render.call_count, len(edits) + 1)
+
+
+class ApprovalRuleTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.sales = create_user("ventas", Profile.Role.SALES)
+        cls.admin = create_user("admin", Profile.Role.MANAGER)
+        CustomUser.objects.filter(pk=cls.admin.pk).update(is_staff=True, is_superuser=True)
+        category = Category.objects.create(name="Equipos")
+        cls.product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        cls.customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        cls.contact = Contact.objects.create(customer=cls.customer, first_name="Ana", last_name="López", email="ana@acme.com")
+
+    def setUp(self):
+        cache.clear()
+
+    def closed_quote(self, *lines):
+        """Cotización cerrada con líneas (descuento, precio unitario)."""
+        quote = Quote.objects.create(customer=self.customer, contact=self.contact, user=self.sales, created_by=self.sales, updated_by=self.sales)
+        for discount, unit_price in lines:
+            quote.add_product(self.product, 1, discount, 5, unit_price=unit_price)
+        quote.refresh_total()
+        quote.close_internal(user=self.sales)
+        return quote
+
+    def status(self, quote):
+        return Quote.objects.get(pk=quote.pk).status
+
+    def set_general_rule(self, **values):
+        # La regla general (rol vacío) la crea la migración 0021 con 9%
+        rule = ApprovalRule.objects.get(role="")
+        for field, value in values.items():
+            setattr(rule, field, value)
+        rule.save()
+
+    def test_with_approval_facts(self):
+        quote = self.closed_quote((5, None), (15, None), (0, Decimal("80.00")))
+
+        facts = Quote.objects.with_approval_facts().values("max_line_discount", "lines_below_catalog", "owner_role").get(pk=quote.pk)
+        self.assertEqual(facts, {"max_line_discount": 15, "lines_below_catalog": 1, "owner_role": Profile.Role.SALES})
+        # Regla por defecto: más de 9% de descuento requiere aprobación
+        self.assertEqual(self.status(quote), Quote.Status.PENDING_APPROVAL)
+
+    def test_reevaluate_after_relaxing_rule(self):
+        cleared = self.closed_quote((15, None))
+        held = self.closed_quote((30, None))
+        self.set_general_rule(max_line_discount=20)
+
+        self.assertEqual(ApprovalRule.reevaluate_pending(), [cleared.pk])
+        self.assertEqual(self.status(cleared), Quote.Status.APPROVED)
+        self.assertEqual(self.status(held), Quote.Status.PENDING_APPROVAL)
+
+    def test_role_rule_replaces_general_rule(self):
+        quote = self.closed_quote((15, None))
+        self.set_general_rule(max_line_discount=20)
+        ApprovalRule.objects.create(role=Profile.Role.SALES, max_line_discount=10)
+
+        self.assertEqual(ApprovalRule.reevaluate_pending(), [])
+        self.assertEqual(self.status(quote), Quote.Status.PENDING_APPROVAL)
+
+    def test_other_limits(self):
+        over_total = self.closed_quote((0, None), (0, None))
+        below_catalog = self.closed_quote((0, Decimal("80.00")))
+        self.set_general_rule(max_total=Decimal("150.00"), below_catalog_price=True)
+        self.assertEqual(self.status(over_total), Quote.Status.APPROVED)
+        Quote.objects.filter(pk__in=[over_total.pk, below_catalog.pk]).update(status=Quote.Status.PENDING_APPROVAL)
+
+        self.assertEqual(ApprovalRule.reevaluate_pending(), [])
+        self.set_general_rule(max_total=None, below_catalog_price=False)
+        self.assertEqual(sorted(ApprovalRule.reevaluate_pending()), sorted([over_total.pk, below_catalog.pk]))
+
+    def test_admin_change_queues_one_reevaluation(self):
+        quote = self.closed_quote((15, None))
+        self.client.force_login(self.admin)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rule = ApprovalRule.objects.get(role="")
+            response = self.client.post(reverse("admin:quotes_approvalrule_change", args=[rule.pk]), {
+                "role": "", "max_line_discount": "20", "max_total": "", "is_active": "on",
+            })
+        self.assertEqual(response.status_code, 302)
+
+        # El admin ya no reevalúa en la request; lo hace la tarea encolada
+        self.assertEqual(self.status(quote), Quote.Status.PENDING_APPROVAL)
+        tasks = Task.objects.filter(name="quotes.reevaluate_approvals", status=Task.Status.QUEUED)
+        self.assertEqual(tasks.count(), 1)
+
+        with self.assertLogs("taskqueue.worker", "INFO"):
+            worker.run(worker.claim("pruebas")[0])
+        self.assertEqual(self.status(quote), Quote.Status.APPROVED)
+
+
+class SectionFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("ventas", Profile.Role.SALES)
+        category = Category.objects.create(name="Equipos")
+        product = Product.objects.create(sku="P1", name="Producto 1", slug="producto-1", price=Decimal("100.00"), category=category, product_type=Product.ProductType.EQUIPO)
+        customer = Customer.objects.create(name="ACME", slug="acme", rfc="AAA010101AAA")
+        contact = Contact.objects.create(customer=customer, first_name="Ana", last_name="López", email="ana@acme.com")
+        cls.quote = create_quotes(cls.user, customer, contact, [product])[0]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_line_edit_on_approved_quote_refreshes_fragment(self):
+        self.quote.approve(user=self.user)
+        url = reverse("quotes:quote_detail", args=[self.quote.pk])
+        self.assertContains(self.client.get(url), "Producto 1")
+
+        # Edición directa de la línea (admin, shell): la sección no cambia de pk
+        line = self.quote.quote_lines.get()
+        line.description = "Producto editado"
+        line.save()
+
+        response = self.client.get(url)
+        self.assertEqual(Quote.objects.get(pk=self.quote.pk).status, Quote.Status.APPROVED)
+        self.assertContains(response, "Producto editado")
+        self.assertNotContains(response, "Producto 1")
+
+    def test_sent_quote_reuses_fragment(self):
+        self.quote.approve(user=self.user)
+        self.quote.mark_sent(user=self.user)
+        section = self.quote.quote_sections.get()
+        version = section.fragment_version
+
+        line = self.quote.quote_lines.get()
+        line.description = "Otra"
+        line.save()
+        self.assertEqual(self.quote.quote_sections.get().fragment_version, version)
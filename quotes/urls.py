@@ -6,6 +6,8 @@ app_name = "quotes"
 
 urlpatterns = [
     path("", views.dashboard, name="dashboard"),
+    path("dashboard/cards/<slug:card>/", views.dashboard_card_htmx, name="dashboard_card_htmx"),
+    path("dashboard/refresh/", views.dashboard_refresh_htmx, name="dashboard_refresh_htmx"),
     path("list/", views.QuoteListView.as_view(), name="quote_list"),
     path("list/<slug:slug>", views.QuoteListView.as_view(), name="quote_list_customer"),
     
@@ -25,6 +27,8 @@ urlpatterns = [
     path("product/<int:pk>/related/", views.related_products, name="related_products"),
 
     path("<int:pk>/comments/add/", views.quote_add_comment, name="quote_add_comment"),
+    path("<int:pk>/comments/more/", views.quote_comments_more_htmx, name="quote_comments_more_htmx"),
+    path("<int:pk>/comments/poll/", views.quote_comments_poll_htmx, name="quote_comments_poll_htmx"),
     path("<int:pk>/approve/", views.quote_approve, name="quote_approve"),
     path("<int:pk>/close_internal/", views.quote_close_internal, name="quote_close_internal"),
     path("<int:pk>/mark_won/", views.quote_mark_won, name="quote_mark_won"),
@@ -5,22 +5,60 @@ from django.contrib.auth.decorators import login_required
 from django.views.generic import ListView, CreateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.urls import reverse
-from django.http import HttpResponse
-from django.db.models import Q
+from django.http import HttpResponse, HttpResponseBadRequest, HttpResponseNotAllowed, HttpResponseNotModified, Http404
+from django.db.models import Count, Exists, Max, OuterRef, Q, Subquery
 from django.contrib import messages
-from django.template.loader import get_template
-from weasyprint import HTML
 
-from .models import Quote, QuoteLine, QuoteSection, QuoteComment
+from .models import Quote, QuoteLine, QuoteSection, QuoteComment, CustomerQuoteStats
+from . import dashboard as dashboard_cards
+from . import comments as quote_comments
+from .pdf import quote_pdf
 from .forms import QuoteHeadForm, QuotePaymentTermsForm, QuoteLineForm, QuoteCommentForm
-from users.models import CustomUser
+from users.directory import active_users
+from bitquotes.conditional import conditional_view
+from bitquotes.replica import replica_reads
 from customers.models import Contact
-from catalog.models import Product
+from catalog.models import Product, RelatedProduct
 from customers.models import Customer
 
+def _dashboard_scope(request):
+    if request.capabilities.can_see_all_quotes and request.GET.get("scope") == "all":
+        return "all"
+    return "mine"
+
+
 @login_required
 def dashboard(request):
-    return render(request, "quotes/dashboard.html")
+    """
+    Solo el esqueleto: cada tarjeta se carga con su propia request HTMX
+    (dashboard_card_htmx), así una tarjeta lenta no bloquea a las demás.
+    """
+    context = {
+        "scope": _dashboard_scope(request),
+        "can_see_all_quotes": request.capabilities.can_see_all_quotes,
+    }
+    return render(request, "quotes/dashboard.html", context)
+
+
+@login_required
+@replica_reads
+def dashboard_card_htmx(request, card):
+    if card not in dashboard_cards.CARDS:
+        raise Http404
+
+    return HttpResponse(dashboard_cards.render_card(request, card, _dashboard_scope(request)))
+
+
+@login_required
+def dashboard_refresh_htmx(request):
+    if request.method != "POST":
+        return HttpResponseNotAllowed(["POST"])
+
+    # Botón "Actualizar": nueva versión del dashboard del usuario y las tarjetas se recargan
+    dashboard_cards.bump_dashboard_version(request.user.pk, all_scope=False)
+    response = HttpResponse(status=204)
+    response["HX-Trigger"] = "dashboard-refresh"
+    return response
 
 
 class QuoteListView(LoginRequiredMixin, ListView):
@@ -31,17 +69,15 @@ class QuoteListView(LoginRequiredMixin, ListView):
     paginate_by = 10
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().select_related("customer", "contact", "user")
         slug = self.kwargs.get("slug")
         if slug:
             queryset = queryset.filter(customer__slug=slug)
 
-        user = self.request.user
-        if not (user.profile.is_csr or user.profile.is_manager):
-            queryset = queryset.filter(user=user)
+        queryset = queryset.visible_to(self.request.user)
 
         selected_user_id = self.request.GET.get("user")
-        if selected_user_id and (user.profile.is_csr or user.profile.is_manager):
+        if selected_user_id and self.request.capabilities.can_see_all_quotes:
             queryset = queryset.filter(user__id=selected_user_id)
 
         return queryset
@@ -49,13 +85,40 @@ class QuoteListView(LoginRequiredMixin, ListView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
 
-        context["users"] = CustomUser.objects.all()
-        context["can_see_all_quotes"] = self.request.user.profile.is_csr or self.request.user.profile.is_manager
+        context["users"] = active_users()
+        context["can_see_all_quotes"] = self.request.capabilities.can_see_all_quotes
+        context["can_bulk_transition"] = self.request.capabilities.can_approve
         context["selected_user_id"] = self.request.GET.get("user") or ""
         context["slug"] = self.kwargs.get("slug")
+        if context["slug"]:
+            context["customer_stats"] = CustomerQuoteStats.objects.select_related("customer").filter(customer__slug=context["slug"]).first()
         
         return context
     
+    def post(self, request, *args, **kwargs):
+        """Acción en bloque (aprobar / enviar / expirar) sobre las cotizaciones seleccionadas."""
+        action = request.POST.get("action")
+        pks = [pk for pk in request.POST.getlist("quotes") if pk.isdigit()]
+
+        if not request.capabilities.can_approve:
+            messages.error(request, "No tienes permisos para cambiar cotizaciones en bloque.")
+            return redirect(request.get_full_path())
+
+        if action not in Quote.BULK_ACTIONS or not pks:
+            messages.warning(request, "Selecciona al menos una cotización y una acción.")
+            return redirect(request.get_full_path())
+
+        results = Quote.objects.visible_to(request.user).filter(pk__in=pks).bulk_action(action, user=request.user)
+
+        changed = [result for result in results if result.ok]
+        if changed:
+            messages.success(request, f"{len(changed)} cotización(es) cambiadas a «{changed[0].message}»: {', '.join(result.quote_id for result in changed)}")
+        for result in results:
+            if not result.ok:
+                messages.warning(request, f"{result.quote_id}: {result.message}")
+
+        return redirect(request.get_full_path())
+
     def paginate_queryset(self, queryset, page_size):
         paginator = self.get_paginator(queryset, page_size)
         page = self.request.GET.get(self.page_kwarg, 1)
@@ -78,7 +141,7 @@ class QuoteHeadCreateView(LoginRequiredMixin, CreateView):
         form.instance.created_by = self.request.user
         form.instance.updated_by = self.request.user
 
-        if not self.request.user.profile.is_csr and not self.request.user.profile.is_manager:
+        if not self.request.capabilities.can_see_all_quotes:
             form.instance.user = self.request.user
 
         response = super().form_valid(form)
@@ -110,10 +173,10 @@ class QuoteHeadCreateView(LoginRequiredMixin, CreateView):
     
 @login_required
 def quote_edit(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    # Vendedor solo puede editar las suyas; CSR / manager cualquier cotización.
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
     discount_choices = QuoteLine.Discount.choices
     quote_line_form = QuoteLineForm()
-    user = request.user
 
     # Reglas de edición por status (ajusta si cambias el workflow)
     if quote.status not in [
@@ -124,16 +187,6 @@ def quote_edit(request, pk):
         messages.warning(request, "No se puede editar una cotización en este status.")
         return redirect("quotes:quote_detail", pk=quote.pk)
 
-    # Permisos: solo CSR / manager pueden editar cualquier cotización.
-    # Vendedor solo puede editar las suyas.
-    if not (user.profile.is_csr or user.profile.is_manager):
-        if quote.user != user:
-            messages.error(
-                request,
-                f"No tienes permisos para editar la cotización {pk}.",
-            )
-            return redirect("quotes:quote_list")
-
     if request.method == "POST":
         # 1) Detectar líneas enviadas en el POST
         posted_lines = [
@@ -199,15 +252,23 @@ def quote_edit(request, pk):
             # Si quieres, aquí puedes mostrar errores, pero no bloqueamos el guardado de líneas
             pass
 
-        # 6) Invalidate / reevaluate approval si estaba APPROVED o PENDING_APPROVAL
-        quote.reevaluate_after_edit()
+        # 6) Actualizar el total guardado (contadores del dashboard)
+        quote.refresh_total()
+
+        # 7) Invalidate / reevaluate approval si estaba APPROVED o PENDING_APPROVAL
+        quote.reevaluate_after_edit(user=request.user)
 
         messages.success(request, "La cotización se guardó correctamente.")
         return redirect("quotes:quote_detail", pk=quote.pk)
 
     # GET: cargar formulario con la info actual
     payment_terms_form = QuotePaymentTermsForm(instance=quote)
-    quote_lines = QuoteLine.objects.filter(quote=quote)
+    quote_lines = (
+        QuoteLine.objects
+        .filter(quote=quote)
+        .select_related("product")
+        .annotate(has_related=Exists(RelatedProduct.objects.filter(product=OuterRef("product"))))
+    )
 
     return render(request, "quotes/quote_edit.html", {
         "quote_line_form": quote_line_form,
@@ -218,45 +279,48 @@ def quote_edit(request, pk):
     })
 
 
+def _quote_detail_validators(request, pk):
+    # Fechas de la cotización y de lo que muestra: cliente, contacto, SKU de los
+    # productos y la primera página de comentarios (el más reciente y el total)
+    comments = QuoteComment.objects.filter(quote=OuterRef("pk")).order_by().values("quote")
+    lines = QuoteLine.objects.filter(quote=OuterRef("pk")).order_by().values("quote")
+    return (
+        Quote.objects
+        .visible_to(request.user)
+        .filter(pk=pk)
+        .annotate(
+            last_comment=Subquery(comments.annotate(last=Max("created")).values("last")),
+            comment_count=Subquery(comments.annotate(n=Count("pk")).values("n")),
+            products_updated=Subquery(lines.annotate(last=Max("product__updated")).values("last")),
+        )
+        .values_list("updated", "customer__updated", "contact__updated", "last_comment", "comment_count", "products_updated")
+        .first()
+    )
+
+
 @login_required
+@conditional_view(_quote_detail_validators)
 def quote_detail(request, pk):
     quote_qs = (
         Quote.objects
+        .visible_to(request.user)
         .select_related("customer", "contact", "user")
         .prefetch_related(
             "quote_sections__section_lines__product",
             "quote_sections__section_lines",
+            # Subtotal, descuento, IVA y total recorren quote_lines
+            "quote_lines",
         )
     )
     quote = get_object_or_404(quote_qs, pk=pk)
-    comments = (
-        QuoteComment.objects
-        .filter(quote=quote)
-        .select_related("user")
-        .order_by("-created")
-    )
-    comment_form = QuoteCommentForm()
 
-    return render(request, "quotes/quote_detail.html", {
-        "quote": quote,
-        "comments": comments,
-        "comment_form": comment_form,
-    })
+    return render(request, "quotes/quote_detail.html", quote_comments.block_context(quote, QuoteCommentForm()))
 
 @login_required
 def quote_close_internal(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
-    user = request.user
-
     # 1) Permisos: CSR / manager pueden finalizar cualquier cotización.
     #    Vendedor solo puede finalizar sus propias cotizaciones.
-    if not (user.profile.is_csr or user.profile.is_manager):
-        if quote.user != user:
-            messages.error(
-                request,
-                f"No tienes permisos para finalizar la cotización {pk}."
-            )
-            return redirect("quotes:quote_detail", pk=quote.pk)
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
 
     # 2) Solo se pueden finalizar cotizaciones en borrador
     if quote.status != Quote.Status.DRAFT:
@@ -267,7 +331,7 @@ def quote_close_internal(request, pk):
         return redirect("quotes:quote_detail", pk=quote.pk)
 
     # 3) Ejecutar lógica de cierre interno (APPROVED o PENDING_APPROVAL)
-    quote.close_internal()
+    reasons = quote.close_internal(user=request.user)
 
     # 4) Mensaje según el resultado
     if quote.status == Quote.Status.APPROVED:
@@ -278,7 +342,7 @@ def quote_close_internal(request, pk):
     elif quote.status == Quote.Status.PENDING_APPROVAL:
         messages.success(
             request,
-            "La cotización se finalizó y ha sido enviada a aprobación interna."
+            f"La cotización se finalizó y ha sido enviada a aprobación interna ({'; '.join(reasons)})."
         )
     else:
         # Esto no debería suceder con la lógica actual, pero dejamos un fallback defensivo
@@ -293,11 +357,11 @@ def quote_close_internal(request, pk):
 
 @login_required
 def quote_approve(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
     user = request.user
 
     # Permisos: solo manager (y opcionalmente CSR)
-    if not (user.profile.is_manager):
+    if not request.capabilities.can_approve:
         messages.error(request, "No tienes permisos para aprobar esta cotización.")
         return redirect("quotes:quote_detail", pk=quote.pk)
 
@@ -313,17 +377,13 @@ def quote_approve(request, pk):
 
 @login_required
 def quote_send(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    # Permisos: CSR / manager o el dueño de la cotización
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
     user = request.user
 
-    # Permisos
-    if not (user.profile.is_csr or user.profile.is_manager or quote.user == user):
-        messages.error(request, "No tienes permisos para enviar esta cotización.")
-        return redirect("quotes:quote_detail", pk=quote.pk)
-
     # Llamamos la lógica del modelo
     if quote.mark_sent(user=user):
-        messages.success(request, "La cotización se ha marcado como enviada.")
+        messages.success(request, f"La cotización se ha marcado como enviada; el correo a {quote.contact.email} saldrá en unos momentos.")
     else:
         messages.warning(request, "Solo puedes enviar cotizaciones aprobadas.")
 
@@ -331,13 +391,9 @@ def quote_send(request, pk):
 
 @login_required
 def quote_mark_won(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
     user = request.user
 
-    if not (user.profile.is_csr or user.profile.is_manager or quote.user == user):
-        messages.error(request, "No tienes permisos para actualizar esta cotización.")
-        return redirect("quotes:quote_detail", pk=quote.pk)
-
     if quote.mark_won(user=user):
         messages.success(request, "La cotización se ha marcado como ganada.")
     else:
@@ -348,13 +404,9 @@ def quote_mark_won(request, pk):
 
 @login_required
 def quote_mark_lost(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
     user = request.user
 
-    if not (user.profile.is_csr or user.profile.is_manager or quote.user == user):
-        messages.error(request, "No tienes permisos para actualizar esta cotización.")
-        return redirect("quotes:quote_detail", pk=quote.pk)
-
     if quote.mark_lost(user=user):
         messages.success(request, "La cotización se ha marcado como perdida.")
     else:
@@ -364,7 +416,7 @@ def quote_mark_lost(request, pk):
 
 @login_required
 def quote_add_comment(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
 
     if request.method == "POST":
         form = QuoteCommentForm(request.POST)
@@ -374,42 +426,68 @@ def quote_add_comment(request, pk):
             comment.user = request.user
             comment.save()
 
-            # Recargamos comentarios y limpiamos el form
-            comments = quote.comments.select_related("user").order_by("-created")
-            form = QuoteCommentForm()
-
+            # Recargamos la primera página de comentarios y limpiamos el form
             return render(
                 request,
                 "quotes/_quote_comments_block.html",
-                {
-                    "quote": quote,
-                    "comment_form": form,
-                    "comments": comments,
-                },
+                quote_comments.block_context(quote, QuoteCommentForm()),
             )
 
     # Si algo falla en el form, regresamos el bloque igual pero con errores
-    comments = quote.comments.select_related("user").order_by("-created")
-    form = QuoteCommentForm(request.POST or None)
-
     return render(
         request,
-        "quotes/partials/_quote_comments_block.html",
-        {
-            "quote": quote,
-            "comment_form": form,
-            "comments": comments,
-        },
+        "quotes/_quote_comments_block.html",
+        quote_comments.block_context(quote, QuoteCommentForm(request.POST or None)),
         status=400,
     )
+
+
+@login_required
+def quote_comments_more_htmx(request, pk):
+    """Página de comentarios anteriores al cursor `before` (botón "Cargar más")."""
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
+    before = quote_comments.parse_cursor(request.GET.get("before"))
+    if before is None:
+        return HttpResponseBadRequest()
+
+    comments, has_more = quote_comments.page(quote, before=before)
+    return render(request, "quotes/_quote_comments_more.html", {
+        "quote": quote,
+        "comments": comments,
+        "comments_has_more": has_more,
+        "comments_before": quote_comments.cursor(comments[-1].created) if comments else None,
+    })
+
+
+@login_required
+def quote_comments_poll_htmx(request, pk):
+    """
+    Comentarios posteriores al cursor `since`. Si no hay, 304 sin cuerpo y el
+    bloque se queda como está.
+    """
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
+    since = quote_comments.parse_cursor(request.GET.get("since"))
+    if since is None:
+        return HttpResponseBadRequest()
+
+    comments = quote_comments.newer(quote, since)
+    if not comments:
+        return HttpResponseNotModified()
+
+    return render(request, "quotes/_quote_comments_new.html", {
+        "quote": quote,
+        "comments": comments,
+        "comments_count": QuoteComment.objects.filter(quote=quote).count(),
+        "comments_since": quote_comments.cursor(comments[0].created),
+        "comments_poll_seconds": quote_comments.POLL_SECONDS,
+    })
     
 
 def load_users_htmx(request):
-    users = CustomUser.objects.filter(is_active=True)
-    
-    return render(request, "quotes/_users_select_options.html", {"users": users})
+    return render(request, "quotes/_users_select_options.html", {"users": active_users()})
 
 @login_required
+@replica_reads
 def product_search_htmx(request):
     search_term = (request.GET.get("product_search") or "").strip()
 
@@ -419,13 +497,33 @@ def product_search_htmx(request):
         })
 
     query = Q(name__icontains=search_term) | Q(sku__icontains=search_term)
-    products = Product.objects.filter(query).order_by("name")[:10]
+    products = (
+        Product.objects
+        .filter(query)
+        .annotate(has_related=Exists(RelatedProduct.objects.filter(product=OuterRef("pk"))))
+        .order_by("name")[:10]
+    )
     
     return render(request, "quotes/_product_search.html", {
         "products": products
     })
 
+def _related_products_validators(request, pk):
+    return (
+        Product.objects
+        .filter(pk=pk)
+        .annotate(
+            links_count=Count("related_links"),
+            links_updated=Max("related_links__updated"),
+            related_updated=Max("related_links__related_product__updated"),
+        )
+        .values_list("updated", "links_count", "links_updated", "related_updated")
+        .first()
+    )
+
+
 @login_required
+@conditional_view(_related_products_validators)
 def related_products(request, pk):
     product = get_object_or_404(Product, pk=pk)
     related_products = product.related_product.all()
@@ -435,17 +533,11 @@ def related_products(request, pk):
         "related_products": related_products,
     })
 
+@login_required
 def quote_pdf_test(request, pk):
-    quote = get_object_or_404(Quote, pk=pk)
-
-    template = get_template("quotes/quote_pdf.html")
-    html_string = template.render({
-        "quote": quote,
-        "request": request,
-    })
+    quote = get_object_or_404(Quote.objects.visible_to(request.user), pk=pk)
 
-    html = HTML(string=html_string, base_url=request.build_absolute_uri())
-    pdf_bytes = html.write_pdf()
+    pdf_bytes = quote_pdf(quote)
 
     filename = f"TEST-cotizacion-{quote.id}.pdf"
 
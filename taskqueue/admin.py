@@ -0,0 +1,21 @@
+from django.contrib import admin, messages
+from django.utils import timezone
+
+from .models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ["name", "status", "priority", "run_at", "attempts", "wait_ms", "duration_ms", "locked_by", "created"]
+    list_filter = ["status", "name"]
+    search_fields = ["name", "locked_by"]
+    date_hierarchy = "created"
+    readonly_fields = ["attempts", "locked_by", "locked_until", "last_error", "created", "started_at", "finished_at", "wait_ms", "duration_ms"]
+    actions = ["requeue_selected"]
+
+    @admin.action(description="Volver a encolar")
+    def requeue_selected(self, request, queryset):
+        updated = queryset.exclude(status=Task.Status.RUNNING).update(
+            status=Task.Status.QUEUED, attempts=0, run_at=timezone.now(), locked_by="", locked_until=None,
+        )
+        self.message_user(request, f"{updated} tarea(s) en cola de nuevo.", messages.SUCCESS)
@@ -0,0 +1,72 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from cachebus import bus
+from taskqueue import registry, worker
+from taskqueue.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Ejecuta las tareas en segundo plano guardadas en la base de datos. "
+        "Se pueden correr varios procesos a la vez."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1, help="Tareas que se reservan a la vez")
+        parser.add_argument("--interval", type=float, default=2, help="Segundos de espera cuando la cola está vacía")
+        parser.add_argument("--lease", type=int, default=worker.LEASE_SECONDS, help="Segundos que dura la reserva de una tarea (si no declara lease_seconds)")
+        parser.add_argument("--worker-id", default=None, help="Identificador del worker (por defecto host:pid)")
+        parser.add_argument("--burst", action="store_true", help="Terminar cuando la cola esté vacía")
+        parser.add_argument("--stats", action="store_true", help="Mostrar métricas por tarea y salir")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.print_stats()
+            return
+
+        worker_id = options["worker_id"] or worker.default_worker_id()
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        self.stdout.write(f"Worker {worker_id} iniciado.")
+        for task in registry.schedule_periodic():
+            self.stdout.write(f"Programada {task.name} #{task.pk}")
+
+        processed = 0
+        while not self.stopping:
+            close_old_connections()
+            # Las tareas leen del cache local como las vistas
+            bus.sync()
+            tasks = worker.claim(worker_id, batch_size=options["batch_size"], lease_seconds=options["lease"])
+
+            if not tasks:
+                if options["burst"]:
+                    break
+                time.sleep(options["interval"])
+                continue
+
+            for task in tasks:
+                ok = worker.run(task, lease_seconds=options["lease"])
+                processed += 1
+                status = self.style.SUCCESS("ok") if ok else self.style.ERROR("error")
+                self.stdout.write(f"{task.name} #{task.pk}: {status} ({task.duration_ms} ms, espera {task.wait_ms} ms)")
+
+        self.stdout.write(f"Worker {worker_id} terminado; tareas ejecutadas: {processed}")
+
+    def stop(self, signum, frame):
+        # Termina la tarea en curso y sale
+        self.stopping = True
+
+    def print_stats(self):
+        rows = Task.objects.stats()
+        self.stdout.write(f"{'Tarea':<36}{'Runs':>6}{'Errores':>9}{'Espera ms':>11}{'Prom. ms':>10}{'Máx. ms':>10}")
+        for row in rows:
+            self.stdout.write(
+                f"{row['name']:<36}{row['runs']:>6}{row['failures']:>9}"
+                f"{row['avg_wait_ms'] or 0:>11.0f}{row['avg_duration_ms'] or 0:>10.0f}{row['max_duration_ms'] or 0:>10}"
+            )
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:48
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Task',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='Tarea')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='Argumentos')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='Argumentos con nombre')),
+                ('priority', models.SmallIntegerField(default=0, help_text='Mayor número corre primero', verbose_name='Prioridad')),
+                ('status', models.CharField(choices=[('Q', 'En cola'), ('R', 'Corriendo'), ('D', 'Terminada'), ('F', 'Fallida')], default='Q', max_length=1, verbose_name='Estatus')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Correr a partir de')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Intentos')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Intentos máximos')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Worker')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='Reservada hasta')),
+                ('last_error', models.TextField(blank=True, verbose_name='Último error')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Inicio')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Fin')),
+                ('wait_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Espera (ms)')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Duración (ms)')),
+            ],
+            options={
+                'verbose_name': 'Tarea',
+                'verbose_name_plural': 'Tareas',
+                'ordering': ['-created'],
+                'indexes': [models.Index(fields=['status', 'priority', 'run_at'], name='taskqueue_t_status_943003_idx'), models.Index(fields=['name', 'status'], name='taskqueue_t_name_ffeab3_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,70 @@
+from django.db import models
+from django.utils import timezone
+
+
+class TaskQuerySet(models.QuerySet):
+    def ready(self, now=None):
+        """En cola y con run_at vencido, o corriendo con la reserva vencida (worker caído)."""
+        now = now or timezone.now()
+        return self.filter(
+            models.Q(status=Task.Status.QUEUED, run_at__lte=now)
+            | models.Q(status=Task.Status.RUNNING, locked_until__lt=now)
+        )
+
+    def stats(self):
+        """Métricas por tarea: ejecuciones, errores y tiempos (ms) de espera y ejecución."""
+        return (
+            self.exclude(duration_ms=None)
+            .order_by("name")
+            .values("name")
+            .annotate(
+                runs=models.Count("pk"),
+                failures=models.Count("pk", filter=models.Q(status=Task.Status.FAILED)),
+                avg_wait_ms=models.Avg("wait_ms"),
+                avg_duration_ms=models.Avg("duration_ms"),
+                max_duration_ms=models.Max("duration_ms"),
+            )
+        )
+
+
+class Task(models.Model):
+    """
+    Tarea en segundo plano guardada en la base de datos del proyecto. La toma un
+    worker (`manage.py runworker`); ver taskqueue/worker.py.
+    """
+    class Status(models.TextChoices):
+        QUEUED = "Q", "En cola"
+        RUNNING = "R", "Corriendo"
+        DONE = "D", "Terminada"
+        FAILED = "F", "Fallida"
+
+    name = models.CharField(max_length=100, verbose_name="Tarea")
+    args = models.JSONField(default=list, blank=True, verbose_name="Argumentos")
+    kwargs = models.JSONField(default=dict, blank=True, verbose_name="Argumentos con nombre")
+    priority = models.SmallIntegerField(default=0, verbose_name="Prioridad", help_text="Mayor número corre primero")
+    status = models.CharField(max_length=1, choices=Status.choices, default=Status.QUEUED, verbose_name="Estatus")
+    run_at = models.DateTimeField(default=timezone.now, verbose_name="Correr a partir de")
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Intentos")
+    max_attempts = models.PositiveSmallIntegerField(default=3, verbose_name="Intentos máximos")
+    locked_by = models.CharField(max_length=100, blank=True, verbose_name="Worker")
+    locked_until = models.DateTimeField(blank=True, null=True, verbose_name="Reservada hasta")
+    last_error = models.TextField(blank=True, verbose_name="Último error")
+    created = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(blank=True, null=True, verbose_name="Inicio")
+    finished_at = models.DateTimeField(blank=True, null=True, verbose_name="Fin")
+    wait_ms = models.PositiveIntegerField(blank=True, null=True, verbose_name="Espera (ms)")
+    duration_ms = models.PositiveIntegerField(blank=True, null=True, verbose_name="Duración (ms)")
+
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = "Tarea"
+        verbose_name_plural = "Tareas"
+        ordering = ["-created"]
+        indexes = [
+            models.Index(fields=["status", "priority", "run_at"]),
+            models.Index(fields=["name", "status"]),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()})"
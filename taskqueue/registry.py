@@ -0,0 +1,89 @@
+"""
+Registro de tareas y encolado.
+
+Cada app declara sus tareas en <app>/tasks.py (se importan al arrancar, ver
+TaskqueueConfig.ready):
+
+    from taskqueue.registry import task
+
+    @task("quotes.expire_quotes", priority=5)
+    def expire_quotes():
+        ...
+
+y las encola con enqueue("quotes.expire_quotes") o expire_quotes.delay(). Los
+argumentos se guardan como JSON.
+
+Tareas periódicas: con every=timedelta(...) la tarea se vuelve a programar sola
+cada vez que termina (bien o con error definitivo). `runworker` llama a
+schedule_periodic() al arrancar para encolar las que no tengan una ejecución
+pendiente, así que basta con tener al menos un worker corriendo; no hace falta
+cron.
+
+lease_seconds: cuánto dura la reserva de la tarea mientras corre (por defecto
+la del worker, --lease). Las tareas largas deben declarar una mayor; si la
+reserva vence a la mitad otro worker la vuelve a tomar.
+"""
+from django.db import transaction
+
+from .models import Task
+
+_registry = {}
+# Tareas que ya tienen una ejecución programada o en curso
+PENDING_STATUSES = (Task.Status.QUEUED, Task.Status.RUNNING)
+
+
+class TaskNotRegistered(LookupError):
+    pass
+
+
+def task(name, priority=0, max_attempts=3, lease_seconds=None, every=None):
+    def decorator(func):
+        _registry[name] = func
+        func.task_name = name
+        func.priority = priority
+        func.max_attempts = max_attempts
+        func.lease_seconds = lease_seconds
+        func.every = every
+        func.delay = lambda *args, **kwargs: enqueue(name, args=args, kwargs=kwargs, priority=priority, max_attempts=max_attempts)
+        return func
+    return decorator
+
+
+def get_task(name):
+    try:
+        return _registry[name]
+    except KeyError:
+        raise TaskNotRegistered(name)
+
+
+def enqueue(name, args=(), kwargs=None, priority=0, run_at=None, max_attempts=3, unique=False):
+    """
+    Agrega una tarea a la cola. Con unique=True no se agrega si ya hay una igual
+    (mismo nombre y argumentos) esperando. run_at programa la ejecución.
+    """
+    get_task(name)
+    values = {"name": name, "args": list(args), "kwargs": kwargs or {}}
+
+    if unique and Task.objects.filter(status=Task.Status.QUEUED, **values).exists():
+        return None
+
+    if run_at is not None:
+        values["run_at"] = run_at
+    return Task.objects.create(priority=priority, max_attempts=max_attempts, **values)
+
+
+def enqueue_on_commit(name, **options):
+    """enqueue() cuando termine la transacción actual (si no hay transacción, de inmediato)."""
+    transaction.on_commit(lambda: enqueue(name, **options))
+
+
+def schedule_periodic():
+    """Encola las tareas periódicas sin ejecución pendiente; regresa las creadas."""
+    created = []
+    for name, func in _registry.items():
+        if func.every is None:
+            continue
+        if Task.objects.filter(name=name, status__in=PENDING_STATUSES).exists():
+            continue
+        created.append(enqueue(name, priority=func.priority, max_attempts=func.max_attempts))
+    return created
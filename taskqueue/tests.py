@@ -0,0 +1,136 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from . import registry, worker
+from .models import Task
+from .registry import enqueue, task
+
+calls = []
+
+
+@task("tests.ok")
+def ok_task(value):
+    calls.append(value)
+
+
+@task("tests.fail", max_attempts=2)
+def failing_task():
+    raise RuntimeError("falla")
+
+
+@task("tests.long", lease_seconds=3600)
+def long_task():
+    calls.append(Task.objects.get(name="tests.long").locked_until)
+
+
+@task("tests.daily", every=timedelta(days=1))
+def daily_task():
+    calls.append("daily")
+
+
+@task("tests.slow", every=timedelta(days=1))
+def slow_task():
+    # Mientras corre, la reserva vence y otro worker la toma
+    Task.objects.filter(name="tests.slow").update(locked_until=timezone.now() - timedelta(seconds=1))
+    calls.append(worker.claim("w2")[0])
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim(self):
+        low = enqueue("tests.ok", args=[1])
+        high = enqueue("tests.ok", args=[2], priority=10)
+        enqueue("tests.ok", args=[3], run_at=timezone.now() + timedelta(hours=1))
+
+        claimed = worker.claim("w1", batch_size=5)
+        self.assertEqual([t.pk for t in claimed], [high.pk, low.pk])
+        self.assertTrue(all(t.status == Task.Status.RUNNING and t.attempts == 1 for t in claimed))
+        # Otro worker no toma las mismas
+        self.assertEqual(worker.claim("w2", batch_size=5), [])
+
+        self.assertTrue(worker.run(claimed[0]))
+        self.assertEqual(calls, [2])
+        self.assertEqual(Task.objects.get(pk=high.pk).status, Task.Status.DONE)
+
+    def test_expired_lease_is_taken_over(self):
+        enqueue("tests.ok", args=[1])
+        first = worker.claim("w1")[0]
+
+        # El worker se cayó: la reserva vence y la toma otro
+        Task.objects.update(locked_until=timezone.now() - timedelta(seconds=1))
+        second = worker.claim("w2")[0]
+        self.assertEqual(second.pk, first.pk)
+
+        # El primero ya no la ejecuta
+        with self.assertLogs("taskqueue.worker", "WARNING"):
+            self.assertFalse(worker.run(first))
+        self.assertTrue(worker.run(second))
+        self.assertEqual(calls, [1])
+
+    def test_lease_renewed_per_task(self):
+        enqueue("tests.long")
+        claimed = worker.claim("w1", lease_seconds=1)[0]
+
+        self.assertTrue(worker.run(claimed, lease_seconds=1))
+        # Mientras corría tenía la reserva que declara la tarea, no la del worker
+        self.assertGreater(calls[0], timezone.now() + timedelta(minutes=59))
+
+    def test_retry(self):
+        failing = failing_task.delay()
+
+        claimed = worker.claim("w1")[0]
+        with self.assertLogs("taskqueue.worker", "WARNING"):
+            self.assertFalse(worker.run(claimed))
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Task.Status.QUEUED, 1))
+        self.assertIn("RuntimeError", failing.last_error)
+        self.assertGreater(failing.run_at, timezone.now())
+        self.assertEqual(worker.claim("w1"), [])
+
+        Task.objects.update(run_at=timezone.now())
+        with self.assertLogs("taskqueue.worker", "WARNING"):
+            worker.run(worker.claim("w1")[0])
+        failing.refresh_from_db()
+        self.assertEqual((failing.status, failing.attempts), (Task.Status.FAILED, 2))
+
+    def test_unique_enqueue(self):
+        first = enqueue("tests.ok", args=[1], unique=True)
+        self.assertIsNone(enqueue("tests.ok", args=[1], unique=True))
+        self.assertIsNotNone(enqueue("tests.ok", args=[2], unique=True))
+
+        # Ya corriendo no cuenta como pendiente: sí se encola otra
+        worker.claim("w1", batch_size=5)
+        self.assertIsNotNone(enqueue("tests.ok", args=[1], unique=True))
+        self.assertEqual(Task.objects.filter(args=[1]).count(), 2)
+        self.assertEqual(Task.objects.get(pk=first.pk).status, Task.Status.RUNNING)
+
+    def test_periodic(self):
+        created = [t.name for t in registry.schedule_periodic()]
+        self.assertIn("tests.daily", created)
+        self.assertNotIn("tests.ok", created)
+        # Ya hay una pendiente
+        self.assertNotIn("tests.daily", [t.name for t in registry.schedule_periodic()])
+
+        Task.objects.exclude(name="tests.daily").delete()
+        claimed = worker.claim("w1")[0]
+        self.assertTrue(worker.run(claimed))
+
+        following = Task.objects.get(name="tests.daily", status=Task.Status.QUEUED)
+        self.assertGreater(following.run_at, timezone.now() + timedelta(hours=23))
+
+    def test_result_not_saved_after_lease_taken_over(self):
+        enqueue("tests.slow")
+        first = worker.claim("w1")[0]
+
+        with self.assertLogs("taskqueue.worker", "WARNING"):
+            self.assertTrue(worker.run(first))
+
+        second = calls[0]
+        task = Task.objects.get(pk=first.pk)
+        self.assertEqual((task.status, task.locked_by), (Task.Status.RUNNING, second.locked_by))
+        # La siguiente ejecución la programa solo quien guarda el resultado
+        self.assertFalse(Task.objects.filter(name="tests.slow", status=Task.Status.QUEUED).exists())
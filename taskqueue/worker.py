@@ -0,0 +1,146 @@
+"""
+Toma y ejecuta tareas de la cola.
+
+Varios procesos `runworker` pueden correr a la vez. En bases de datos con
+SELECT ... FOR UPDATE SKIP LOCKED (PostgreSQL) cada worker bloquea sus filas y
+los demás las saltan; en SQLite se usa un UPDATE condicional que reserva las
+tareas por un tiempo (lease). En ambos casos una reserva vencida (worker caído)
+se vuelve a tomar.
+
+La reserva se renueva al empezar cada tarea (las de un bloque esperan su turno)
+con el lease_seconds que declare la tarea, o el del worker.
+"""
+import logging
+import os
+import socket
+import time
+import traceback
+import uuid
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+from .registry import TaskNotRegistered, enqueue, get_task
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 5 * 60
+RETRY_BASE_SECONDS = 30
+CLAIM_RETRIES = 5
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _order(queryset):
+    return queryset.order_by("-priority", "run_at", "pk")
+
+
+def claim(worker_id, batch_size=1, lease_seconds=LEASE_SECONDS):
+    """Reserva hasta batch_size tareas listas, por prioridad y fecha programada."""
+    now = timezone.now()
+    locked_until = now + timedelta(seconds=lease_seconds)
+    claim_id = f"{worker_id}:{uuid.uuid4().hex[:8]}"
+    values = {
+        "status": Task.Status.RUNNING,
+        "locked_by": claim_id,
+        "locked_until": locked_until,
+        "started_at": now,
+        "attempts": F("attempts") + 1,
+    }
+
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            pks = list(
+                _order(Task.objects.ready(now))
+                .select_for_update(skip_locked=True)
+                .values_list("pk", flat=True)[:batch_size]
+            )
+            Task.objects.filter(pk__in=pks).update(**values)
+    else:
+        # Sin SKIP LOCKED: el UPDATE vuelve a revisar que sigan listas, así que si
+        # otro worker se adelantó esas filas simplemente no cambian; en ese caso
+        # se intenta con las siguientes.
+        for _ in range(CLAIM_RETRIES):
+            pks = list(_order(Task.objects.ready(now)).values_list("pk", flat=True)[:batch_size])
+            if not pks or Task.objects.ready(now).filter(pk__in=pks).update(**values):
+                break
+
+    return list(_order(Task.objects.filter(locked_by=claim_id, status=Task.Status.RUNNING)))
+
+
+def extend_lease(task, lease_seconds=LEASE_SECONDS):
+    """Renueva la reserva de la tarea; False si venció y ya la tomó otro worker."""
+    locked_until = timezone.now() + timedelta(seconds=lease_seconds)
+    renewed = Task.objects.filter(
+        pk=task.pk, locked_by=task.locked_by, status=Task.Status.RUNNING,
+    ).update(locked_until=locked_until)
+    if renewed:
+        task.locked_until = locked_until
+    return bool(renewed)
+
+
+def run(task, lease_seconds=LEASE_SECONDS):
+    """Ejecuta una tarea reservada y guarda resultado y tiempos."""
+    try:
+        func = get_task(task.name)
+    except TaskNotRegistered:
+        func = None
+
+    if not extend_lease(task, func and func.lease_seconds or lease_seconds):
+        logger.warning("tarea=%s id=%s: la reserva venció y la tomó otro worker", task.name, task.pk)
+        return False
+
+    task.started_at = timezone.now()
+    started = time.perf_counter()
+    try:
+        if func is None:
+            # Se quitó del código después de encolarla
+            raise TaskNotRegistered(task.name)
+        func(*task.args, **task.kwargs)
+    except Exception as exc:
+        error = traceback.format_exc()
+        ok = False
+        if isinstance(exc, TaskNotRegistered):
+            # No tiene caso reintentar
+            task.attempts = task.max_attempts
+    else:
+        error = ""
+        ok = True
+
+    now = timezone.now()
+    task.finished_at = now
+    task.duration_ms = int((time.perf_counter() - started) * 1000)
+    task.wait_ms = max(int((task.started_at - task.run_at).total_seconds() * 1000), 0)
+    task.last_error = error
+    task.locked_until = None
+
+    if ok:
+        task.status = Task.Status.DONE
+    elif task.attempts < task.max_attempts:
+        task.status = Task.Status.QUEUED
+        task.run_at = now + timedelta(seconds=RETRY_BASE_SECONDS * 2 ** (task.attempts - 1))
+    else:
+        task.status = Task.Status.FAILED
+
+    # Solo si la reserva sigue siendo de este worker: si venció mientras corría y
+    # otro worker la tomó, el resultado (y la siguiente ejecución) son del otro
+    fields = ["status", "attempts", "run_at", "started_at", "finished_at", "duration_ms", "wait_ms", "last_error", "locked_until"]
+    saved = Task.objects.filter(
+        pk=task.pk, locked_by=task.locked_by, status=Task.Status.RUNNING,
+    ).update(**{field: getattr(task, field) for field in fields})
+    if not saved:
+        logger.warning("tarea=%s id=%s: la reserva venció mientras corría; no se guarda el resultado", task.name, task.pk)
+        return ok
+
+    if func is not None and func.every and task.status != Task.Status.QUEUED:
+        # Periódica: la siguiente ejecución se programa al terminar esta
+        enqueue(task.name, priority=func.priority, max_attempts=func.max_attempts, run_at=now + func.every, unique=True)
+
+    log = logger.info if ok else logger.warning
+    log("tarea=%s id=%s ok=%s intento=%s espera_ms=%s duracion_ms=%s", task.name, task.pk, ok, task.attempts, task.wait_ms, task.duration_ms)
+    return ok
@@ -0,0 +1,113 @@
+"""
+Rol del usuario y permisos derivados, resueltos una sola vez por request.
+
+El rol se guarda en la sesión junto con la versión del perfil (Profile.updated).
+La versión se guarda en el cache para no consultarla en cada request; al guardar
+un Profile se borra de ese cache y, con el bus, del de los demás procesos (ver
+users/receivers.py), así que la siguiente request la vuelve a leer. Como sale de
+la base de datos, todos los workers tienen la misma y la sesión (y los ETag de
+bitquotes/conditional.py) no cambian al pasar de un worker a otro.
+"""
+from django.core.cache import cache
+
+from cachebus import bus
+
+from .models import Profile
+
+SESSION_KEY = "_capabilities"
+
+
+def _version_key(user_id):
+    return f"users:profile-version:{user_id}"
+
+
+def _read_profile(user_id):
+    """(rol, versión) del perfil en la base de datos; la versión es "" si no tiene perfil."""
+    role, updated = Profile.objects.filter(user_id=user_id).values_list("role", "updated").first() or (None, None)
+    version = updated.isoformat() if updated else ""
+    cache.set(_version_key(user_id), version, timeout=None)
+    return role, version
+
+
+def get_profile_version(user_id):
+    version = cache.get(_version_key(user_id))
+    if version is None:
+        _role, version = _read_profile(user_id)
+    return version
+
+
+def bump_profile_version(user_id):
+    cache.delete(_version_key(user_id))
+    bus.publish(_version_key(user_id))
+
+
+class Capabilities:
+    def __init__(self, role=None, user_id=None):
+        self.role = role
+        self.user_id = user_id
+
+    def __repr__(self):
+        return f"<Capabilities user={self.user_id} role={self.role}>"
+
+    @property
+    def is_sales(self):
+        return self.role == Profile.Role.SALES
+
+    @property
+    def is_csr(self):
+        return self.role == Profile.Role.CSR
+
+    @property
+    def is_manager(self):
+        return self.role == Profile.Role.MANAGER
+
+    @property
+    def is_admin(self):
+        return self.role == Profile.Role.ADMIN
+
+    @property
+    def can_see_all_quotes(self):
+        # CSR / manager ven y operan cualquier cotización; el resto solo las suyas
+        return self.is_csr or self.is_manager
+
+    @property
+    def can_approve(self):
+        return self.is_manager
+
+
+def capabilities_for(user):
+    """
+    Regresa las capacidades del usuario. Usa las que dejó el middleware en el
+    objeto usuario; si no existen (shell, comandos) las lee del perfil.
+    """
+    if user is None or not user.is_authenticated:
+        return Capabilities()
+
+    capabilities = getattr(user, "capabilities", None)
+    if capabilities is None:
+        role = Profile.objects.filter(user_id=user.pk).values_list("role", flat=True).first()
+        capabilities = user.capabilities = Capabilities(role=role, user_id=user.pk)
+
+    return capabilities
+
+
+def load_capabilities(request):
+    user = request.user
+    if not user.is_authenticated:
+        return Capabilities()
+
+    version = cache.get(_version_key(user.pk))
+    cached = request.session.get(SESSION_KEY)
+
+    if version is not None and cached and cached.get("user_id") == user.pk and cached.get("version") == version:
+        role = cached["role"]
+    else:
+        # Una sola consulta trae el rol y la versión
+        role, version = _read_profile(user.pk)
+        current = {"user_id": user.pk, "role": role, "version": version}
+        if cached != current:
+            request.session[SESSION_KEY] = current
+
+    user.capabilities = Capabilities(role=role, user_id=user.pk)
+
+    return user.capabilities
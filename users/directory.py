@@ -0,0 +1,62 @@
+"""
+Directorio de usuarios activos para los selects de vendedor.
+
+La lista (id, nombre, rol) se guarda en el cache bajo una llave versionada; la
+versión cambia al guardar o borrar un CustomUser o un Profile (ver
+users/receivers.py), así que nunca se borra nada explícitamente. La versión es
+la misma en todos los workers (bus.shared_version) porque también va en los ETag.
+"""
+from dataclasses import dataclass
+
+from django.core.cache import cache
+
+from cachebus import bus
+
+from .models import CustomUser
+
+VERSION_KEY = "users:directory-version"
+DIRECTORY_TIMEOUT = 60 * 60 * 24
+
+
+@dataclass(frozen=True)
+class DirectoryEntry:
+    id: int
+    name: str
+    role: str | None
+
+
+def get_directory_version():
+    return bus.shared_version(VERSION_KEY)
+
+
+def bump_directory_version():
+    bus.bump_shared_version(VERSION_KEY)
+
+
+def active_users():
+    """Usuarios activos ordenados por nombre, como lista de DirectoryEntry."""
+    key = f"users:directory:{get_directory_version()}"
+    entries = cache.get(key)
+
+    if entries is None:
+        rows = (
+            CustomUser.objects
+            .filter(is_active=True)
+            .order_by("first_name", "last_name", "username")
+            .values_list("pk", "first_name", "last_name", "username", "profile__role")
+        )
+        entries = [
+            DirectoryEntry(id=pk, name=f"{first_name} {last_name}".strip() or username, role=role)
+            for pk, first_name, last_name, username, role in rows
+        ]
+        cache.set(key, entries, timeout=DIRECTORY_TIMEOUT)
+
+    return entries
+
+
+def active_user_ids():
+    return {entry.id for entry in active_users()}
+
+
+def active_user_choices():
+    return [(entry.id, entry.name) for entry in active_users()]
@@ -0,0 +1,26 @@
+from django.utils.functional import SimpleLazyObject
+
+from .capabilities import load_capabilities
+
+
+class CapabilitiesMiddleware:
+    """
+    Expone `request.capabilities` (rol y permisos del usuario). Se resuelve de
+    forma perezosa y a lo más una vez por request. Debe ir después de
+    AuthenticationMiddleware.
+
+    También se asigna a `request.user.capabilities` para que el código que solo
+    recibe el usuario (p. ej. Quote.objects.visible_to) use el mismo valor en
+    lugar de consultar el perfil.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.capabilities = SimpleLazyObject(lambda: load_capabilities(request))
+
+        if request.user.is_authenticated:
+            request.user.capabilities = request.capabilities
+
+        return self.get_response(request)
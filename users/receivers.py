@@ -0,0 +1,36 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .capabilities import bump_profile_version
+from .directory import bump_directory_version
+from bitquotes.generations import bump_generation
+from .models import CustomUser, Profile
+
+
+@receiver(post_save, sender=Profile, dispatch_uid="users_profile_saved")
+@receiver(post_delete, sender=Profile, dispatch_uid="users_profile_deleted")
+def invalidate_capabilities(sender, instance, **kwargs):
+    bump_profile_version(instance.user_id)
+    bump_generation(Profile)
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid="users_directory_user_saved")
+@receiver(post_save, sender=Profile, dispatch_uid="users_directory_profile_saved")
+@receiver(post_delete, sender=CustomUser, dispatch_uid="users_directory_user_deleted")
+@receiver(post_delete, sender=Profile, dispatch_uid="users_directory_profile_deleted")
+def invalidate_directory(sender, instance, update_fields=None, **kwargs):
+    # El login solo actualiza last_login; no cambia nada del directorio
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+
+    bump_directory_version()
+
+
+@receiver(post_save, sender=CustomUser, dispatch_uid="users_bump_user_generation_on_save")
+@receiver(post_delete, sender=CustomUser, dispatch_uid="users_bump_user_generation_on_delete")
+def bump_user_generation(sender, update_fields=None, **kwargs):
+    # Nombre y correo del vendedor salen en el PDF; el login no los cambia
+    if update_fields and set(update_fields) == {"last_login"}:
+        return
+
+    bump_generation(CustomUser)
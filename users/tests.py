@@ -1,3 +1,54 @@
+from django.core.cache import cache
 from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from .capabilities import SESSION_KEY, get_profile_version
+from .directory import get_directory_version
+from .models import CustomUser, Profile
+
+
+class ProfileVersionTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username="ventas", password="x")
+        cls.profile = Profile.objects.create(user=cls.user, role=Profile.Role.SALES, phone="8112345678", cel_phone="8112345678", position="Ventas")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_same_version_in_every_process(self):
+        version = get_profile_version(self.user.pk)
+        # Otro worker: su cache local no tiene la llave
+        cache.clear()
+        self.assertEqual(get_profile_version(self.user.pk), version)
+
+        self.profile.role = Profile.Role.MANAGER
+        self.profile.save()
+        self.assertNotEqual(get_profile_version(self.user.pk), version)
+
+    def test_session_reused_across_workers(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse("quotes:quote_list"))
+        stored = self.client.session[SESSION_KEY]
+
+        cache.clear()
+        self.client.get(reverse("quotes:quote_list"))
+        self.assertEqual(self.client.session[SESSION_KEY], stored)
+
+        self.profile.role = Profile.Role.MANAGER
+        self.profile.save()
+        self.client.get(reverse("quotes:quote_list"))
+        self.assertEqual(self.client.session[SESSION_KEY]["role"], Profile.Role.MANAGER)
+
+
+class DirectoryVersionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_same_version_in_every_process(self):
+        version = get_directory_version()
+        cache.clear()
+        self.assertEqual(get_directory_version(), version)
+
+        CustomUser.objects.create_user(username="nuevo", password="x")
+        self.assertNotEqual(get_directory_version(), version)